@@ -48,6 +48,7 @@ type InstagramAccountRepo interface {
 	List(context.Context, int, int, string, int64, string, string, string, string) ([]*InstagramAccount, int64, error)
 	GetAndLockInstagramAccounts(context.Context, int, int) ([]*InstagramAccount, error)
 	UnlockInstagramAccounts(context.Context, []uint, int) error
+	RenewInstagramAccountLocks(context.Context, []uint, int) error
 }
 
 // InstagramAccountUsecase 是Instagram账号用例
@@ -199,3 +200,16 @@ func (uc *InstagramAccountUsecase) UnlockInstagramAccounts(ctx context.Context,
 	uc.log.WithContext(ctx).Infof("UnlockInstagramAccounts: ids=%v, delay=%v", ids, delay)
 	return uc.repo.UnlockInstagramAccounts(ctx, ids, delay)
 }
+
+// RenewInstagramAccountLocks 续租已锁定的Instagram账号，锁定时间从当前时间重新计算
+func (uc *InstagramAccountUsecase) RenewInstagramAccountLocks(ctx context.Context, ids []uint, lockSeconds int) (int, error) {
+	if lockSeconds <= 0 {
+		lockSeconds = 60 // 默认锁定60秒
+	}
+	if lockSeconds > 600 {
+		lockSeconds = 600 // 最大锁定600秒
+	}
+
+	uc.log.WithContext(ctx).Infof("RenewInstagramAccountLocks: ids=%v, lockSeconds=%v", ids, lockSeconds)
+	return lockSeconds, uc.repo.RenewInstagramAccountLocks(ctx, ids, lockSeconds)
+}
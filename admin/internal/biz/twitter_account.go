@@ -52,6 +52,7 @@ type TwitterAccountRepo interface {
 	List(context.Context, int, int, string, int64, string, string, string, string) ([]*TwitterAccount, int64, error)
 	GetAndLockTwitterAccounts(context.Context, int, int, string) ([]*TwitterAccount, error)
 	UnlockTwitterAccounts(context.Context, []uint, int) error
+	RenewTwitterAccountLocks(context.Context, []uint, int) error
 }
 
 // TwitterAccountUsecase 是Twitter账号用例
@@ -209,3 +210,16 @@ func (uc *TwitterAccountUsecase) UnlockTwitterAccounts(ctx context.Context, ids
 	uc.log.WithContext(ctx).Infof("UnlockTwitterAccounts: ids=%v, delay=%v", ids, delay)
 	return uc.repo.UnlockTwitterAccounts(ctx, ids, delay)
 }
+
+// RenewTwitterAccountLocks 续租已锁定的Twitter账号，锁定时间从当前时间重新计算
+func (uc *TwitterAccountUsecase) RenewTwitterAccountLocks(ctx context.Context, ids []uint, lockSeconds int) (int, error) {
+	if lockSeconds <= 0 {
+		lockSeconds = 60 // 默认锁定60秒
+	}
+	if lockSeconds > 600 {
+		lockSeconds = 600 // 最大锁定600秒
+	}
+
+	uc.log.WithContext(ctx).Infof("RenewTwitterAccountLocks: ids=%v, lockSeconds=%v", ids, lockSeconds)
+	return lockSeconds, uc.repo.RenewTwitterAccountLocks(ctx, ids, lockSeconds)
+}
@@ -0,0 +1,43 @@
+package data
+
+import (
+	"context"
+	"fmt"
+	"time"
+
+	"github.com/redis/go-redis/v9"
+)
+
+// renewLocksScript 续租已锁定的账号
+// 把每个账号的过期时间设为当前时间+锁定时间，并保证整个Hash的过期时间不短于锁定时间+1分钟冗余，
+// 其它账号更晚的过期时间保持不变
+// KEYS[1]: 占用账号的Hash
+// ARGV: 当前时间, 锁定时间(秒), 账号ID...
+var renewLocksScript = redis.NewScript(`
+local now = tonumber(ARGV[1])
+local lock_seconds = tonumber(ARGV[2])
+for i = 3, #ARGV do
+    redis.call('HSET', KEYS[1], ARGV[i], now + lock_seconds)
+end
+local key_ttl = lock_seconds + 60
+if redis.call('TTL', KEYS[1]) < key_ttl then
+    redis.call('EXPIRE', KEYS[1], key_ttl)
+end
+return #ARGV - 2
+`)
+
+// renewAccountLocks 续租 occupiedKey 中的账号
+func renewAccountLocks(ctx context.Context, rdb *redis.Client, occupiedKey string, ids []uint, lockSeconds int) error {
+	if len(ids) == 0 {
+		return nil
+	}
+	args := make([]interface{}, 0, len(ids)+2)
+	args = append(args, time.Now().Unix(), lockSeconds)
+	for _, id := range ids {
+		args = append(args, fmt.Sprintf("%d", id))
+	}
+	if err := renewLocksScript.Run(ctx, rdb, []string{occupiedKey}, args...).Err(); err != nil {
+		return fmt.Errorf("续租账号失败: %v", err)
+	}
+	return nil
+}
@@ -399,3 +399,9 @@ func (r *InstagramAccountRepo) UnlockInstagramAccounts(ctx context.Context, ids
 	_, err := pipe.Exec(ctx)
 	return err
 }
+
+// RenewInstagramAccountLocks 续租已锁定的Instagram账号，同时延长整个占用Hash的过期时间，
+// 避免长时间没有新的锁定请求时Hash过期导致续租的账号被其它worker重复锁定
+func (r *InstagramAccountRepo) RenewInstagramAccountLocks(ctx context.Context, ids []uint, lockSeconds int) error {
+	return renewAccountLocks(ctx, r.data.redis, InstagramAccountsOccupiedKey, ids, lockSeconds)
+}
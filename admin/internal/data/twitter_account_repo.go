@@ -474,3 +474,9 @@ func (r *twitterAccountRepo) GetByUsername(ctx context.Context, username string)
 		Status: string(account.Status),
 	}, nil
 }
+
+// RenewTwitterAccountLocks 续租已锁定的Twitter账号，同时延长整个占用Hash的过期时间，
+// 避免长时间没有新的锁定请求时Hash过期导致续租的账号被其它worker重复锁定
+func (r *twitterAccountRepo) RenewTwitterAccountLocks(ctx context.Context, ids []uint, lockSeconds int) error {
+	return renewAccountLocks(ctx, r.data.redis, "twitter_accounts_occupied", ids, lockSeconds)
+}
@@ -222,3 +222,22 @@ func (s *InstagramAccountService) UnlockInstagramAccounts(ctx context.Context, r
 		UnlockedCount: int32(len(ids)),
 	}, nil
 }
+
+// RenewInstagramAccountLocks 续租已锁定的Instagram账号
+func (s *InstagramAccountService) RenewInstagramAccountLocks(ctx context.Context, req *v1.RenewInstagramAccountLocksRequest) (*v1.RenewInstagramAccountLocksReply, error) {
+	ids := make([]uint, len(req.Ids))
+	for i, id := range req.Ids {
+		ids[i] = uint(id)
+	}
+
+	lockSeconds, err := s.uc.RenewInstagramAccountLocks(ctx, ids, int(req.LockSeconds))
+	if err != nil {
+		return nil, err
+	}
+
+	return &v1.RenewInstagramAccountLocksReply{
+		Success:      true,
+		RenewedCount: int32(len(ids)),
+		LockSeconds:  int32(lockSeconds),
+	}, nil
+}
@@ -237,3 +237,22 @@ func (s *TwitterAccountService) UnlockTwitterAccounts(ctx context.Context, req *
 		UnlockedCount: int32(len(ids)),
 	}, nil
 }
+
+// RenewTwitterAccountLocks 续租已锁定的Twitter账号
+func (s *TwitterAccountService) RenewTwitterAccountLocks(ctx context.Context, req *v1.RenewTwitterAccountLocksRequest) (*v1.RenewTwitterAccountLocksReply, error) {
+	ids := make([]uint, len(req.Ids))
+	for i, id := range req.Ids {
+		ids[i] = uint(id)
+	}
+
+	lockSeconds, err := s.uc.RenewTwitterAccountLocks(ctx, ids, int(req.LockSeconds))
+	if err != nil {
+		return nil, err
+	}
+
+	return &v1.RenewTwitterAccountLocksReply{
+		Success:      true,
+		RenewedCount: int32(len(ids)),
+		LockSeconds:  int32(lockSeconds),
+	}, nil
+}
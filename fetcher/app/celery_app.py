@@ -1,19 +1,27 @@
 from celery import Celery
+from celery.signals import worker_process_init, worker_process_shutdown, worker_shutdown
 import os
 import sys
 import logging
-import asyncio
-import nest_asyncio
 from typing import Tuple, List, Dict, Any
 from app.settings import settings
 from app.fetchers.twitter.twitter_v2 import TwitterFetcher
 from app.fetchers.youtube import YoutubeFetcher
 from app.fetchers.instagram import InstagramFetcher
 from app.fetchers.tiktok import TiktokFetcher
-from app.proxy.pool import ProxyPool
+from app.proxy.pool import proxy_pool
 from app.account_pool.manager import AccountManager
-from app.db.operations import update_fetch_task
+from app.db.operations import update_fetch_task, engine
 from app.core.service_discovery import ServiceDiscovery
+from app.core.http_client import http_client
+from app.fetchers.http_pipeline import pipeline_metrics
+from app.core.ratelimiter import ratelimiter_stats
+from app.fetchers.twitter.strategies.router import channel_router
+from app.core.redis_client import redis_client
+from app.core.worker_runtime import worker_runtime
+from app.core.account_lease import account_leases
+from app.core.profile_cache import profile_cache
+from app.core.service_discovery import service_catalog
 import aiohttp
 
 # 添加项目根目录到 Python 路径
@@ -39,14 +47,47 @@ app.conf.update(
     enable_utc=settings.get_config("celery", {}).get("enable_utc", True),
     broker_connection_retry_on_startup=True,  # 添加启动时的连接重试设置
     result_expires=settings.get_config("celery", {}).get("result_expires", 3600),
+    # 执行模式: threads 池下每个线程只是一个任务槽位，协程统一在 worker 常驻事件循环上并发执行
+    worker_pool=settings.get_config("celery", {}).get("worker_pool", "solo"),
+    worker_concurrency=settings.get_config("celery", {}).get("worker_concurrency", 1),
+    worker_prefetch_multiplier=settings.get_config("celery", {}).get("worker_prefetch_multiplier", 1),
 )
 
 # 创建全局资源
-proxy_pool = ProxyPool()
 account_manager = AccountManager()
 
-# 允许嵌套事件循环
-nest_asyncio.apply()
+# worker 进程级资源在常驻事件循环上创建，进程退出时统一释放
+worker_runtime.register_shutdown(engine.dispose)
+worker_runtime.register_shutdown(redis_client.close)
+worker_runtime.register_shutdown(http_client.close)
+worker_runtime.register_shutdown(service_catalog.close)
+# 在关闭 Redis 连接之前写入尚未提交的缓存命中统计
+worker_runtime.register_shutdown(profile_cache.flush_stats)
+# 最先执行：进程退出前把租约池持有的账号解锁归还给 admin
+worker_runtime.register_shutdown(account_leases.close)
+def log_process_stats():
+    """输出本进程累计的请求、路由和限流统计，统计从进程启动起累计，包含所有平台和并发执行的任务"""
+    prefix = f"[进程累计 pid={os.getpid()}] "
+    http_client.log_stats(prefix=prefix)
+    pipeline_metrics.log_stats(prefix=prefix)
+    channel_router.log_stats(prefix=prefix)
+    ratelimiter_stats.log_stats(prefix=prefix)
+
+# 定期输出进程累计统计，不再在每个任务结束时输出（进程级统计既不按任务也不按平台区分）
+worker_runtime.register_periodic(settings.get_config("celery", {}).get("stats_log_interval", 300), log_process_stats)
+# 每个平台同时执行的任务数上限
+worker_runtime.set_slot_limits(settings.get_config("celery", {}).get("platform_concurrency", {}))
+
+@worker_process_init.connect
+def init_worker_runtime(**kwargs):
+    """prefork 子进程启动时创建常驻事件循环（solo 池在首次执行任务时创建）"""
+    worker_runtime.start()
+
+@worker_process_shutdown.connect
+@worker_shutdown.connect
+def shutdown_worker_runtime(**kwargs):
+    """worker 进程退出时释放连接池并停止事件循环"""
+    worker_runtime.stop()
 
 @app.task(name='app.celery_app.process_similar_task')
 def process_similar_task(task_data):
@@ -62,7 +103,8 @@ def process_similar_task(task_data):
             """异步处理任务的内部函数"""
             try:
                 # 运行爬虫获取结果
-                success, msg, result = await run_similar_fetcher(platform, params)
+                async with worker_runtime.slot(platform):
+                    success, msg, result = await run_similar_fetcher(platform, params)
                 if success:
                     # 保存结果到数据库
                     await update_fetch_task(task_id, "completed", result)
@@ -76,8 +118,8 @@ def process_similar_task(task_data):
                 await update_fetch_task(task_id, "failed", None, str(e))
                 return {"status": "failed", "error": str(e)}
         
-        # 使用 asyncio.run() 执行异步任务       
-        return asyncio.run(async_process())
+        # 提交到 worker 常驻事件循环执行
+        return worker_runtime.run(async_process())
     
     except Exception as e:
         logger.error(f"任务处理外部失败: {str(e)}")
@@ -97,7 +139,8 @@ def process_search_task(task_data):
             """异步处理任务的内部函数"""
             try:
                 # 运行爬虫获取结果
-                success, msg, result = await run_search_fetcher(platform, params)
+                async with worker_runtime.slot(platform):
+                    success, msg, result = await run_search_fetcher(platform, params)
                 if success:
                     # 保存结果到数据库
                     await update_fetch_task(task_id, "completed", result)
@@ -111,8 +154,8 @@ def process_search_task(task_data):
                 await update_fetch_task(task_id, "failed", None, str(e))
                 return {"status": "failed", "error": str(e)}
         
-        # 使用 asyncio.run() 执行异步任务       
-        return asyncio.run(async_process())
+        # 提交到 worker 常驻事件循环执行
+        return worker_runtime.run(async_process())
     
     except Exception as e:
         logger.error(f"任务处理外部失败: {str(e)}")
@@ -159,7 +202,7 @@ def update_twitter_account_status(account_id: str, username: str, status: str):
                 logger.error(f"更新账号状态时发生错误: {str(e)}")
                 return {"status": "error", "error": str(e)}
         
-        return asyncio.run(async_process())
+        return worker_runtime.run(async_process())
     
     except Exception as e:
         logger.error(f"更新账号状态任务处理失败: {str(e)}")
@@ -205,7 +248,7 @@ def update_instagram_account_status(account_id: str, username: str, status: str)
                 logger.error(f"更新 Instagram 账号状态时发生错误: {str(e)}")
                 return {"status": "error", "error": str(e)}
         
-        return asyncio.run(async_process())
+        return worker_runtime.run(async_process())
     
     except Exception as e:
         logger.error(f"更新 Instagram 账号状态任务处理失败: {str(e)}")
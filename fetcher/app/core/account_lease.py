@@ -0,0 +1,230 @@
+import asyncio
+import logging
+import time
+from typing import Any, Dict, List, Optional
+from app.core.service_discovery import ServiceDiscovery
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class AccountLeasePool:
+    """worker 级账号租约池
+
+    账号从 admin 锁定后由本进程持有，任务结束时只归还到池中而不解锁，下一个任务直接复用，
+    省去每个任务的 lock/unlock 请求。后台心跳定期通过 renew 接口续租（锁定过期时间延后 lease_seconds，
+    同时延长 admin 中整个占用 Hash 的过期时间），空闲超过 idle_timeout 的账号和进程退出时持有的账号才真正解锁归还给 admin。
+    被挂起/禁用的账号通过 discard 标记，归还时直接解锁，不再放回池中复用。
+    超过 lease_seconds 没有续租成功的账号在 admin 中的锁已经过期，可能已被其它 worker 锁定，
+    不再分配给新任务，任务归还时直接丢弃，也不再解锁，避免解掉其它 worker 的锁。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = settings.get_config("account_lease", {}) or {}
+        self.enabled = self.config.get("enabled", True)
+        # admin 单次锁定时间上限为 600 秒
+        self.lease_seconds = min(self.config.get("lease_seconds", 300), 600)
+        self.renew_interval = self.config.get("renew_interval", self.lease_seconds / 3)
+        self.idle_timeout = self.config.get("idle_timeout", 120)
+        # platform -> 账号 id -> {"account", "account_type", "in_use", "idle_since", "release_delay", "discarded",
+        #                          "renewed_at", "expired"}
+        self._entries: Dict[str, Dict[Any, Dict[str, Any]]] = {}
+        self._heartbeat: Optional[asyncio.Task] = None
+
+    async def _lock(self, platform: str, count: int, account_type: Optional[str]) -> List[Dict[str, Any]]:
+        """从 admin 锁定账号"""
+        body = {"count": count, "lock_seconds": self.lease_seconds}
+        if account_type is not None:
+            body["account_type"] = account_type
+        response = await ServiceDiscovery.post(
+            service_name="admin",
+            path=f"/v1/{platform}/accounts/lock",
+            json=body
+        )
+        return (response or {}).get("accounts", []) or []
+
+    async def _unlock(self, platform: str, ids: List[Any], delay: int = 0) -> bool:
+        """解锁账号，delay 大于 0 时表示把锁定过期时间设为 delay 秒后"""
+        if not ids:
+            return True
+        body = {"ids": ids}
+        if delay:
+            body["delay"] = delay
+        response = await ServiceDiscovery.post(
+            service_name="admin",
+            path=f"/v1/{platform}/accounts/unlock",
+            json=body
+        )
+        return isinstance(response, dict) and bool(response.get("success", False))
+
+    async def _renew(self, platform: str, ids: List[Any]) -> bool:
+        """续租账号，锁定过期时间从当前时间重新计算"""
+        if not ids:
+            return True
+        response = await ServiceDiscovery.post(
+            service_name="admin",
+            path=f"/v1/{platform}/accounts/renew",
+            json={"ids": ids, "lock_seconds": self.lease_seconds}
+        )
+        return isinstance(response, dict) and bool(response.get("success", False))
+
+    async def acquire(self, platform: str, count: int, account_type: Optional[str] = None) -> List[Dict[str, Any]]:
+        """获取账号，优先使用池中空闲的账号，不足的部分向 admin 锁定
+
+        Args:
+            platform: 平台，如 twitter、instagram
+            count: 账号数量
+            account_type: 账号类型，None 表示不区分类型
+        Returns:
+            List[Dict[str, Any]]: 账号列表，可能少于 count
+        """
+        if not self.enabled:
+            return await self._lock(platform, count, account_type)
+
+        entries = self._entries.setdefault(platform, {})
+        accounts = []
+        for entry in entries.values():
+            if len(accounts) >= count:
+                break
+            if (
+                not entry["in_use"] and not entry["discarded"] and not self._lease_expired(entry)
+                and entry["account_type"] == account_type
+            ):
+                entry["in_use"] = True
+                accounts.append(entry["account"])
+        reused = len(accounts)
+
+        if len(accounts) < count:
+            for account in await self._lock(platform, count - len(accounts), account_type):
+                entries[account.get("id")] = {
+                    "account": account,
+                    "account_type": account_type,
+                    "in_use": True,
+                    "idle_since": None,
+                    "release_delay": 0,
+                    "discarded": False,
+                    "renewed_at": time.monotonic(),
+                    "expired": False,
+                }
+                accounts.append(account)
+        self.logger.info(f"{platform} 账号租约: 复用 {reused} 个, 新锁定 {len(accounts) - reused} 个, 池中共 {len(entries)} 个")
+        self._ensure_heartbeat()
+        return accounts
+
+    def discard(self, platform: str, account_id: Any):
+        """标记账号被挂起或禁用，归还时直接解锁，不再放回池中复用"""
+        entry = self._entries.get(platform, {}).get(account_id)
+        if entry is not None:
+            entry["discarded"] = True
+
+    async def release(self, platform: str, accounts: List[Dict[str, Any]], delay: int = 0) -> bool:
+        """归还账号到池中，空闲超时后再解锁；被 discard 的账号直接解锁
+
+        Args:
+            platform: 平台
+            accounts: 账号列表
+            delay: 最终解锁时的延迟释放时间(秒)
+        """
+        if not self.enabled:
+            return await self._unlock(platform, [account.get("id") for account in accounts], delay)
+
+        entries = self._entries.get(platform, {})
+        now = time.monotonic()
+        discarded = []
+        for account in accounts:
+            account_id = account.get("id")
+            entry = entries.get(account_id)
+            if entry is None or not entry["in_use"]:
+                continue
+            if entry["expired"]:
+                # 锁已过期，不解锁，避免解掉其它 worker 的锁
+                entries.pop(account_id)
+                continue
+            if entry["discarded"]:
+                entries.pop(account_id)
+                discarded.append(account_id)
+                continue
+            entry["in_use"] = False
+            entry["idle_since"] = now
+            entry["release_delay"] = delay
+        if discarded:
+            self.logger.info(f"{platform} 解锁被挂起/禁用的账号 {len(discarded)} 个")
+            return await self._unlock(platform, discarded)
+        return True
+
+    def _ensure_heartbeat(self):
+        loop = asyncio.get_running_loop()
+        if self._heartbeat is None or self._heartbeat.done() or self._heartbeat.get_loop() is not loop:
+            self._heartbeat = loop.create_task(self._heartbeat_loop())
+
+    def _lease_expired(self, entry: Dict[str, Any], now: float = None) -> bool:
+        """距上次续租成功是否已超过 lease_seconds，此时 admin 中的锁已经过期"""
+        if entry["expired"]:
+            return True
+        return (now if now is not None else time.monotonic()) - entry["renewed_at"] >= self.lease_seconds
+
+    async def _heartbeat_loop(self):
+        """定期解锁空闲超时的账号并为其余账号续租，丢弃锁已过期的账号"""
+        while any(self._entries.values()):
+            await asyncio.sleep(self.renew_interval)
+            for platform, entries in list(self._entries.items()):
+                try:
+                    await self._evict_idle(platform, entries)
+                    ids = list(entries)
+                    started = time.monotonic()
+                    if ids and await self._renew(platform, ids):
+                        for account_id in ids:
+                            if account_id in entries:
+                                entries[account_id]["renewed_at"] = started
+                        self.logger.debug(f"{platform} 续租账号 {len(ids)} 个")
+                    elif ids:
+                        self.logger.error(f"{platform} 续租账号失败 {len(ids)} 个")
+                except Exception as e:
+                    self.logger.error(f"{platform} 账号续租失败: {e}")
+                self._drop_expired(platform, entries)
+
+    def _drop_expired(self, platform: str, entries: Dict[Any, Dict[str, Any]]):
+        """丢弃锁已过期的账号：空闲的直接移出池，使用中的标记过期，任务归还时移出，都不再解锁"""
+        now = time.monotonic()
+        dropped = 0
+        for account_id, entry in list(entries.items()):
+            if entry["expired"] or not self._lease_expired(entry, now):
+                continue
+            dropped += 1
+            if entry["in_use"]:
+                entry["expired"] = True
+            else:
+                entries.pop(account_id)
+        if dropped:
+            self.logger.warning(f"{platform} 账号超过 {self.lease_seconds} 秒未续租成功，锁已过期，丢弃 {dropped} 个")
+
+    async def _evict_idle(self, platform: str, entries: Dict[Any, Dict[str, Any]]):
+        now = time.monotonic()
+        expired = [
+            account_id for account_id, entry in entries.items()
+            if not entry["in_use"] and now - entry["idle_since"] >= self.idle_timeout
+            and not self._lease_expired(entry, now)
+        ]
+        # 按延迟释放时间分组解锁
+        by_delay: Dict[int, List[Any]] = {}
+        for account_id in expired:
+            by_delay.setdefault(entries.pop(account_id)["release_delay"], []).append(account_id)
+        for delay, ids in by_delay.items():
+            await self._unlock(platform, ids, delay)
+            self.logger.info(f"{platform} 解锁空闲账号 {len(ids)} 个")
+
+    async def close(self):
+        """解锁所有持有的账号"""
+        if self._heartbeat is not None and not self._heartbeat.done():
+            self._heartbeat.cancel()
+        self._heartbeat = None
+        for platform, entries in list(self._entries.items()):
+            try:
+                await self._unlock(platform, [account_id for account_id, entry in entries.items() if not self._lease_expired(entry)])
+                self.logger.info(f"{platform} 进程退出，解锁账号 {len(entries)} 个")
+            except Exception as e:
+                self.logger.error(f"{platform} 解锁账号失败: {e}")
+        self._entries = {}
+
+# 创建全局账号租约池实例
+account_leases = AccountLeasePool()
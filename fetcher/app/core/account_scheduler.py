@@ -0,0 +1,216 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import deque
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple, Union
+from app.core.account_state import AccountStateStore
+
+# 账号冷却时间，可以是固定秒数，也可以是按账号计算的函数
+Cooldown = Union[float, Callable[[Dict[str, Any]], float]]
+
+class AccountScheduler:
+    """按下次可用时间调度账号
+
+    账号按下次可用时间放在最小堆中，时间相同时按入堆顺序轮换，保证各账号均匀使用。
+    没有空闲账号时调用方按先后顺序进入等待队列，由调度协程精确等待到最早可用的账号冷却结束，
+    再交给等待最久的调用方，不再固定 sleep 后重新扫描所有账号。
+
+    传入 state 时账号的下次可用时间以 Redis 中的共享状态为准，多个 worker 之间不会同时使用同一账号；
+    Redis 不可用时退回本地堆调度。
+    """
+
+    def __init__(self, name: str, cooldown: Cooldown, state: Optional[AccountStateStore] = None, platform: str = None):
+        self.logger = logging.getLogger(f"{self.__class__.__name__}.{name}")
+        self.name = name
+        self.cooldown = cooldown
+        self.state = state if state is not None and state.enabled else None
+        self.platform = platform
+        self._accounts: Dict[Any, Dict[str, Any]] = {}
+        # 账号 id -> 下次可用时间
+        self._next_available: Dict[Any, float] = {}
+        # [下次可用时间, 序号, 账号 id]，账号重新入堆后旧条目作废
+        self._heap: List[list] = []
+        self._waiters: Deque[asyncio.Future] = deque()
+        self._seq = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._dispatcher: Optional[asyncio.Task] = None
+
+    def __len__(self) -> int:
+        return len(self._accounts)
+
+    def _get_cooldown(self, account: Dict[str, Any]) -> float:
+        return self.cooldown(account) if callable(self.cooldown) else self.cooldown
+
+    def _push(self, account_id, next_available: float):
+        self._next_available[account_id] = next_available
+        heapq.heappush(self._heap, [next_available, next(self._seq), account_id])
+
+    def _peek(self) -> Optional[list]:
+        """返回最早可用的账号条目，顺带丢弃已作废的条目"""
+        while self._heap:
+            entry = self._heap[0]
+            if self._next_available.get(entry[2]) == entry[0]:
+                return entry
+            heapq.heappop(self._heap)
+        return None
+
+    def _take(self, account_id) -> Dict[str, Any]:
+        """领取账号并按冷却时间重新入堆"""
+        account = self._accounts[account_id]
+        self._push(account_id, time.monotonic() + self._get_cooldown(account))
+        return account
+
+    def _claim_local(self, exclude: Set[Any] = frozenset()) -> Tuple[Optional[Dict[str, Any]], float]:
+        if exclude:
+            # 排除部分账号时直接按下次可用时间挑选，堆中的旧条目在账号重新入堆后自动作废
+            candidates = [(self._next_available[i], i) for i in self._accounts if i not in exclude]
+            if not candidates:
+                return None, 0.0
+            next_available, account_id = min(candidates, key=lambda item: item[0])
+            wait = next_available - time.monotonic()
+            if wait > 0:
+                return None, wait
+            return self._take(account_id), 0.0
+        entry = self._peek()
+        if entry is None:
+            return None, 0.0
+        wait = entry[0] - time.monotonic()
+        if wait > 0:
+            return None, wait
+        heapq.heappop(self._heap)
+        return self._take(entry[2]), 0.0
+
+    async def _claim(self, exclude: Set[Any] = frozenset()) -> Tuple[Optional[Dict[str, Any]], float]:
+        """领取一个冷却完毕的账号，返回 (账号, 需要等待的秒数)，没有可用账号时账号为 None
+
+        Args:
+            exclude: 不参与领取的账号 id
+        """
+        if self.state is None or not self._accounts:
+            return self._claim_local(exclude)
+        # 按本地堆顺序提交候选，共享状态相同时优先轮换到本地最久未用的账号
+        ids = {
+            str(account_id): account_id
+            for account_id in sorted(self._accounts, key=self._next_available.get)
+            if account_id not in exclude
+        }
+        if not ids:
+            return None, 0.0
+        try:
+            claimed, wait = await self.state.claim(
+                self.platform, [(key, self._get_cooldown(self._accounts[account_id])) for key, account_id in ids.items()]
+            )
+        except Exception as e:
+            self.logger.warning(f"领取共享账号状态失败，使用本地调度: {e}")
+            return self._claim_local(exclude)
+        if claimed is None or wait > 0 or claimed not in ids:
+            return None, wait
+        return self._take(ids[claimed]), 0.0
+
+    def _notify(self):
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def set_accounts(self, accounts: List[Dict[str, Any]]):
+        """设置可调度的账号，已有账号保留冷却状态"""
+        accounts = {account.get("id"): account for account in accounts or [] if account.get("id") is not None}
+        previous = self._next_available
+        self._accounts = accounts
+        self._next_available = {}
+        self._heap = []
+        for account_id in accounts:
+            self._push(account_id, previous.get(account_id, 0.0))
+        if not accounts:
+            # 没有账号时唤醒所有等待者并返回 None
+            for future in self._waiters:
+                if not future.done():
+                    future.set_result(None)
+            self._waiters.clear()
+        self._notify()
+
+    async def acquire(self) -> Optional[Dict[str, Any]]:
+        """获取一个冷却完毕的账号，没有时等待到最早可用的账号
+
+        Returns:
+            Optional[Dict[str, Any]]: 账号，没有可调度的账号时返回 None
+        """
+        if not self._accounts:
+            return None
+        if not self._waiters:
+            account, _ = await self._claim()
+            if account is not None:
+                return account
+
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        if self._dispatcher is None or self._dispatcher.done():
+            self._wakeup = asyncio.Event()
+            self._dispatcher = asyncio.ensure_future(self._dispatch())
+        else:
+            self._notify()
+        return await future
+
+    async def try_acquire(self, exclude: Set[Any] = frozenset()) -> Optional[Dict[str, Any]]:
+        """获取一个冷却完毕的账号，没有时立即返回 None，不进入等待队列
+
+        有调用方在排队时也返回 None，不抢占排队中的调用方。
+
+        Args:
+            exclude: 不参与领取的账号 id，如对冲请求排除主请求正在使用的账号
+        """
+        if not self._accounts or self._waiters:
+            return None
+        account, _ = await self._claim(exclude)
+        return account
+
+    async def release(self, account: Dict[str, Any]):
+        """归还刚领取但没有使用的账号，账号立即恢复可用，不再计入冷却"""
+        account_id = account.get("id")
+        if account_id not in self._accounts:
+            return
+        self._push(account_id, time.monotonic())
+        if self.state is not None:
+            await self.state.unclaim(self.platform, account_id)
+        self._notify()
+
+    def owns(self, account: Optional[Dict[str, Any]]) -> bool:
+        """账号是否由本调度器调度"""
+        return bool(account) and account.get("id") in self._accounts
+
+    def _next_waiter(self) -> Optional[asyncio.Future]:
+        while self._waiters:
+            future = self._waiters[0]
+            if not future.done():
+                return future
+            self._waiters.popleft()
+        return None
+
+    async def _dispatch(self):
+        """按账号可用时间依次把账号分配给等待者"""
+        while self._next_waiter() is not None:
+            if not self._accounts:
+                return
+            account, wait = await self._claim()
+            if account is None:
+                self.logger.debug(f"所有账号都在冷却中，等待 {wait:.3f} 秒")
+                # 账号变化或有新的等待者时提前醒来重新计算
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+                except asyncio.TimeoutError:
+                    pass
+                continue
+            future = self._next_waiter()
+            if future is None:
+                return
+            self._waiters.popleft()
+            future.set_result(account)
+
+    async def close(self):
+        """停止调度协程"""
+        self.set_accounts([])
+        if self._dispatcher is not None and not self._dispatcher.done():
+            self._dispatcher.cancel()
+        self._dispatcher = None
@@ -0,0 +1,150 @@
+import logging
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.redis_client import redis_client
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 从候选账号中原子地领取下次可用时间最早的账号
+# KEYS[1]: 下次可用时间有序集合(毫秒)
+# ARGV: 账号id1, 冷却时间1(毫秒), 账号id2, 冷却时间2, ...
+# 返回 {账号id, 需要等待的毫秒数}，等待时间大于 0 时未领取
+CLAIM_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+local best, best_score
+for i = 1, #ARGV, 2 do
+    local score = tonumber(redis.call('ZSCORE', KEYS[1], ARGV[i])) or 0
+    if best_score == nil or score < best_score then
+        best = i
+        best_score = score
+    end
+end
+if best == nil then
+    return {false, 0}
+end
+if best_score > now then
+    return {ARGV[best], math.ceil(best_score - now)}
+end
+redis.call('ZADD', KEYS[1], now + tonumber(ARGV[best + 1]), ARGV[best])
+-- 清理一天以上未使用的账号
+redis.call('ZREMRANGEBYSCORE', KEYS[1], '-inf', now - 86400000)
+return {ARGV[best], 0}
+"""
+
+# 记录账号请求结果，429 时按连续次数指数延后账号的下次可用时间
+# KEYS[1]: 健康状态 hash  KEYS[2]: 下次可用时间有序集合
+# ARGV: 账号id, 状态码, 429 基础惩罚(毫秒), 最大惩罚(毫秒), 健康状态过期时间(毫秒)
+# 返回连续 429 次数
+RECORD_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+local status = tonumber(ARGV[2])
+local consecutive = tonumber(redis.call('HGET', KEYS[1], 'consecutive_429')) or 0
+redis.call('HSET', KEYS[1], 'last_status', status, 'last_used', tostring(now))
+if status == 429 then
+    consecutive = redis.call('HINCRBY', KEYS[1], 'consecutive_429', 1)
+    redis.call('HINCRBY', KEYS[1], 'total_429', 1)
+    local penalty = math.min(tonumber(ARGV[4]), tonumber(ARGV[3]) * 2 ^ (consecutive - 1))
+    local score = tonumber(redis.call('ZSCORE', KEYS[2], ARGV[1])) or 0
+    if score < now + penalty then
+        redis.call('ZADD', KEYS[2], now + penalty, ARGV[1])
+    end
+elseif status >= 500 then
+    redis.call('HINCRBY', KEYS[1], 'total_errors', 1)
+elseif status >= 200 and status < 300 then
+    consecutive = 0
+    redis.call('HSET', KEYS[1], 'consecutive_429', 0)
+    redis.call('HINCRBY', KEYS[1], 'total_success', 1)
+end
+redis.call('PEXPIRE', KEYS[1], tonumber(ARGV[5]))
+return consecutive
+"""
+
+class AccountStateStore:
+    """跨 worker 共享的账号冷却和健康状态
+
+    下次可用时间保存在有序集合中，所有 worker 通过 Lua 脚本原子地领取账号，同一账号不会被两个 worker 同时使用；
+    健康状态 hash 记录连续 429 次数、累计 429/5xx/成功次数，账号重新锁定或任务结束后依然保留。
+    遇到 429 时按连续次数指数延后该账号的下次可用时间，避免各 worker 接连把同一账号打到限流。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = settings.get_config("account_state", {}) or {}
+        self.enabled = self.config.get("enabled", True)
+        self.rate_limit_penalty = self.config.get("rate_limit_penalty", 30)
+        self.max_penalty = self.config.get("max_penalty", 600)
+        self.health_ttl = self.config.get("health_ttl", 7 * 24 * 3600)
+
+    def _schedule_key(self, platform: str) -> str:
+        return f"fetcher:accounts:{platform}:next_available"
+
+    def _health_key(self, platform: str, account_id: Any) -> str:
+        return f"fetcher:accounts:{platform}:health:{account_id}"
+
+    async def claim(self, platform: str, candidates: List[Tuple[Any, float]]) -> Tuple[Optional[str], float]:
+        """从候选账号中领取下次可用时间最早的账号
+
+        Args:
+            platform: 平台
+            candidates: [(账号id, 冷却时间秒)]，领取后账号在冷却时间内不会再被领取
+        Returns:
+            Tuple[Optional[str], float]: (账号id, 需要等待的秒数)，等待时间大于 0 时未领取，需等待后重试
+        """
+        args = []
+        for account_id, cooldown in candidates:
+            args.extend([str(account_id), int(cooldown * 1000)])
+        script = redis_client.get_script(CLAIM_SCRIPT)
+        account_id, wait_ms = await script(keys=[self._schedule_key(platform)], args=args)
+        if isinstance(account_id, bytes):
+            account_id = account_id.decode()
+        return account_id or None, wait_ms / 1000
+
+    async def unclaim(self, platform: str, account_id: Any):
+        """撤销刚领取的账号，账号立即可以再次被领取，用于领取后没有实际发出请求的情况"""
+        try:
+            redis = redis_client.get_redis()
+            now_ms = int((await redis.time())[0] * 1000)
+            await redis.zadd(self._schedule_key(platform), {str(account_id): now_ms}, xx=True)
+        except Exception as e:
+            self.logger.warning(f"撤销领取账号失败: {e}")
+
+    async def record_status(self, platform: str, account_id: Any, status: int) -> int:
+        """记录账号请求结果
+
+        Returns:
+            int: 连续 429 次数，Redis 不可用时返回 0
+        """
+        if not self.enabled or account_id is None:
+            return 0
+        try:
+            script = redis_client.get_script(RECORD_SCRIPT)
+            return int(await script(
+                keys=[self._health_key(platform, account_id), self._schedule_key(platform)],
+                args=[
+                    str(account_id), status,
+                    int(self.rate_limit_penalty * 1000), int(self.max_penalty * 1000), int(self.health_ttl * 1000),
+                ],
+            ))
+        except Exception as e:
+            self.logger.warning(f"记录账号状态失败: {e}")
+            return 0
+
+    async def reset_rate_limit(self, platform: str, account_id: Any):
+        """重置账号的连续 429 次数"""
+        try:
+            await redis_client.get_redis().hset(self._health_key(platform, account_id), "consecutive_429", 0)
+        except Exception as e:
+            self.logger.warning(f"重置账号状态失败: {e}")
+
+    async def get_health(self, platform: str, account_id: Any) -> Dict[str, str]:
+        """获取账号健康状态"""
+        raw = await redis_client.get_redis().hgetall(self._health_key(platform, account_id))
+        return {
+            (key.decode() if isinstance(key, bytes) else key): (value.decode() if isinstance(value, bytes) else value)
+            for key, value in raw.items()
+        }
+
+# 创建全局账号状态实例
+account_state = AccountStateStore()
@@ -0,0 +1,133 @@
+import logging
+import time
+from typing import Any, Dict, Optional
+from app.core.distributed_ratelimiter import DistributedRateLimiter
+from app.core.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# AIMD 速率调整脚本，状态保存在 hash 中: rate(当前速率), last_decrease(上次降速时间，毫秒)
+# KEYS[1]: 状态 key
+# ARGV: 成功次数, 是否失败, 初始速率, 最小速率, 最大速率, 每次成功增加的速率, 降速系数, 降速冷却(毫秒), 状态过期时间(毫秒)
+# 返回当前速率（字符串，避免 Lua 数字被截断为整数）
+AIMD_SCRIPT = """
+local key = KEYS[1]
+local successes = tonumber(ARGV[1])
+local failed = tonumber(ARGV[2])
+local initial = tonumber(ARGV[3])
+local min_rate = tonumber(ARGV[4])
+local max_rate = tonumber(ARGV[5])
+local increase = tonumber(ARGV[6])
+local factor = tonumber(ARGV[7])
+local cooldown = tonumber(ARGV[8])
+local ttl = tonumber(ARGV[9])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+local state = redis.call('HMGET', key, 'rate', 'last_decrease')
+local rate = tonumber(state[1]) or initial
+local last_decrease = tonumber(state[2]) or 0
+if failed > 0 then
+    -- 同一批并发请求同时遇到 429 时只降速一次
+    if now - last_decrease >= cooldown then
+        rate = math.max(min_rate, rate * factor)
+        redis.call('HSET', key, 'last_decrease', tostring(now))
+    end
+elseif successes > 0 and now - last_decrease >= cooldown then
+    rate = math.min(max_rate, rate + increase * successes)
+end
+redis.call('HSET', key, 'rate', tostring(rate))
+redis.call('PEXPIRE', key, ttl)
+return tostring(rate)
+"""
+
+class AdaptiveRateLimiter(DistributedRateLimiter):
+    """AIMD 自适应分布式限流器
+
+    请求成功时加法提升速率，遇到 429/5xx 时乘法降速，速率保存在 Redis 中由所有 worker 共享，
+    逐步收敛到上游真实可承受的速率，而不是手工配置的保守常量。
+    成功次数先在本地累计，每隔 sync_interval 秒与 Redis 同步一次并取回最新速率；失败立即同步。
+    """
+
+    def __init__(
+        self,
+        key: str,
+        rate_per_sec: float = 1.0,
+        burst: int = 1,
+        min_rate: Optional[float] = None,
+        max_rate: Optional[float] = None,
+        increase: Optional[float] = None,
+        decrease_factor: float = 0.5,
+        decrease_cooldown: float = 5.0,
+        sync_interval: float = 1.0,
+        state_ttl: int = 24 * 3600,
+    ):
+        super().__init__(key, rate_per_sec=rate_per_sec, burst=burst)
+        self.state_key = f"fetcher:aimd:{key}"
+        self.initial_rate = rate_per_sec
+        self.min_rate = min_rate if min_rate is not None else rate_per_sec / 10
+        self.max_rate = max_rate if max_rate is not None else rate_per_sec * 4
+        self.increase = increase if increase is not None else rate_per_sec / 20
+        self.decrease_factor = decrease_factor
+        self.decrease_cooldown = decrease_cooldown
+        self.sync_interval = sync_interval
+        self.state_ttl = state_ttl
+        self._pending_successes = 0
+        self._last_sync = 0.0
+
+    @classmethod
+    def from_config(cls, key: str, rate_per_sec: float, config: Dict[str, Any] = None, burst: int = 1) -> "AdaptiveRateLimiter":
+        """按配置创建限流器，config 为 adaptive 配置段，未配置的项使用默认值"""
+        config = config or {}
+        return cls(
+            key,
+            rate_per_sec=rate_per_sec,
+            burst=config.get("burst", burst),
+            min_rate=config.get("min_rate"),
+            max_rate=config.get("max_rate"),
+            increase=config.get("increase"),
+            decrease_factor=config.get("decrease_factor", 0.5),
+            decrease_cooldown=config.get("decrease_cooldown", 5.0),
+            sync_interval=config.get("sync_interval", 1.0),
+        )
+
+    def _set_rate(self, rate: float):
+        if rate > 0 and rate != self.rate_per_sec:
+            logger.debug(f"{self.state_key} 速率调整: {self.rate_per_sec:.3f} -> {rate:.3f} 请求/秒")
+            self.rate_per_sec = rate
+            self.min_interval = 1.0 / rate
+
+    async def _sync(self, failed: bool = False):
+        """把本地累计的成功次数和失败写入 Redis，并取回最新速率"""
+        successes, self._pending_successes = self._pending_successes, 0
+        self._last_sync = time.monotonic()
+        try:
+            script = redis_client.get_script(AIMD_SCRIPT)
+            rate = await script(keys=[self.state_key], args=[
+                successes, 1 if failed else 0,
+                self.initial_rate, self.min_rate, self.max_rate, self.increase,
+                self.decrease_factor, int(self.decrease_cooldown * 1000), self.state_ttl * 1000,
+            ])
+            self._set_rate(float(rate))
+        except Exception as e:
+            logger.warning(f"同步自适应限流状态失败: {e}")
+
+    async def prepare(self):
+        if time.monotonic() - self._last_sync >= self.sync_interval:
+            await self._sync()
+
+    async def record_success(self):
+        """记录一次成功请求"""
+        self._pending_successes += 1
+        await self.prepare()
+
+    async def record_failure(self):
+        """记录一次被限流或服务端错误，立即降速"""
+        await self._sync(failed=True)
+        logger.warning(f"{self.state_key} 遇到限流或服务端错误，速率降为 {self.rate_per_sec:.3f} 请求/秒")
+
+    async def feedback(self, status: int):
+        """按 HTTP 状态码反馈: 429 和 5xx 降速，2xx 提速，其他状态码不影响速率"""
+        if status == 429 or status >= 500:
+            await self.record_failure()
+        elif 200 <= status < 300:
+            await self.record_success()
@@ -0,0 +1,226 @@
+import logging
+import time
+from typing import Dict, Tuple
+from app.core.redis_client import redis_client
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 熔断状态
+STATE_CLOSED = "closed"        # 正常放行
+STATE_OPEN = "open"            # 失败率过高，拒绝请求
+STATE_HALF_OPEN = "half_open"  # 熔断时间结束，只放行一个探测请求
+
+# 判断是否放行请求，熔断时间结束时转为 half_open 并把本次请求作为探测请求
+# 状态 hash: state, open_until(毫秒), open_ms(本次熔断时长), probe_until(探测请求超时时间), window_start, requests, failures
+# KEYS[1]: 状态 key
+# ARGV: 探测请求超时时间(毫秒)
+# 返回 {是否放行, 需要等待的毫秒数, 状态}
+ALLOW_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+local state = redis.call('HMGET', KEYS[1], 'state', 'open_until', 'probe_until')
+if state[1] == 'open' then
+    local open_until = tonumber(state[2]) or 0
+    if now < open_until then
+        return {0, math.ceil(open_until - now), 'open'}
+    end
+    redis.call('HSET', KEYS[1], 'state', 'half_open', 'probe_until', tostring(now + tonumber(ARGV[1])))
+    return {1, 0, 'half_open'}
+elseif state[1] == 'half_open' then
+    local probe_until = tonumber(state[3]) or 0
+    if now < probe_until then
+        return {0, math.ceil(probe_until - now), 'half_open'}
+    end
+    -- 上一个探测请求没有上报结果，重新放行一个
+    redis.call('HSET', KEYS[1], 'probe_until', tostring(now + tonumber(ARGV[1])))
+    return {1, 0, 'half_open'}
+end
+return {1, 0, 'closed'}
+"""
+
+# 记录请求结果
+# KEYS[1]: 状态 key
+# ARGV: 是否成功, 统计窗口(毫秒), 最少请求数, 失败率阈值, 熔断时间(毫秒), 最长熔断时间(毫秒)
+# 返回 {状态, 熔断剩余毫秒数}
+RECORD_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+local success = tonumber(ARGV[1]) == 1
+local window = tonumber(ARGV[2])
+local open_ms = tonumber(ARGV[5])
+local max_open_ms = tonumber(ARGV[6])
+local state = redis.call('HMGET', KEYS[1], 'state', 'open_until', 'open_ms', 'window_start')
+local ttl = math.max(window, max_open_ms) * 2
+if state[1] == 'half_open' then
+    if success then
+        redis.call('DEL', KEYS[1])
+        return {'closed', 0}
+    end
+    -- 探测失败，熔断时间翻倍
+    open_ms = math.min(max_open_ms, (tonumber(state[3]) or open_ms) * 2)
+    redis.call('HSET', KEYS[1], 'state', 'open', 'open_until', tostring(now + open_ms), 'open_ms', open_ms)
+    redis.call('PEXPIRE', KEYS[1], ttl)
+    return {'open', open_ms}
+elseif state[1] == 'open' then
+    -- 熔断前发出的请求晚到的结果不影响状态
+    return {'open', math.max(0, math.ceil((tonumber(state[2]) or 0) - now))}
+end
+if now - (tonumber(state[4]) or 0) >= window then
+    redis.call('HSET', KEYS[1], 'window_start', tostring(now), 'requests', 0, 'failures', 0)
+end
+local requests = redis.call('HINCRBY', KEYS[1], 'requests', 1)
+local failures
+if success then
+    failures = tonumber(redis.call('HGET', KEYS[1], 'failures')) or 0
+else
+    failures = redis.call('HINCRBY', KEYS[1], 'failures', 1)
+end
+redis.call('PEXPIRE', KEYS[1], ttl)
+if requests >= tonumber(ARGV[3]) and failures / requests >= tonumber(ARGV[4]) then
+    redis.call('HSET', KEYS[1], 'state', 'open', 'open_until', tostring(now + open_ms), 'open_ms', open_ms,
+        'requests', 0, 'failures', 0)
+    return {'open', open_ms}
+end
+return {'closed', 0}
+"""
+
+# 只读查询当前状态
+# KEYS[1]: 状态 key
+# 返回 {状态, 剩余毫秒数}，熔断时间已结束但还没有探测请求时返回 half_open 和 0
+STATE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+local state = redis.call('HMGET', KEYS[1], 'state', 'open_until', 'probe_until')
+if state[1] == 'open' then
+    local wait = math.ceil((tonumber(state[2]) or 0) - now)
+    if wait > 0 then
+        return {'open', wait}
+    end
+    return {'half_open', 0}
+elseif state[1] == 'half_open' then
+    return {'half_open', math.max(0, math.ceil((tonumber(state[3]) or 0) - now))}
+end
+return {'closed', 0}
+"""
+
+class CircuitOpenError(Exception):
+    """熔断器打开时拒绝请求"""
+
+    def __init__(self, name: str, wait: float):
+        super().__init__(f"熔断器 {name} 已打开，{wait:.1f} 秒后重试")
+        self.name = name
+        self.wait = wait
+
+class CircuitBreakers:
+    """按 平台.接口 / 渠道.接口 划分的熔断器，状态保存在 Redis 中由所有 worker 共享
+
+    统计窗口内请求数达到 min_requests 且失败率达到 failure_ratio 时打开，open_seconds 内拒绝请求；
+    之后转为半开，所有 worker 中只放行一个探测请求，成功则关闭，失败则再次打开且熔断时间翻倍（不超过 max_open_seconds）。
+    打开状态在本地缓存到熔断结束，熔断期间的请求不再访问 Redis。Redis 不可用时放行请求。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = settings.get_config("circuit_breaker", {}) or {}
+        self.enabled = self.config.get("enabled", True)
+        self.window_seconds = self.config.get("window_seconds", 60)
+        self.min_requests = self.config.get("min_requests", 10)
+        self.failure_ratio = self.config.get("failure_ratio", 0.5)
+        self.open_seconds = self.config.get("open_seconds", 30)
+        self.max_open_seconds = self.config.get("max_open_seconds", 300)
+        self.probe_timeout = self.config.get("probe_timeout", 30)
+        # 熔断器名称 -> 本地缓存的熔断结束时间(monotonic)
+        self._open_until: Dict[str, float] = {}
+
+    def _key(self, name: str) -> str:
+        return f"fetcher:circuit:{name}"
+
+    def _cached_wait(self, name: str) -> float:
+        """本地缓存的剩余熔断时间"""
+        wait = self._open_until.get(name, 0.0) - time.monotonic()
+        if wait <= 0:
+            self._open_until.pop(name, None)
+            return 0.0
+        return wait
+
+    def _cache_open(self, name: str, wait: float):
+        if wait > 0:
+            self._open_until[name] = time.monotonic() + wait
+
+    async def allow(self, name: str) -> Tuple[bool, float]:
+        """判断是否放行请求，半开状态下放行的请求作为探测请求，结果必须通过 record 上报
+
+        Returns:
+            Tuple[bool, float]: (是否放行, 拒绝时需要等待的秒数)
+        """
+        if not self.enabled:
+            return True, 0.0
+        wait = self._cached_wait(name)
+        if wait > 0:
+            return False, wait
+        try:
+            script = redis_client.get_script(ALLOW_SCRIPT)
+            allowed, wait_ms, state = await script(keys=[self._key(name)], args=[int(self.probe_timeout * 1000)])
+        except Exception as e:
+            self.logger.warning(f"读取熔断状态失败，放行请求: {e}")
+            return True, 0.0
+        if not allowed:
+            # 半开时探测请求随时可能成功，不缓存
+            if state in (STATE_OPEN, STATE_OPEN.encode()):
+                self._cache_open(name, wait_ms / 1000)
+            return False, wait_ms / 1000
+        return True, 0.0
+
+    async def record(self, name: str, success: bool):
+        """上报请求结果"""
+        if not self.enabled:
+            return
+        try:
+            script = redis_client.get_script(RECORD_SCRIPT)
+            state, wait_ms = await script(keys=[self._key(name)], args=[
+                1 if success else 0,
+                int(self.window_seconds * 1000), self.min_requests, self.failure_ratio,
+                int(self.open_seconds * 1000), int(self.max_open_seconds * 1000),
+            ])
+        except Exception as e:
+            self.logger.warning(f"记录熔断状态失败: {e}")
+            return
+        if isinstance(state, bytes):
+            state = state.decode()
+        if state == STATE_OPEN:
+            if not self._cached_wait(name):
+                self.logger.warning(f"熔断器 {name} 打开，{wait_ms / 1000:.1f} 秒内拒绝请求")
+            self._cache_open(name, wait_ms / 1000)
+        else:
+            self._open_until.pop(name, None)
+
+    async def get_state(self, name: str) -> Tuple[str, float]:
+        """查询熔断器状态，不占用探测请求
+
+        Returns:
+            Tuple[str, float]: (状态, 剩余秒数)，Redis 不可用时视为关闭
+        """
+        if not self.enabled:
+            return STATE_CLOSED, 0.0
+        wait = self._cached_wait(name)
+        if wait > 0:
+            return STATE_OPEN, wait
+        try:
+            state, wait_ms = await redis_client.get_script(STATE_SCRIPT)(keys=[self._key(name)])
+        except Exception as e:
+            self.logger.warning(f"读取熔断状态失败: {e}")
+            return STATE_CLOSED, 0.0
+        if isinstance(state, bytes):
+            state = state.decode()
+        if state == STATE_OPEN:
+            self._cache_open(name, wait_ms / 1000)
+        return state, wait_ms / 1000
+
+    async def is_open(self, name: str) -> bool:
+        """熔断器是否在拒绝请求：打开中，或半开且探测请求进行中"""
+        state, wait = await self.get_state(name)
+        return state == STATE_OPEN or (state == STATE_HALF_OPEN and wait > 0)
+
+# 创建全局熔断器实例
+circuit_breakers = CircuitBreakers()
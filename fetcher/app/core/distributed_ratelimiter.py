@@ -1,46 +1,116 @@
 import asyncio
-import time
-import redis.asyncio as aioredis
-from app.settings import settings
+import logging
+from typing import Iterable, Optional, Tuple
+from app.core.redis_client import redis_client
+
+logger = logging.getLogger(__name__)
+
+# GCRA 令牌桶预约脚本，支持同时预约多个 key，所有 key 都满足才预约
+# KEYS[i]: 限流 key，保存理论到达时间 TAT(毫秒)
+# ARGV[1]: 最长等待时间(毫秒)，小于 0 表示不限制
+# ARGV[2i], ARGV[2i+1]: 第 i 个 key 的请求间隔(毫秒)和桶容量
+# 返回 {是否预约成功, 需要等待的毫秒数}
+GCRA_SCRIPT = """
+local max_wait = tonumber(ARGV[1])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) * 1000 + tonumber(t[2]) / 1000
+local tats = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[2 * i])
+    local burst = tonumber(ARGV[2 * i + 1])
+    local tat = tonumber(redis.call('GET', key) or '0')
+    if tat < now then
+        tat = now
+    end
+    tats[i] = tat
+    local key_wait = tat + interval - interval * burst - now
+    if key_wait > wait then
+        wait = key_wait
+    end
+end
+if max_wait >= 0 and wait > max_wait then
+    return {0, math.ceil(wait)}
+end
+local send_at = now + wait
+for i, key in ipairs(KEYS) do
+    local interval = tonumber(ARGV[2 * i])
+    local tat = tats[i]
+    if tat < send_at then
+        tat = send_at
+    end
+    local new_tat = tat + interval
+    redis.call('SET', key, tostring(new_tat), 'PX', math.ceil(new_tat - now) + 1000)
+end
+return {1, math.ceil(wait)}
+"""
 
 class DistributedRateLimiter:
-    def __init__(self, key: str, rate_per_sec: float = 1.0):
-        cfg = settings.get_config('ratelimiter')
-        self.redis_url = cfg['redis_url']
+    """基于 Redis 的分布式限流器（GCRA 令牌桶）
+
+    Lua 脚本用 Redis 服务器时间原子地预约一个请求时间点并返回需要等待的毫秒数，
+    调用方只需 sleep 一次，不再轮询 Redis。burst 为令牌桶容量，空闲后允许连续发出 burst 个请求。
+    限流器本身不持有连接，所有实例共用 redis_client 的连接池和脚本注册表，创建成本很低。
+    """
+
+    def __init__(self, key: str, rate_per_sec: float = 1.0, burst: int = 1):
         self.key = f"fetcher:ratelimit:{key}"
         self.rate_per_sec = rate_per_sec
         self.min_interval = 1.0 / rate_per_sec
-        self.lua_script = """
-        local key = KEYS[1]
-        local now = tonumber(ARGV[1])
-        local interval = tonumber(ARGV[2])
-        local last = tonumber(redis.call('get', key) or '0')
-        if now - last >= interval then
-            redis.call('set', key, now)
-            redis.call('pexpire', key, interval * 2)
-            return 1
-        else
-            return 0
-        end
+        self.burst = max(1, int(burst))
+
+    async def prepare(self):
+        """预约前调用，子类可在此更新速率"""
+        pass
+
+    async def acquire(self, timeout: Optional[float] = None) -> bool:
+        """获取令牌，超过限流时等待到预约的时间点
+
+        Args:
+            timeout: 最长等待时间（秒），None 表示一直等待
+        Returns:
+            bool: 是否获取成功，需要等待的时间超过 timeout 时不预约并返回 False
         """
-        self.redis = None
-        self.script_sha = None
-
-    async def _init_redis(self):
-        if self.redis is None:
-            self.redis = aioredis.from_url(self.redis_url)
-            self.script_sha = await self.redis.script_load(self.lua_script)
-
-    async def acquire(self):
-        await self._init_redis()
-        while True:
-            now = int(time.time() * 1000)
-            interval = int(self.min_interval * 1000)
-            allowed = await self.redis.evalsha(self.script_sha, 1, self.key, now, interval)
-            if allowed == 1:
-                return
-            await asyncio.sleep(self.min_interval / 2)
+        return await acquire_all([self], timeout=timeout)
+
+    async def try_acquire(self) -> bool:
+        """不等待地获取令牌"""
+        return await self.acquire(timeout=0)
 
     async def close(self):
-        if self.redis:
-            await self.redis.close() 
\ No newline at end of file
+        # 连接池和脚本为进程级共享，由 redis_client 统一关闭
+        pass
+
+async def _reserve(limiters: Iterable[DistributedRateLimiter], timeout: Optional[float]) -> Tuple[bool, float]:
+    """一次 EVALSHA 同时预约多个限流 key，返回 (是否预约成功, 需要等待的秒数)"""
+    unique = {limiter.key: limiter for limiter in limiters}
+    args = [-1 if timeout is None else int(timeout * 1000)]
+    for limiter in unique.values():
+        args.extend([limiter.min_interval * 1000, limiter.burst])
+    script = redis_client.get_script(GCRA_SCRIPT)
+    allowed, wait_ms = await script(keys=list(unique), args=args)
+    return allowed == 1, wait_ms / 1000
+
+async def acquire_all(limiters: Iterable[DistributedRateLimiter], timeout: Optional[float] = None) -> bool:
+    """同时获取多个限流器的令牌，如同一请求既受渠道限流又受账号限流
+
+    所有 key 在一个脚本里原子预约，等待时间取各 key 中最长的，全部满足才预约，避免部分 key 被占用。
+
+    Args:
+        limiters: 限流器列表
+        timeout: 最长等待时间（秒），None 表示一直等待
+    Returns:
+        bool: 是否获取成功
+    """
+    limiters = list(limiters)
+    if not limiters:
+        return True
+    for limiter in limiters:
+        await limiter.prepare()
+    allowed, wait = await _reserve(limiters, timeout)
+    if not allowed:
+        return False
+    if wait > 0:
+        logger.debug(f"{', '.join(limiter.key for limiter in limiters)} 限流等待 {wait:.3f} 秒")
+        await asyncio.sleep(wait)
+    return True
@@ -0,0 +1,126 @@
+import json
+import logging
+import time
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from app.core.redis_client import redis_client
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class SimilarityGraphCache:
+    """相似用户关系图缓存
+
+    把 uid -> [相似用户] 的邻接表存到 Redis，每条边记录首次发现和最近确认时间，并保存相似用户资料快照。
+    新鲜期内直接使用；超过新鲜期但未过期时仍返回缓存结果，由调用方在后台刷新；过期后 Redis 自动删除，按未命中处理。
+    Redis 不可用时按未命中处理，不影响抓取。
+
+    存储格式:
+        {"fetched_at": 1700000000, "edges": [{"uid": "...", "first_seen": ..., "last_seen": ..., "user": {...}}]}
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = settings.get_config("graph_cache", {}) or {}
+        self.enabled = self.config.get("enabled", True)
+        self.fresh_ttl = self.config.get("fresh_ttl", 24 * 3600)
+        self.stale_ttl = self.config.get("stale_ttl", 7 * 24 * 3600)
+        self.refresh_lock_ttl = self.config.get("refresh_lock_ttl", 120)
+        self.refresh_concurrency = self.config.get("refresh_concurrency", 2)
+
+    def _key(self, platform: str, uid: str) -> str:
+        return f"fetcher:graph_cache:{platform}:{uid}"
+
+    def _lock_key(self, platform: str, uid: str) -> str:
+        return f"fetcher:graph_cache:refreshing:{platform}:{uid}"
+
+    def _decode(self, raw) -> Optional[Tuple[List[Dict[str, Any]], bool]]:
+        """解析邻接表，返回 (相似用户列表, 是否已过新鲜期)"""
+        if raw is None:
+            return None
+        entry = json.loads(raw)
+        users = [edge["user"] for edge in entry.get("edges", []) if edge.get("user")]
+        stale = time.time() - entry.get("fetched_at", 0) >= self.fresh_ttl
+        return users, stale
+
+    async def get(self, platform: str, uid: str) -> Optional[Tuple[List[Dict[str, Any]], bool]]:
+        """查询单个用户的相似用户
+
+        Returns:
+            Optional[Tuple[List[Dict[str, Any]], bool]]: (相似用户列表, 是否需要刷新)，未命中返回 None
+        """
+        if not self.enabled or not uid:
+            return None
+        try:
+            return self._decode(await redis_client.get_redis().get(self._key(platform, uid)))
+        except Exception as e:
+            self.logger.warning(f"读取相似关系缓存失败: {e}")
+            return None
+
+    async def mget(self, platform: str, uids: Iterable[str]) -> Dict[str, Tuple[List[Dict[str, Any]], bool]]:
+        """批量查询相似用户
+
+        Returns:
+            Dict[str, Tuple[List[Dict[str, Any]], bool]]: 命中的 uid -> (相似用户列表, 是否需要刷新)
+        """
+        uids = [uid for uid in dict.fromkeys(uids) if uid]
+        if not self.enabled or not uids:
+            return {}
+        try:
+            raws = await redis_client.get_redis().mget([self._key(platform, uid) for uid in uids])
+            result = {}
+            for uid, raw in zip(uids, raws):
+                entry = self._decode(raw)
+                if entry is not None:
+                    result[uid] = entry
+        except Exception as e:
+            self.logger.warning(f"批量读取相似关系缓存失败: {e}")
+            return {}
+        self.logger.info(f"相似关系缓存: 查询 {len(uids)} 个, 命中 {len(result)} 个")
+        return result
+
+    async def set(self, platform: str, uid: str, users: List[Dict[str, Any]]):
+        """写入相似用户，沿用已有边的首次发现时间；空结果不写入，避免把请求失败缓存下来"""
+        if not self.enabled or not uid or not users:
+            return
+        key = self._key(platform, uid)
+        now = int(time.time())
+        try:
+            redis = redis_client.get_redis()
+            first_seen = {}
+            raw = await redis.get(key)
+            if raw is not None:
+                for edge in json.loads(raw).get("edges", []):
+                    first_seen[edge.get("uid")] = edge.get("first_seen", now)
+            edges = [
+                {
+                    "uid": user["uid"],
+                    "first_seen": first_seen.get(user["uid"], now),
+                    "last_seen": now,
+                    "user": user,
+                }
+                for user in users if user.get("uid")
+            ]
+            entry = {"fetched_at": now, "edges": edges}
+            await redis.set(key, json.dumps(entry, ensure_ascii=False), ex=self.stale_ttl)
+        except Exception as e:
+            self.logger.warning(f"写入相似关系缓存失败: {e}")
+
+    async def acquire_refresh(self, platform: str, uid: str) -> bool:
+        """抢占后台刷新权，同一个 uid 同时只由一个任务刷新"""
+        try:
+            return bool(await redis_client.get_redis().set(
+                self._lock_key(platform, uid), 1, nx=True, ex=self.refresh_lock_ttl
+            ))
+        except Exception as e:
+            self.logger.warning(f"抢占相似关系刷新锁失败: {e}")
+            return False
+
+    async def release_refresh(self, platform: str, uid: str):
+        """释放后台刷新权，刷新被取消时调用，下次命中过期缓存可以立即重新刷新"""
+        try:
+            await redis_client.get_redis().delete(self._lock_key(platform, uid))
+        except Exception as e:
+            self.logger.warning(f"释放相似关系刷新锁失败: {e}")
+
+# 创建全局相似关系缓存实例
+graph_cache = SimilarityGraphCache()
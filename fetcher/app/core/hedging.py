@@ -0,0 +1,140 @@
+import asyncio
+import logging
+import math
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Dict, Optional, TypeVar
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+class PreparedHedge:
+    """准备好的对冲请求
+
+    准备时已经占用了资源（如领取了账号），对冲最终没有发出时调用 release 归还，避免白白消耗账号冷却。
+    """
+
+    def __init__(self, fn: Callable[[], Awaitable[T]], release: Callable[[], Awaitable[None]] = None):
+        self.fn = fn
+        self.release = release
+
+    def __call__(self) -> Awaitable[T]:
+        return self.fn()
+
+class Hedger:
+    """对冲请求
+
+    请求发出后超过该接口最近耗时的 p95（可配置）仍未返回时，用另一个账号/代理再发一个相同的请求，
+    先返回有效结果的一方胜出，另一方被取消。对冲次数受预算限制：每个请求积累 budget_ratio 个额度，
+    每次对冲消耗 1 个，对冲请求约不超过总请求数的 budget_ratio，不会明显增加账号配额消耗。
+    样本数不足 min_samples 时使用 default_delay。被取消的请求按取消前已经过的时间记录一个下限样本，
+    避免输掉对冲的慢请求不计入统计，使 p95 偏低、对冲越来越频繁。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = settings.get_config("hedging", {}) or {}
+        self.enabled = self.config.get("enabled", False)
+        self.percentile = self.config.get("percentile", 0.95)
+        self.window = self.config.get("window", 200)
+        self.min_samples = self.config.get("min_samples", 20)
+        self.default_delay = self.config.get("default_delay", 5.0)
+        self.min_delay = self.config.get("min_delay", 1.0)
+        self.max_delay = self.config.get("max_delay", 15.0)
+        self.budget_ratio = self.config.get("budget_ratio", 0.05)
+        self.budget_max = self.config.get("budget_max", 5)
+        self._tokens = float(self.budget_max)
+        # key -> 最近完成的请求耗时
+        self._latencies: Dict[str, Deque[float]] = {}
+        self.stats = {"requests": 0, "hedged": 0, "hedge_wins": 0, "budget_exhausted": 0}
+
+    def record(self, key: str, latency: float):
+        """记录一次完成的请求耗时"""
+        samples = self._latencies.get(key)
+        if samples is None:
+            samples = self._latencies[key] = deque(maxlen=self.window)
+        samples.append(latency)
+
+    def delay(self, key: str) -> float:
+        """发出对冲请求前的等待时间"""
+        samples = self._latencies.get(key)
+        if not samples or len(samples) < self.min_samples:
+            return self.default_delay
+        ordered = sorted(samples)
+        index = min(len(ordered) - 1, max(0, math.ceil(self.percentile * len(ordered)) - 1))
+        return min(self.max_delay, max(self.min_delay, ordered[index]))
+
+    def _withdraw(self) -> bool:
+        if self._tokens < 1:
+            self.stats["budget_exhausted"] += 1
+            return False
+        self._tokens -= 1
+        return True
+
+    async def _timed(self, key: str, fn: Callable[[], Awaitable[T]]) -> T:
+        started = time.monotonic()
+        try:
+            return await fn()
+        finally:
+            # 被取消或失败的请求同样记录已经过的时间，作为耗时的下限
+            self.record(key, time.monotonic() - started)
+
+    async def run(
+        self,
+        key: str,
+        primary: Callable[[], Awaitable[T]],
+        hedge: Callable[[], Awaitable[Optional[Callable[[], Awaitable[T]]]]],
+        is_ok: Callable[[T], bool] = bool,
+    ) -> T:
+        """执行请求，超过对冲延迟仍未返回时发出对冲请求
+
+        Args:
+            key: 统计耗时的 key，通常为 平台.接口
+            primary: 主请求
+            hedge: 准备对冲请求，返回对冲请求函数；没有可用的账号时返回 None，不发出对冲。
+                返回 PreparedHedge 时，对冲最终没有发出会调用其 release 归还占用的账号
+            is_ok: 判断结果是否有效，无效的结果不会胜出，继续等待另一方
+        Returns:
+            T: 先返回的有效结果；都无效时返回主请求的结果
+        """
+        if not self.enabled:
+            return await primary()
+        self.stats["requests"] += 1
+        self._tokens = min(self.budget_max, self._tokens + self.budget_ratio)
+
+        primary_task = asyncio.ensure_future(self._timed(key, primary))
+        tasks = [primary_task]
+        try:
+            await asyncio.wait(tasks, timeout=self.delay(key))
+            # 主请求已返回时不再准备对冲，避免白白占用账号
+            if not primary_task.done() and self._withdraw():
+                hedge_fn = await hedge()
+                if hedge_fn is not None and not primary_task.done():
+                    self.stats["hedged"] += 1
+                    self.logger.info(f"{key} 请求超过 {self.delay(key):.2f} 秒未返回，发出对冲请求")
+                    tasks.append(asyncio.ensure_future(self._timed(key, hedge_fn)))
+                else:
+                    # 没有发出对冲，退还额度和已占用的账号
+                    self._tokens += 1
+                    release = getattr(hedge_fn, "release", None)
+                    if release is not None:
+                        await release()
+
+            pending = set(tasks)
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in tasks:
+                    if task in done and task.exception() is None and is_ok(task.result()):
+                        if task is not primary_task:
+                            self.stats["hedge_wins"] += 1
+                        return task.result()
+            return primary_task.result()
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+# 创建全局对冲请求实例
+hedger = Hedger()
@@ -0,0 +1,97 @@
+import logging
+from typing import Dict, Iterable, Optional, Pattern
+import aiohttp
+
+logger = logging.getLogger(__name__)
+
+# 流式 HTML 提取：按块读取响应体，直接在字节上查找目标 script 标签或标记，找到后立即停止读取，
+# 不再把整个页面解码成字符串后再跑正则。提前停止时剩余的响应体不再读取，该连接会被关闭而不是放回连接池。
+
+# 每次读取的字节数
+CHUNK_SIZE = 16 * 1024
+# 单个页面最多读取的字节数
+MAX_BYTES = 4 * 1024 * 1024
+# 相邻两块之间保留的字节数，保证跨块的匹配不会漏掉，需大于任一匹配的长度
+OVERLAP = 512
+
+async def extract_between(
+    response: aiohttp.ClientResponse,
+    start: bytes,
+    end: bytes = b"</script>",
+    chunk_size: int = CHUNK_SIZE,
+    max_bytes: int = MAX_BYTES,
+) -> Optional[bytes]:
+    """读取响应直到找到 start 和之后的第一个 end，返回两者之间的内容
+
+    start 之前的内容读过即丢弃，只保留目标片段。
+
+    Args:
+        response: aiohttp 响应
+        start: 起始标记，如 <script id="..." type="application/json">
+        end: 结束标记
+        chunk_size: 每次读取的字节数
+        max_bytes: 最多读取的字节数
+    Returns:
+        Optional[bytes]: 标记之间的内容，未找到时返回 None
+    """
+    buffer = bytearray()
+    started = False
+    read = 0
+    async for chunk in response.content.iter_chunked(chunk_size):
+        read += len(chunk)
+        # 只从可能包含新匹配的位置开始查找
+        search_from = max(0, len(buffer) - len(end if started else start) + 1)
+        buffer += chunk
+        if not started:
+            index = buffer.find(start, search_from)
+            if index < 0:
+                # 保留可能是 start 前半部分的结尾
+                del buffer[:max(0, len(buffer) - len(start) + 1)]
+            else:
+                del buffer[:index + len(start)]
+                started = True
+                search_from = 0
+        if started:
+            index = buffer.find(end, search_from)
+            if index >= 0:
+                return bytes(buffer[:index])
+        if read >= max_bytes:
+            logger.warning(f"读取 {read} 字节后仍未找到目标内容: {start[:60]!r}")
+            break
+    return None
+
+async def search_first(
+    response: aiohttp.ClientResponse,
+    patterns: Dict[str, Pattern[bytes]],
+    stop: Iterable[str] = None,
+    chunk_size: int = CHUNK_SIZE,
+    max_bytes: int = MAX_BYTES,
+) -> Dict[str, str]:
+    """流式查找多个正则的第一次匹配，任一 stop 中的正则匹配后立即停止读取
+
+    Args:
+        response: aiohttp 响应
+        patterns: 名称 -> 字节正则，有分组时取第一个分组，否则取整个匹配
+        stop: 匹配后停止读取的正则名称，默认全部
+        chunk_size: 每次读取的字节数
+        max_bytes: 最多读取的字节数
+    Returns:
+        Dict[str, str]: 已匹配的名称 -> 匹配内容
+    """
+    stop = set(patterns if stop is None else stop)
+    found: Dict[str, str] = {}
+    tail = b""
+    read = 0
+    async for chunk in response.content.iter_chunked(chunk_size):
+        read += len(chunk)
+        buffer = tail + chunk
+        for name, pattern in patterns.items():
+            if name in found:
+                continue
+            match = pattern.search(buffer)
+            if match:
+                found[name] = (match.group(1) if pattern.groups else match.group(0)).decode("utf-8", "replace")
+        if stop & found.keys() or read >= max_bytes:
+            break
+        tail = buffer[-OVERLAP:]
+    return found
@@ -0,0 +1,123 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from typing import Dict, Any, Optional
+import aiohttp
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class HttpClient:
+    """进程级共享 HTTP 客户端
+
+    所有爬虫和策略共用同一个 aiohttp.ClientSession，底层 TCPConnector 按
+    (host, port, ssl, proxy) 维护 keep-alive 连接池，避免每次请求重新进行
+    TCP/TLS 握手以及代理 CONNECT。session 与事件循环绑定，事件循环变化时自动重建。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = settings.get_config("http_client", {}) or {}
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._stats = {
+            "requests": 0,
+            "connections_created": 0,
+            "connections_reused": 0,
+            "dns_cache_hits": 0,
+            "dns_cache_misses": 0,
+        }
+
+    def _create_trace_config(self) -> aiohttp.TraceConfig:
+        """创建用于统计连接复用情况的 TraceConfig"""
+        trace_config = aiohttp.TraceConfig()
+
+        async def on_request_start(session, ctx, params):
+            self._stats["requests"] += 1
+
+        async def on_connection_create_end(session, ctx, params):
+            self._stats["connections_created"] += 1
+
+        async def on_connection_reuseconn(session, ctx, params):
+            self._stats["connections_reused"] += 1
+
+        async def on_dns_cache_hit(session, ctx, params):
+            self._stats["dns_cache_hits"] += 1
+
+        async def on_dns_cache_miss(session, ctx, params):
+            self._stats["dns_cache_misses"] += 1
+
+        trace_config.on_request_start.append(on_request_start)
+        trace_config.on_connection_create_end.append(on_connection_create_end)
+        trace_config.on_connection_reuseconn.append(on_connection_reuseconn)
+        trace_config.on_dns_cache_hit.append(on_dns_cache_hit)
+        trace_config.on_dns_cache_miss.append(on_dns_cache_miss)
+        return trace_config
+
+    def _create_session(self) -> aiohttp.ClientSession:
+        """按配置创建带连接池的 session"""
+        connector = aiohttp.TCPConnector(
+            limit=self.config.get("limit", 100),
+            limit_per_host=self.config.get("limit_per_host", 20),
+            ttl_dns_cache=self.config.get("ttl_dns_cache", 300),
+            keepalive_timeout=self.config.get("keepalive_timeout", 60),
+            enable_cleanup_closed=True,
+        )
+        timeout = aiohttp.ClientTimeout(total=self.config.get("timeout", 30))
+        self.logger.info(
+            f"创建共享 HTTP 连接池: limit={connector.limit}, limit_per_host={connector.limit_per_host}"
+        )
+        return aiohttp.ClientSession(
+            connector=connector,
+            timeout=timeout,
+            # 各账号通过请求头中的 cookie 认证，共享 session 不能保存 Set-Cookie，否则会混入其它账号的请求
+            cookie_jar=aiohttp.DummyCookieJar(),
+            trace_configs=[self._create_trace_config()],
+        )
+
+    async def get_session(self) -> aiohttp.ClientSession:
+        """获取当前事件循环上的共享 session，不存在或已失效时创建"""
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop:
+            # 事件循环已变化，旧 session 绑定在旧循环上无法继续使用
+            self._session = None
+            self._loop = loop
+        if self._session is None or self._session.closed:
+            self._session = self._create_session()
+        return self._session
+
+    @asynccontextmanager
+    async def session(self):
+        """以上下文管理器形式使用共享 session，退出时不关闭连接池
+
+        用法:
+            async with http_client.session() as session:
+                async with session.get(url, **request_kwargs) as response:
+                    ...
+        """
+        yield await self.get_session()
+
+    def get_stats(self) -> Dict[str, Any]:
+        """获取连接复用统计"""
+        stats = dict(self._stats)
+        total = stats["connections_created"] + stats["connections_reused"]
+        stats["reuse_ratio"] = round(stats["connections_reused"] / total, 4) if total else 0.0
+        return stats
+
+    def log_stats(self, prefix: str = ""):
+        """输出连接复用统计日志"""
+        stats = self.get_stats()
+        self.logger.info(
+            f"{prefix}HTTP 连接统计: 请求 {stats['requests']} 次, 新建连接 {stats['connections_created']} 个, "
+            f"复用连接 {stats['connections_reused']} 次, 复用率 {stats['reuse_ratio']:.2%}"
+        )
+
+    async def close(self):
+        """关闭共享 session"""
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._loop = None
+
+# 创建全局 HTTP 客户端实例
+http_client = HttpClient()
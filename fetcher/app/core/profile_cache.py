@@ -0,0 +1,182 @@
+import asyncio
+import json
+import logging
+from typing import Any, Dict, Iterable, Optional, Tuple
+from app.core.redis_client import redis_client
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 负缓存占位值，表示用户不存在
+MISSING = "__missing__"
+
+# 缓存类型
+KIND_PROFILE = "profile"  # 用户资料
+KIND_UID = "uid"          # 用户名 -> uid 映射
+KIND_USER = "user"        # uid -> 候选用户资料(user_data)
+
+class ProfileCache:
+    """跨任务、跨 worker 共享的用户资料缓存
+
+    按 平台 + 类型 + 用户名/uid 存储用户资料和 uid 映射，支持不存在用户的负缓存和 MGET 批量查询。
+    命中时调用方直接返回，不再占用账号和限流配额。Redis 不可用时按未命中处理，不影响抓取。
+    命中统计先在进程内累计，每隔 stats_flush_interval 秒由后台任务批量写入 Redis，不增加查询的往返次数。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = settings.get_config("profile_cache", {}) or {}
+        self.enabled = self.config.get("enabled", True)
+        self.ttls = {
+            KIND_PROFILE: self.config.get("profile_ttl", 6 * 3600),
+            KIND_UID: self.config.get("uid_ttl", 30 * 24 * 3600),
+            KIND_USER: self.config.get("profile_ttl", 6 * 3600),
+        }
+        self.missing_ttl = self.config.get("missing_ttl", 1800)
+        self.stats_key = "fetcher:profile_cache:stats"
+        self.stats_flush_interval = self.config.get("stats_flush_interval", 10)
+        # 本进程命中统计，key 为 platform:kind
+        self._stats: Dict[str, Dict[str, int]] = {}
+        # 尚未写入 Redis 的计数，key 为 platform:kind:counter
+        self._pending: Dict[str, int] = {}
+        self._flusher: Optional[asyncio.Task] = None
+
+    def _key(self, platform: str, kind: str, key: Any) -> str:
+        # 用户名不区分大小写
+        return f"fetcher:profile_cache:{platform}:{kind}:{str(key).lower()}"
+
+    def _record(self, platform: str, kind: str, hits: int = 0, misses: int = 0, negative_hits: int = 0):
+        """记录命中统计，本进程计数定期累加到 Redis 供容量评估"""
+        stats = self._stats.setdefault(f"{platform}:{kind}", {"hits": 0, "misses": 0, "negative_hits": 0})
+        for name, value in (("hits", hits), ("misses", misses), ("negative_hits", negative_hits)):
+            if value:
+                stats[name] += value
+                field = f"{platform}:{kind}:{name}"
+                self._pending[field] = self._pending.get(field, 0) + value
+        self._ensure_flusher()
+
+    def _ensure_flusher(self):
+        loop = asyncio.get_running_loop()
+        if self._flusher is None or self._flusher.done() or self._flusher.get_loop() is not loop:
+            self._flusher = loop.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        """等待 stats_flush_interval 秒后把累计的计数一次写入 Redis"""
+        await asyncio.sleep(self.stats_flush_interval)
+        await self.flush_stats()
+
+    async def flush_stats(self):
+        """把尚未写入的命中计数累加到 Redis"""
+        pending, self._pending = self._pending, {}
+        if not pending:
+            return
+        try:
+            pipe = redis_client.get_redis().pipeline(transaction=False)
+            for field, value in pending.items():
+                pipe.hincrby(self.stats_key, field, value)
+            await pipe.execute()
+        except Exception as e:
+            self.logger.warning(f"记录缓存统计失败: {e}")
+
+    @staticmethod
+    def _decode(raw) -> Tuple[bool, Optional[Dict[str, Any]]]:
+        """解析缓存值，返回 (是否命中, 值)，负缓存命中时值为 None"""
+        if raw is None:
+            return False, None
+        if isinstance(raw, bytes):
+            raw = raw.decode()
+        if raw == MISSING:
+            return True, None
+        return True, json.loads(raw)
+
+    async def get(self, platform: str, kind: str, key: Any) -> Tuple[bool, Any]:
+        """查询缓存
+
+        Returns:
+            Tuple[bool, Any]: (是否命中, 缓存值)，负缓存命中时缓存值为 None
+        """
+        if not self.enabled or not key:
+            return False, None
+        try:
+            raw = await redis_client.get_redis().get(self._key(platform, kind, key))
+            hit, value = self._decode(raw)
+        except Exception as e:
+            self.logger.warning(f"读取资料缓存失败: {e}")
+            return False, None
+        if not hit:
+            self._record(platform, kind, misses=1)
+        elif value is None:
+            self._record(platform, kind, negative_hits=1)
+        else:
+            self._record(platform, kind, hits=1)
+        return hit, value
+
+    async def mget(self, platform: str, kind: str, keys: Iterable[Any]) -> Dict[Any, Any]:
+        """批量查询缓存
+
+        Returns:
+            Dict[Any, Any]: 命中的 key -> 缓存值，负缓存命中的值为 None，未命中的 key 不出现
+        """
+        keys = [key for key in dict.fromkeys(keys) if key]
+        if not self.enabled or not keys:
+            return {}
+        try:
+            raws = await redis_client.get_redis().mget([self._key(platform, kind, key) for key in keys])
+        except Exception as e:
+            self.logger.warning(f"批量读取资料缓存失败: {e}")
+            return {}
+        result = {}
+        for key, raw in zip(keys, raws):
+            hit, value = self._decode(raw)
+            if hit:
+                result[key] = value
+        negative_hits = sum(1 for value in result.values() if value is None)
+        self._record(
+            platform, kind,
+            hits=len(result) - negative_hits,
+            misses=len(keys) - len(result),
+            negative_hits=negative_hits,
+        )
+        return result
+
+    async def set(self, platform: str, kind: str, key: Any, value: Any, ttl: Optional[int] = None):
+        """写入缓存"""
+        if not self.enabled or not key or not value:
+            return
+        try:
+            await redis_client.get_redis().set(
+                self._key(platform, kind, key),
+                json.dumps(value, ensure_ascii=False),
+                ex=ttl or self.ttls.get(kind, self.ttls[KIND_PROFILE]),
+            )
+        except Exception as e:
+            self.logger.warning(f"写入资料缓存失败: {e}")
+
+    async def set_missing(self, platform: str, kind: str, key: Any):
+        """写入负缓存，标记用户不存在"""
+        if not self.enabled or not key:
+            return
+        try:
+            await redis_client.get_redis().set(self._key(platform, kind, key), MISSING, ex=self.missing_ttl)
+        except Exception as e:
+            self.logger.warning(f"写入资料负缓存失败: {e}")
+
+    def get_stats(self) -> Dict[str, Dict[str, int]]:
+        """获取本进程命中统计"""
+        return {name: dict(stats) for name, stats in self._stats.items()}
+
+    async def get_global_stats(self) -> Dict[str, Dict[str, int]]:
+        """获取所有 worker 累计的命中统计，按 platform:kind 分组"""
+        raw = await redis_client.get_redis().hgetall(self.stats_key)
+        stats: Dict[str, Dict[str, int]] = {}
+        for field, value in raw.items():
+            field = field.decode() if isinstance(field, bytes) else field
+            name, _, counter = field.rpartition(":")
+            stats.setdefault(name, {"hits": 0, "misses": 0, "negative_hits": 0})[counter] = int(value)
+        for counters in stats.values():
+            total = counters["hits"] + counters["misses"] + counters["negative_hits"]
+            counters["hit_ratio"] = round((counters["hits"] + counters["negative_hits"]) / total, 4) if total else 0.0
+        return stats
+
+# 创建全局资料缓存实例
+profile_cache = ProfileCache()
@@ -1,17 +1,142 @@
 import asyncio
+import bisect
+import functools
+import logging
 import time
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 等待时间直方图的桶上界（秒）
+WAIT_BUCKETS = [0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0]
+
+class RateLimiterStats:
+    """进程内所有限流器的等待时间统计，按 限流器名称.调用点 分组
+
+    统计放在全局实例中，随抓取器创建的限流器被回收后统计仍然保留，同名限流器的统计会合并。
+    """
+
+    def __init__(self):
+        # (限流器名称, 调用点) -> {count, total_wait, max_wait, buckets}
+        self._stats: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def record(self, name: str, site: str, wait: float):
+        """记录一次获取令牌的等待时间"""
+        stats = self._stats.get((name, site))
+        if stats is None:
+            stats = self._stats[(name, site)] = {
+                "count": 0,
+                "total_wait": 0.0,
+                "max_wait": 0.0,
+                "buckets": [0] * (len(WAIT_BUCKETS) + 1),
+            }
+        stats["count"] += 1
+        stats["total_wait"] += wait
+        stats["max_wait"] = max(stats["max_wait"], wait)
+        stats["buckets"][bisect.bisect_left(WAIT_BUCKETS, wait)] += 1
+
+    def get_stats(self, name: Optional[str] = None) -> Dict[str, Dict[str, Any]]:
+        """获取等待时间统计，buckets 的 key 为桶上界（秒），+Inf 为超过最大桶的次数
+
+        Args:
+            name: 只返回该限流器的统计，key 为调用点；不指定时返回全部，key 为 限流器名称.调用点
+        """
+        labels: List[str] = [str(bound) for bound in WAIT_BUCKETS] + ["+Inf"]
+        result = {}
+        for (limiter, site), stats in self._stats.items():
+            if name is not None and limiter != name:
+                continue
+            result[site if name is not None else f"{limiter}.{site}"] = {
+                "count": stats["count"],
+                "avg_wait": round(stats["total_wait"] / stats["count"], 6) if stats["count"] else 0.0,
+                "max_wait": round(stats["max_wait"], 6),
+                "buckets": dict(zip(labels, stats["buckets"])),
+            }
+        return result
+
+    def log_stats(self, prefix: str = ""):
+        """输出各限流器调用点的等待时间统计日志"""
+        for name, stats in self.get_stats().items():
+            buckets = {bound: count for bound, count in stats["buckets"].items() if count}
+            logger.info(
+                f"{prefix}限流 {name}: 获取 {stats['count']} 次, 平均等待 {stats['avg_wait']}s, "
+                f"最大等待 {stats['max_wait']}s, 等待分布 {buckets}"
+            )
+
+# 创建全局限流统计实例
+ratelimiter_stats = RateLimiterStats()
 
 class RateLimiter:
-    def __init__(self, rate_per_sec: float = 1.0):
+    """进程内限流器
+
+    按 GCRA 给每个调用方分配一个未来的请求时间点，分配在事件循环中同步完成（中间没有 await，
+    天然原子），调用方各自 sleep 到自己的时间点，不再排队串行等待，也不会因为醒来后重新读时间产生漂移。
+    burst 为令牌桶容量，空闲后允许连续发出 burst 个请求。
+
+    用法:
+        limiter = RateLimiter(rate_per_sec=2, burst=5)
+        await limiter.acquire()
+
+        async with limiter:
+            ...
+
+        @limiter
+        async def fetch(...):
+            ...
+
+    每个调用点（site）的等待时间按直方图统计到全局 ratelimiter_stats，可通过 get_stats() 查看限流带来的延迟。
+    """
+
+    def __init__(self, rate_per_sec: float = 1.0, burst: int = 1, name: str = "default"):
+        self.name = name
         self.rate_per_sec = rate_per_sec
         self.min_interval = 1.0 / rate_per_sec
-        self.lock = asyncio.Lock()
-        self.last_call = 0.0
-
-    async def acquire(self):
-        async with self.lock:
-            now = time.monotonic()
-            wait_time = self.min_interval - (now - self.last_call)
-            if wait_time > 0:
-                await asyncio.sleep(wait_time)
-            self.last_call = time.monotonic() 
\ No newline at end of file
+        self.burst = max(1, int(burst))
+        # 理论到达时间，小于当前时间时说明令牌桶已满
+        self._tat = 0.0
+
+    def reserve(self) -> float:
+        """预约一个请求时间点，返回需要等待的秒数"""
+        now = time.monotonic()
+        tat = max(self._tat, now)
+        self._tat = tat + self.min_interval
+        return max(0.0, self._tat - self.min_interval * self.burst - now)
+
+    async def acquire(self, site: Optional[str] = None) -> float:
+        """获取令牌，需要时等待到预约的时间点
+
+        Args:
+            site: 调用点名称，用于分组统计等待时间，默认使用限流器名称
+        Returns:
+            float: 实际等待的秒数
+        """
+        wait = self.reserve()
+        if wait > 0:
+            await asyncio.sleep(wait)
+        self._record(site or self.name, wait)
+        return wait
+
+    async def __aenter__(self):
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+    def __call__(self, func):
+        """作为装饰器使用，每次调用前获取令牌，调用点为函数名"""
+        site = func.__qualname__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            await self.acquire(site)
+            return await func(*args, **kwargs)
+
+        return wrapper
+
+    def _record(self, site: str, wait: float):
+        ratelimiter_stats.record(self.name, site, wait)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取该限流器各调用点的等待时间统计，buckets 的 key 为桶上界（秒），+Inf 为超过最大桶的次数"""
+        return ratelimiter_stats.get_stats(self.name)
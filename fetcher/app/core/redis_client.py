@@ -0,0 +1,93 @@
+import asyncio
+import logging
+import os
+from typing import Dict, Optional
+import redis.asyncio as aioredis
+from redis.commands.core import AsyncScript
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+class RedisClient:
+    """进程级共享 Redis 连接池
+
+    redis.asyncio 的连接绑定事件循环，这里按当前事件循环维护一个共享客户端，
+    所有限流器、缓存共用同一个连接池。Lua 脚本通过 get_script() 统一注册，
+    调用时使用 EVALSHA，遇到 NOSCRIPT（Redis 重启或执行了 SCRIPT FLUSH）时自动重新加载。
+    事件循环变化时旧客户端在它自己的循环上关闭后再创建新客户端，避免连接泄漏。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = settings.get_config("redis", {}) or {}
+        self._redis: Optional[aioredis.Redis] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # 创建客户端的进程，fork 后子进程不能关闭父进程的连接
+        self._pid: Optional[int] = None
+        # 已注册的 Lua 脚本，key 为脚本源码，随客户端重建而清空
+        self._scripts: Dict[str, AsyncScript] = {}
+
+    def _get_url(self) -> str:
+        """获取 Redis 地址，未单独配置时沿用限流器的配置"""
+        url = self.config.get("url")
+        if not url:
+            url = (settings.get_config("ratelimiter", {}) or {}).get("redis_url")
+        return url
+
+    def get_redis(self) -> aioredis.Redis:
+        """获取当前事件循环上的共享 Redis 客户端"""
+        loop = asyncio.get_running_loop()
+        if self._redis is None or self._loop is not loop:
+            self._close_stale()
+            self._redis = aioredis.from_url(
+                self._get_url(),
+                max_connections=self.config.get("max_connections", 50),
+            )
+            self._loop = loop
+            self._pid = os.getpid()
+            self._scripts = {}
+            self.logger.info("创建共享 Redis 连接池")
+        return self._redis
+
+    def _close_stale(self):
+        """在旧客户端所属的事件循环上关闭它的连接池，不等待关闭完成"""
+        redis, loop = self._redis, self._loop
+        if redis is None or loop is None:
+            return
+        if self._pid != os.getpid():
+            # fork 继承的客户端，连接属于父进程，直接丢弃
+            return
+        if loop.is_closed() or not loop.is_running():
+            self.logger.warning("旧的 Redis 连接池所属事件循环已停止，无法关闭其连接")
+            return
+        future = asyncio.run_coroutine_threadsafe(redis.close(), loop)
+        future.add_done_callback(
+            lambda f: f.cancelled() or f.exception() is None
+            or self.logger.warning(f"关闭旧的 Redis 连接池失败: {f.exception()}")
+        )
+        self.logger.info("事件循环变化，关闭旧的 Redis 连接池")
+
+    def get_script(self, source: str) -> AsyncScript:
+        """获取注册在共享客户端上的 Lua 脚本
+
+        用法:
+            script = redis_client.get_script(LUA_SOURCE)
+            result = await script(keys=[...], args=[...])
+        """
+        redis = self.get_redis()
+        script = self._scripts.get(source)
+        if script is None:
+            script = self._scripts[source] = redis.register_script(source)
+        return script
+
+    async def close(self):
+        """关闭共享连接池"""
+        if self._redis is not None:
+            await self._redis.close()
+        self._redis = None
+        self._loop = None
+        self._pid = None
+        self._scripts = {}
+
+# 创建全局 Redis 客户端实例
+redis_client = RedisClient()
@@ -1,9 +1,137 @@
-from typing import Optional, Dict, Any
+from typing import Optional, Dict, Any, List
+import asyncio
+import itertools
+import logging
 import aiohttp
 import json
+from contextlib import asynccontextmanager
 from app.core.consul_client import consul_client
+from app.core.http_client import http_client
 from app.settings import settings
 
+logger = logging.getLogger(__name__)
+
+class ServiceCatalog:
+    """异步服务实例缓存
+
+    首次访问某个服务时通过 Consul HTTP API 异步查询健康实例，之后由后台协程用 blocking query
+    （index + wait）监听变化并更新缓存，调用方只读本地缓存，不再每次请求都同步访问 Consul 阻塞事件循环。
+    Consul 不可用时继续使用最后一次成功获取的实例列表。
+    实例选择按进行中的请求数最少优先，数量相同时轮询。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = settings.get_config("service_discovery", {}) or {}
+        self.wait_seconds = self.config.get("wait_seconds", 55)
+        self.retry_interval = self.config.get("retry_interval", 5)
+        # 服务名 -> 实例 url 列表
+        self._instances: Dict[str, List[str]] = {}
+        self._indexes: Dict[str, int] = {}
+        self._watchers: Dict[str, asyncio.Task] = {}
+        # 实例 url -> 进行中的请求数
+        self._outstanding: Dict[str, int] = {}
+        self._counter = itertools.count()
+
+    def _consul_url(self, service_name: str) -> str:
+        server = consul_client.consul_config
+        return f"{server.get('scheme', 'http')}://{server['host']}:{server['port']}/v1/health/service/{service_name}"
+
+    @staticmethod
+    def _instance_url(entry: Dict[str, Any], protocol: str = "http") -> Optional[str]:
+        """从健康检查结果中解析实例地址"""
+        service = entry.get("Service")
+        if not service:
+            return None
+        address = service.get('TaggedAddresses', {}).get(protocol, {}).get('address')
+        if address:
+            return address
+        address = service.get('Address') or service.get('ServiceAddress')
+        port = service.get('Port') or service.get('ServicePort')
+        if address and port:
+            return f"{protocol}://{address}:{port}"
+        return None
+
+    async def _query(self, service_name: str, index: int = 0) -> bool:
+        """查询健康实例，index 大于 0 时为 blocking query，直到实例变化或 wait 超时才返回
+
+        Returns:
+            bool: 是否查询成功
+        """
+        params = {"passing": "true"}
+        datacenter = consul_client.consul_config.get("datacenter")
+        if datacenter:
+            params["dc"] = datacenter
+        if index:
+            params["index"] = str(index)
+            params["wait"] = f"{self.wait_seconds}s"
+        # blocking query 最长挂起 wait 时间，超时时间需要留出余量
+        timeout = aiohttp.ClientTimeout(total=self.wait_seconds + 10 if index else 10)
+        session = await http_client.get_session()
+        async with session.get(self._consul_url(service_name), params=params, timeout=timeout) as response:
+            response.raise_for_status()
+            entries = await response.json()
+            new_index = int(response.headers.get("X-Consul-Index", 0))
+        # index 回退时（如 Consul 重启）需要从 0 重新开始
+        self._indexes[service_name] = new_index if new_index >= index else 0
+        urls = [url for url in (self._instance_url(entry) for entry in entries) if url]
+        if urls != self._instances.get(service_name):
+            self.logger.info(f"服务 {service_name} 实例更新: {urls}")
+        self._instances[service_name] = urls
+        return True
+
+    async def _watch(self, service_name: str):
+        """后台监听服务实例变化"""
+        while True:
+            try:
+                await self._query(service_name, self._indexes.get(service_name, 0) or 1)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.logger.warning(f"监听服务 {service_name} 失败，{self.retry_interval} 秒后重试: {e}")
+                await asyncio.sleep(self.retry_interval)
+
+    def _ensure_watcher(self, service_name: str):
+        loop = asyncio.get_running_loop()
+        watcher = self._watchers.get(service_name)
+        if watcher is None or watcher.done() or watcher.get_loop() is not loop:
+            self._watchers[service_name] = loop.create_task(self._watch(service_name))
+
+    async def get_instances(self, service_name: str) -> List[str]:
+        """获取服务的健康实例地址列表"""
+        if service_name not in self._instances:
+            await self._query(service_name)
+        self._ensure_watcher(service_name)
+        return self._instances.get(service_name, [])
+
+    async def choose(self, service_name: str) -> Optional[str]:
+        """选择一个实例，进行中请求数最少的优先，相同时轮询"""
+        urls = await self.get_instances(service_name)
+        if not urls:
+            return None
+        start = next(self._counter) % len(urls)
+        rotated = urls[start:] + urls[:start]
+        return min(rotated, key=lambda url: self._outstanding.get(url, 0))
+
+    @asynccontextmanager
+    async def track(self, url: str):
+        """记录实例进行中的请求数"""
+        self._outstanding[url] = self._outstanding.get(url, 0) + 1
+        try:
+            yield
+        finally:
+            self._outstanding[url] -= 1
+
+    async def close(self):
+        """停止所有监听协程"""
+        for watcher in self._watchers.values():
+            if not watcher.done():
+                watcher.cancel()
+        self._watchers = {}
+
+# 创建全局服务实例缓存
+service_catalog = ServiceCatalog()
+
 class ServiceDiscovery:
     """服务发现工具类"""
     
@@ -15,27 +143,9 @@ class ServiceDiscovery:
             service_name: 服务名称
             
         Returns:
-            服务的基础URL
+            服务的基础URL，在健康实例间按负载选择
         """
-        # 获取服务实例列表
-        services = consul_client.get_service(service_name)
-        if not services:
-            return None
-        # 取第一个健康实例
-        service = services[0]['Service']
-        if not service:
-            return None
-        address = service.get('TaggedAddresses', {}).get(protocol, {}).get('address')
-        final_address = None
-        if address:
-            final_address = address
-        else:
-            address = service.get('Address') or service.get('ServiceAddress')
-            port = service.get('Port') or service.get('ServicePort')
-            if address and port:
-                final_address = f"{protocol}://{address}:{port}"
-        print('final_address', final_address)
-        return final_address
+        return await service_catalog.choose(service_name)
     
     @staticmethod
     async def make_request(
@@ -64,10 +174,11 @@ class ServiceDiscovery:
             
         url = f"{base_url}{path}"
         
-        async with aiohttp.ClientSession() as session:
-            async with session.request(method, url, **kwargs) as response:
-                response.raise_for_status()
-                return await response.json()
+        async with service_catalog.track(base_url):
+            async with http_client.session() as session:
+                async with session.request(method, url, **kwargs) as response:
+                    response.raise_for_status()
+                    return await response.json()
     
     @staticmethod
     async def get(service_name: str, path: str, **kwargs) -> Dict[str, Any]:
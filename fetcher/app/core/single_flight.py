@@ -0,0 +1,159 @@
+import asyncio
+import copy
+import json
+import logging
+from typing import Awaitable, Callable, Dict, Optional, TypeVar
+from app.core.redis_client import redis_client
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 领头方执行失败时发布的占位结果，等待方收到后自行请求
+FAILED = "__failed__"
+
+def make_key(platform: str, endpoint: str, **params) -> str:
+    """按 平台 + 接口 + 规范化后的参数生成请求 key，参数顺序和字符串大小写不影响结果"""
+    normalized = {
+        name: value.strip().lower() if isinstance(value, str) else value
+        for name, value in params.items() if value is not None
+    }
+    return f"{platform}:{endpoint}:{json.dumps(normalized, sort_keys=True, ensure_ascii=False)}"
+
+class SingleFlight:
+    """合并相同的进行中请求
+
+    同一 key 的请求在进行中时，后来的调用方直接等待第一个请求的结果，不再重复占用账号和限流配额。
+    请求在独立的 task 中执行，某个调用方被取消不会影响其他等待方；请求本身被取消时等待方各自重新请求。
+    等待方拿到的是结果的深拷贝，避免多个任务修改同一个对象。
+
+    distributed=True 时通过 Redis 扩展到多个 worker：抢到短锁的 worker 执行请求并把结果发布到 Redis，
+    其余 worker 订阅等待结果，超时或领头方失败时自行请求。只有 is_ok 判断成功的结果才会发布给其它 worker，
+    领头方的超时、账号挂起等失败结果不会扩散到其它 worker。结果需要能 JSON 序列化（元组会变成列表）。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = settings.get_config("single_flight", {}) or {}
+        self.enabled = self.config.get("enabled", True)
+        self.distributed = self.config.get("distributed", False)
+        self.lock_ttl = self.config.get("lock_ttl", 30)
+        self.result_ttl = self.config.get("result_ttl", 10)
+        self._calls: Dict[str, asyncio.Task] = {}
+        self.stats = {"calls": 0, "coalesced": 0, "remote_coalesced": 0}
+
+    async def do(
+        self,
+        key: str,
+        fn: Callable[[], Awaitable[T]],
+        distributed: bool = False,
+        is_ok: Callable[[T], bool] = bool,
+    ) -> T:
+        """执行请求，相同 key 的请求进行中时等待其结果
+
+        Args:
+            key: 请求 key，通常由 make_key 生成
+            fn: 实际发起请求的函数
+            distributed: 是否同时在 worker 之间合并（还需配置 single_flight.distributed 开启）
+            is_ok: 判断结果是否成功，失败的结果不发布给其它 worker，返回 (是否成功, ...) 元组的函数
+                应传入 lambda result: result[0]
+        """
+        if not self.enabled:
+            return await fn()
+        self.stats["calls"] += 1
+        task = self._calls.get(key)
+        if task is not None:
+            self.stats["coalesced"] += 1
+            self.logger.debug(f"合并进行中的请求: {key}")
+            try:
+                return copy.deepcopy(await asyncio.shield(task))
+            except asyncio.CancelledError:
+                if not task.cancelled():
+                    raise
+                # 领头请求被取消，自行请求
+                return await fn()
+
+        if distributed and self.distributed:
+            coro = self._run_distributed(key, fn, is_ok)
+        else:
+            coro = fn()
+        task = asyncio.ensure_future(coro)
+        self._calls[key] = task
+        task.add_done_callback(lambda _: self._calls.pop(key, None) if self._calls.get(key) is task else None)
+        return await asyncio.shield(task)
+
+    def _lock_key(self, key: str) -> str:
+        return f"fetcher:single_flight:lock:{key}"
+
+    def _result_key(self, key: str) -> str:
+        return f"fetcher:single_flight:result:{key}"
+
+    async def _run_distributed(self, key: str, fn: Callable[[], Awaitable[T]], is_ok: Callable[[T], bool]) -> T:
+        try:
+            redis = redis_client.get_redis()
+            leader = await redis.set(self._lock_key(key), 1, nx=True, ex=self.lock_ttl)
+        except Exception as e:
+            self.logger.warning(f"获取请求合并锁失败: {e}")
+            return await fn()
+
+        if not leader:
+            raw = await self._wait_remote(key)
+            if raw is not None and raw != FAILED:
+                self.stats["remote_coalesced"] += 1
+                return json.loads(raw)
+            return await fn()
+
+        payload = FAILED
+        try:
+            result = await fn()
+            if is_ok(result):
+                payload = json.dumps(result, ensure_ascii=False)
+            return result
+        finally:
+            await self._publish(key, payload)
+
+    async def _publish(self, key: str, payload: str):
+        """发布结果并释放锁"""
+        try:
+            redis = redis_client.get_redis()
+            pipe = redis.pipeline(transaction=False)
+            pipe.set(self._result_key(key), payload, ex=self.result_ttl)
+            pipe.publish(self._result_key(key), payload)
+            pipe.delete(self._lock_key(key))
+            await pipe.execute()
+        except Exception as e:
+            self.logger.warning(f"发布合并请求结果失败: {e}")
+
+    async def _wait_remote(self, key: str) -> Optional[str]:
+        """等待其他 worker 发布结果，超时返回 None"""
+        redis = redis_client.get_redis()
+        pubsub = redis.pubsub()
+        try:
+            await pubsub.subscribe(self._result_key(key))
+            # 订阅后再检查一次，避免结果在订阅前已经发布
+            raw = await redis.get(self._result_key(key))
+            if raw is None:
+                loop = asyncio.get_running_loop()
+                deadline = loop.time() + self.lock_ttl
+                while raw is None and loop.time() < deadline:
+                    message = await pubsub.get_message(
+                        ignore_subscribe_messages=True, timeout=deadline - loop.time()
+                    )
+                    if message and message.get("type") == "message":
+                        raw = message["data"]
+            if isinstance(raw, bytes):
+                raw = raw.decode()
+            return raw
+        except Exception as e:
+            self.logger.warning(f"等待合并请求结果失败: {e}")
+            return None
+        finally:
+            try:
+                await pubsub.unsubscribe()
+                await pubsub.close()
+            except Exception:
+                pass
+
+# 创建全局请求合并实例
+single_flight = SingleFlight()
@@ -0,0 +1,167 @@
+import asyncio
+import logging
+import os
+import threading
+from contextlib import asynccontextmanager
+from typing import Any, Awaitable, Callable, Coroutine, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# 关闭回调函数类型
+ShutdownCallback = Callable[[], Awaitable[Any]]
+
+class WorkerRuntime:
+    """Celery worker 进程级常驻事件循环
+
+    每个 worker 进程启动一个后台线程运行事件循环，所有任务通过 run() 提交到该循环执行，
+    这样数据库连接池、Redis 连接池、HTTP 连接池等绑定事件循环的资源可以跨任务复用，
+    不再因为每个任务 asyncio.run() 新建/销毁事件循环而重建连接。
+
+    配合 Celery threads 池使用时，多个任务线程同时把协程提交到同一个循环上并发执行，
+    可通过 slot() 按平台限制同时运行的任务数，通过 register_periodic() 在循环上定期执行回调（如输出进程累计统计）。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._pid: Optional[int] = None
+        self._lock = threading.Lock()
+        self._shutdown_callbacks: List[ShutdownCallback] = []
+        # (间隔秒数, 回调)，事件循环启动时开始定期执行
+        self._periodic_callbacks: List[Tuple[float, Callable[[], Any]]] = []
+        self._periodic_tasks: List[asyncio.Future] = []
+        # 按名称（平台）限制并发的信号量，信号量属于事件循环，循环重建时清空
+        self._slot_limits: Dict[str, int] = {}
+        self._slots: Dict[str, asyncio.Semaphore] = {}
+
+    @property
+    def loop(self) -> Optional[asyncio.AbstractEventLoop]:
+        return self._loop
+
+    def is_running(self) -> bool:
+        """当前进程内事件循环是否在运行（fork 后子进程需要重新启动）"""
+        return (
+            self._loop is not None
+            and self._thread is not None
+            and self._thread.is_alive()
+            and self._pid == os.getpid()
+        )
+
+    def start(self):
+        """启动常驻事件循环，重复调用无副作用"""
+        with self._lock:
+            if self.is_running():
+                return
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def run_loop():
+                asyncio.set_event_loop(loop)
+                loop.call_soon(ready.set)
+                loop.run_forever()
+
+            thread = threading.Thread(target=run_loop, name="fetcher-worker-loop", daemon=True)
+            thread.start()
+            ready.wait()
+            self._loop = loop
+            self._thread = thread
+            self._pid = os.getpid()
+            self._slots = {}
+            self._periodic_tasks = [
+                asyncio.run_coroutine_threadsafe(self._run_periodic(interval, callback), loop)
+                for interval, callback in self._periodic_callbacks
+            ]
+            self.logger.info(f"worker 事件循环已启动, pid: {self._pid}")
+
+    def run(self, coro: Coroutine, timeout: Optional[float] = None) -> Any:
+        """在常驻事件循环上执行协程，阻塞等待结果
+
+        Args:
+            coro: 要执行的协程
+            timeout: 等待超时时间（秒），None 表示一直等待
+        Returns:
+            协程返回值
+        """
+        self.start()
+        future = asyncio.run_coroutine_threadsafe(coro, self._loop)
+        try:
+            return future.result(timeout)
+        except BaseException:
+            # 调用方被中断（超时、软时间限制等）时取消循环上的协程
+            future.cancel()
+            raise
+
+    def set_slot_limits(self, limits: Dict[str, int]):
+        """设置按名称的并发上限，如 {"twitter": 8, "instagram": 2}"""
+        self._slot_limits = {name: int(limit) for name, limit in (limits or {}).items() if limit}
+
+    @asynccontextmanager
+    async def slot(self, name: str):
+        """占用一个指定名称的执行槽位，未配置上限时不做限制"""
+        limit = self._slot_limits.get(name)
+        if not limit:
+            yield
+            return
+        semaphore = self._slots.get(name)
+        if semaphore is None:
+            semaphore = self._slots[name] = asyncio.Semaphore(limit)
+        async with semaphore:
+            yield
+
+    def register_shutdown(self, callback: ShutdownCallback):
+        """注册进程退出时在事件循环上执行的清理回调"""
+        if callback not in self._shutdown_callbacks:
+            self._shutdown_callbacks.append(callback)
+
+    def register_periodic(self, interval: float, callback: Callable[[], Any]):
+        """注册在事件循环上每隔 interval 秒执行一次的回调，回调可以是普通函数或协程函数"""
+        if not interval or interval <= 0:
+            return
+        self._periodic_callbacks.append((interval, callback))
+        with self._lock:
+            if self.is_running():
+                self._periodic_tasks.append(
+                    asyncio.run_coroutine_threadsafe(self._run_periodic(interval, callback), self._loop)
+                )
+
+    async def _run_periodic(self, interval: float, callback: Callable[[], Any]):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                result = callback()
+                if asyncio.iscoroutine(result):
+                    await result
+            except Exception as e:
+                self.logger.error(f"执行定期回调失败: {e}")
+
+    async def _run_shutdown_callbacks(self):
+        for callback in reversed(self._shutdown_callbacks):
+            try:
+                await callback()
+            except Exception as e:
+                self.logger.error(f"执行关闭回调失败: {e}")
+
+    def stop(self, timeout: float = 10):
+        """执行清理回调并停止事件循环"""
+        with self._lock:
+            if not self.is_running():
+                return
+            loop = self._loop
+            for task in self._periodic_tasks:
+                task.cancel()
+            self._periodic_tasks = []
+            try:
+                asyncio.run_coroutine_threadsafe(self._run_shutdown_callbacks(), loop).result(timeout)
+            except Exception as e:
+                self.logger.error(f"清理 worker 资源失败: {e}")
+            loop.call_soon_threadsafe(loop.stop)
+            self._thread.join(timeout)
+            loop.close()
+            self._loop = None
+            self._thread = None
+            self._pid = None
+            self.logger.info("worker 事件循环已停止")
+
+# 创建全局 worker 运行时实例
+worker_runtime = WorkerRuntime()
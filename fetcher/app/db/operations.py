@@ -11,9 +11,14 @@ from typing import Optional
 logger = logging.getLogger(__name__)
 
 # 创建数据库引擎
+# worker 使用常驻事件循环后连接池会跨任务长期复用，需要探活并定期回收空闲连接
 engine = create_async_engine(
     settings.get_config("database", {}).get("url", ""),
-    isolation_level="REPEATABLE READ"  # 设置事务隔离级别
+    isolation_level="REPEATABLE READ",  # 设置事务隔离级别
+    pool_pre_ping=True,
+    pool_size=settings.get_config("database", {}).get("pool_size", 5),
+    max_overflow=settings.get_config("database", {}).get("max_overflow", 10),
+    pool_recycle=settings.get_config("database", {}).get("pool_recycle", 1800),
 )
 SessionLocal = sessionmaker(engine, class_=AsyncSession, expire_on_commit=False)
 
@@ -1,5 +1,11 @@
+import asyncio
 import logging
+from typing import Any, Awaitable, Callable, Dict, List
 from playwright.async_api import async_playwright
+from app.core.graph_cache import graph_cache
+
+# 按 uid 获取相似用户的请求函数
+SimilarFetch = Callable[[str], Awaitable[List[Dict[str, Any]]]]
 
 class BaseFetcher:
     """所有爬虫的基类"""
@@ -9,6 +15,9 @@ class BaseFetcher:
         self.browser = None
         self.context = None
         self.page = None
+        # 后台刷新任务，只在任务运行期间使用本任务的账号，cleanup 时取消未完成的刷新，不拖慢任务完成
+        self._background_tasks = set()
+        self._refresh_semaphore = None
     
     async def setup_browser(self):
         """设置浏览器"""
@@ -22,6 +31,7 @@ class BaseFetcher:
     async def cleanup(self):
         """清理资源"""
         self.logger.info("清理资源...")
+        await self._cancel_background_tasks()
         if self.page:
             await self.page.close()
         if self.context:
@@ -36,4 +46,76 @@ class BaseFetcher:
     
     async def find_similar_users(self, username, count=5):
         """查找相似用户 - 子类需要实现"""
-        raise NotImplementedError("子类必须实现 find_similar_users 方法") 
\ No newline at end of file
+        raise NotImplementedError("子类必须实现 find_similar_users 方法") 
+
+    async def _get_similar_users_cached(self, uid: str, fetch: SimilarFetch) -> List[Dict[str, Any]]:
+        """优先从相似关系缓存获取相似用户，未命中时请求并写入缓存
+        Args:
+            uid (str): 用户ID
+            fetch (SimilarFetch): 未命中或后台刷新时使用的请求函数
+        Returns:
+            List[Dict[str, Any]]: 相似用户列表
+        """
+        cached = await self._lookup_similar_users([uid] if uid else [], fetch)
+        if uid in cached:
+            return cached[uid]
+        return await self._fetch_similar_users_cached(uid, fetch)
+
+    async def _lookup_similar_users(self, uids: List[str], fetch: SimilarFetch) -> Dict[str, List[Dict[str, Any]]]:
+        """批量读取相似关系缓存，过了新鲜期的条目照常返回并在后台刷新
+        Returns:
+            Dict[str, List[Dict[str, Any]]]: 命中的 uid -> 相似用户列表
+        """
+        result = {}
+        for uid, (users, stale) in (await graph_cache.mget(self.platform, uids)).items():
+            result[uid] = users
+            if stale:
+                self._refresh_similar_users(uid, fetch)
+        return result
+
+    async def _fetch_similar_users_cached(self, uid: str, fetch: SimilarFetch) -> List[Dict[str, Any]]:
+        """请求相似用户并写入缓存"""
+        users = await fetch(uid)
+        if isinstance(users, list) and users:
+            await graph_cache.set(self.platform, uid, users)
+        return users
+
+    def _refresh_similar_users(self, uid: str, fetch: SimilarFetch):
+        """在后台刷新过期的相似关系，不阻塞当前任务"""
+        async def refresh():
+            if not await graph_cache.acquire_refresh(self.platform, uid):
+                return
+            if self._refresh_semaphore is None:
+                self._refresh_semaphore = asyncio.Semaphore(max(1, graph_cache.refresh_concurrency))
+            try:
+                async with self._refresh_semaphore:
+                    self.logger.info(f"后台刷新相似关系: {uid}")
+                    await self._fetch_similar_users_cached(uid, fetch)
+            except asyncio.CancelledError:
+                # 任务结束时还没刷新完，释放刷新权交给之后命中过期缓存的任务
+                await graph_cache.release_refresh(self.platform, uid)
+                raise
+
+        self._spawn_background(refresh())
+
+    def _spawn_background(self, coro: Awaitable[Any]):
+        """启动后台任务并记录，任务结束后自动移除"""
+        task = asyncio.ensure_future(coro)
+        self._background_tasks.add(task)
+        task.add_done_callback(self._background_tasks.discard)
+
+    async def _cancel_background_tasks(self):
+        """取消未完成的后台任务，账号释放后不能继续使用；已完成任务的异常记录日志"""
+        tasks = list(self._background_tasks)
+        if not tasks:
+            return
+        pending = [task for task in tasks if not task.done()]
+        if pending:
+            self.logger.info(f"取消 {len(pending)} 个未完成的后台任务")
+        for task in pending:
+            task.cancel()
+        # 被取消的任务只需要执行完清理逻辑，不会等待账号冷却
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for result in results:
+            if isinstance(result, Exception):
+                self.logger.error(f"后台任务失败: {result}")
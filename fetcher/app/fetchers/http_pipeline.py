@@ -0,0 +1,388 @@
+import asyncio
+import bisect
+import functools
+import json
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+import aiohttp
+from app.core.http_client import http_client
+from app.core.circuit_breaker import circuit_breakers, CircuitOpenError
+from app.proxy.pool import proxy_pool
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+# 请求耗时直方图的桶上界（秒）
+LATENCY_BUCKETS = [0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0]
+
+class Request:
+    """经过请求流水线的一次 HTTP 请求
+
+    Args:
+        method: HTTP 方法
+        url: 请求地址
+        endpoint: 接口名称，用于按接口配置超时和统计耗时
+        headers / params / data / json: 传给 aiohttp 的请求参数
+        sticky_key: 固定代理的 key，通常为账号 id
+        account: 发出请求的账号，账号挂起等回调据此处理对应账号
+        use_proxy: 是否通过代理池发送，第三方 API 可以直接连接
+        rate_limiter: 请求前需要获取令牌的限流器，有 feedback 方法时请求后反馈状态码
+        on_status: 每次得到响应后的回调，参数为状态码，如更新账号健康状态
+        reader: 流式读取响应体的函数，只在状态码为 200 时使用，结果保存在 Response.result
+        timeout: 请求总超时(秒)，None 时使用接口配置
+        retry: 是否允许重试
+    """
+
+    def __init__(
+        self,
+        method: str,
+        url: str,
+        endpoint: str = "default",
+        headers: Dict[str, str] = None,
+        params: Dict[str, Any] = None,
+        data: Any = None,
+        json: Any = None,
+        sticky_key: Any = None,
+        account: Dict[str, Any] = None,
+        use_proxy: bool = True,
+        rate_limiter: Any = None,
+        on_status: Callable[[int], Awaitable[None]] = None,
+        reader: Callable[[aiohttp.ClientResponse], Awaitable[Any]] = None,
+        timeout: float = None,
+        retry: bool = True,
+    ):
+        self.method = method
+        self.url = url
+        self.endpoint = endpoint
+        self.headers = headers
+        self.params = params
+        self.data = data
+        self.json = json
+        self.sticky_key = sticky_key
+        self.account = account
+        self.use_proxy = use_proxy
+        self.rate_limiter = rate_limiter
+        self.on_status = on_status
+        self.reader = reader
+        self.timeout = timeout
+        self.retry = retry
+        # 由代理中间件和重试中间件填写
+        self.proxy: Optional[str] = None
+        self.attempts = 0
+
+class Response:
+    """读取完成的响应，离开流水线时连接已经释放"""
+
+    def __init__(self, status: int, headers: Any, url: str, body: bytes = b"", proxy: str = None):
+        self.status = status
+        self.headers = headers
+        self.url = url
+        self.body = body
+        self.proxy = proxy
+        # 请求的 reader 返回的结果
+        self.result: Any = None
+        # 是否被重定向到账号挂起页面，由挂起检测中间件设置
+        self.suspended = False
+
+    @property
+    def content_type(self) -> str:
+        return self.headers.get("Content-Type", "")
+
+    def text(self) -> str:
+        return self.body.decode("utf-8", "replace")
+
+    def json(self) -> Any:
+        return json.loads(self.body)
+
+Handler = Callable[[Request], Awaitable[Response]]
+
+class RetryBudget:
+    """重试预算
+
+    每个请求存入 ratio 个令牌，每次重试消耗 1 个，最多存 max_tokens 个。
+    下游整体故障时重试次数被限制在请求数的 ratio 倍左右，避免重试把故障放大成流量洪峰。
+    """
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self):
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def withdraw(self) -> bool:
+        if self.tokens < 1:
+            return False
+        self.tokens -= 1
+        return True
+
+# 平台 -> 重试预算，同一进程内的所有流水线共享
+_retry_budgets: Dict[str, RetryBudget] = {}
+
+def get_retry_budget(platform: str, config: Dict[str, Any] = None) -> RetryBudget:
+    """获取平台的重试预算，不存在时按配置创建"""
+    budget = _retry_budgets.get(platform)
+    if budget is None:
+        config = config or {}
+        budget = _retry_budgets[platform] = RetryBudget(
+            ratio=config.get("budget_ratio", 0.2),
+            max_tokens=config.get("budget_max", 10),
+        )
+    return budget
+
+class PipelineMetrics:
+    """按 平台.接口 统计请求次数、状态码、网络错误和耗时分布"""
+
+    def __init__(self):
+        self._stats: Dict[str, Dict[str, Any]] = {}
+
+    def record(self, name: str, latency: float, status: Optional[int] = None, retries: int = 0):
+        """记录一次请求，status 为 None 表示网络错误或超时"""
+        stats = self._stats.get(name)
+        if stats is None:
+            stats = self._stats[name] = {
+                "count": 0,
+                "errors": 0,
+                "retries": 0,
+                "statuses": {},
+                "total_latency": 0.0,
+                "max_latency": 0.0,
+                "buckets": [0] * (len(LATENCY_BUCKETS) + 1),
+            }
+        stats["count"] += 1
+        stats["retries"] += retries
+        if status is None:
+            stats["errors"] += 1
+        else:
+            stats["statuses"][status] = stats["statuses"].get(status, 0) + 1
+        stats["total_latency"] += latency
+        stats["max_latency"] = max(stats["max_latency"], latency)
+        stats["buckets"][bisect.bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各接口的请求统计，buckets 的 key 为桶上界（秒），+Inf 为超过最大桶的次数"""
+        result = {}
+        labels: List[str] = [str(bound) for bound in LATENCY_BUCKETS] + ["+Inf"]
+        for name, stats in self._stats.items():
+            result[name] = {
+                "count": stats["count"],
+                "errors": stats["errors"],
+                "retries": stats["retries"],
+                "statuses": dict(stats["statuses"]),
+                "avg_latency": round(stats["total_latency"] / stats["count"], 4) if stats["count"] else 0.0,
+                "max_latency": round(stats["max_latency"], 4),
+                "buckets": dict(zip(labels, stats["buckets"])),
+            }
+        return result
+
+    def log_stats(self, prefix: str = ""):
+        """输出各接口的请求统计日志"""
+        for name, stats in self.get_stats().items():
+            logger.info(
+                f"{prefix}{name}: 请求 {stats['count']} 次, 重试 {stats['retries']} 次, 网络错误 {stats['errors']} 次, "
+                f"状态码 {stats['statuses']}, 平均耗时 {stats['avg_latency']}s, 最大耗时 {stats['max_latency']}s"
+            )
+
+# 创建全局请求统计实例
+pipeline_metrics = PipelineMetrics()
+
+class MetricsMiddleware:
+    """统计包含重试在内的整体耗时和最终结果"""
+
+    def __init__(self, platform: str, metrics: PipelineMetrics = pipeline_metrics):
+        self.platform = platform
+        self.metrics = metrics
+
+    async def __call__(self, request: Request, call_next: Handler) -> Response:
+        name = f"{self.platform}.{request.endpoint}"
+        started = time.monotonic()
+        try:
+            response = await call_next(request)
+        except (aiohttp.ClientError, asyncio.TimeoutError, CircuitOpenError):
+            self.metrics.record(name, time.monotonic() - started, None, max(0, request.attempts - 1))
+            raise
+        self.metrics.record(name, time.monotonic() - started, response.status, max(0, request.attempts - 1))
+        return response
+
+class RetryMiddleware:
+    """网络错误、超时和 502/503/504 按 full jitter 指数退避重试，重试需要消耗重试预算
+
+    429 和 403 与账号有关，交给账号限流和调度处理，不在这里重试。
+    """
+
+    def __init__(self, budget: RetryBudget, config: Dict[str, Any] = None):
+        config = config or {}
+        self.budget = budget
+        self.max_attempts = max(1, config.get("max_attempts", 3))
+        self.base_delay = config.get("base_delay", 0.5)
+        self.max_delay = config.get("max_delay", 5.0)
+        self.statuses = set(config.get("statuses", [502, 503, 504]))
+
+    async def __call__(self, request: Request, call_next: Handler) -> Response:
+        self.budget.deposit()
+        attempt = 0
+        while True:
+            attempt += 1
+            request.attempts = attempt
+            response, error = None, None
+            try:
+                response = await call_next(request)
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                error = e
+            if error is None and response.status not in self.statuses:
+                return response
+            if not request.retry or attempt >= self.max_attempts:
+                break
+            if not self.budget.withdraw():
+                logger.warning(f"重试预算已用完，不再重试: {request.endpoint}")
+                break
+            delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** (attempt - 1)))
+            reason = f"状态码 {response.status}" if error is None else f"{type(error).__name__}: {error}"
+            logger.warning(f"{request.endpoint} 第 {attempt} 次请求失败({reason})，{delay:.2f} 秒后重试")
+            await asyncio.sleep(delay)
+        if error is not None:
+            raise error
+        return response
+
+class CircuitBreakerMiddleware:
+    """按 平台.接口 熔断，熔断期间直接抛出 CircuitOpenError，不再等待超时和消耗限流令牌
+
+    网络错误、超时和 5xx 计为失败；没有账号（sticky_key 为空）的请求 429 也计为失败，
+    这类限流针对整个渠道或出口 IP，而有账号的 429 由账号限流处理。
+    """
+
+    def __init__(self, platform: str):
+        self.platform = platform
+
+    async def __call__(self, request: Request, call_next: Handler) -> Response:
+        name = f"{self.platform}.{request.endpoint}"
+        allowed, wait = await circuit_breakers.allow(name)
+        if not allowed:
+            raise CircuitOpenError(name, wait)
+        try:
+            response = await call_next(request)
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            await circuit_breakers.record(name, False)
+            raise
+        failed = response.status >= 500 or (response.status == 429 and request.sticky_key is None)
+        await circuit_breakers.record(name, not failed)
+        return response
+
+class RateLimitMiddleware:
+    """请求前获取限流令牌，得到响应后把状态码反馈给限流器和请求的回调"""
+
+    async def __call__(self, request: Request, call_next: Handler) -> Response:
+        limiter = request.rate_limiter
+        if limiter is not None:
+            await limiter.acquire()
+        response = await call_next(request)
+        if limiter is not None and hasattr(limiter, "feedback"):
+            await limiter.feedback(response.status)
+        if request.on_status is not None:
+            await request.on_status(response.status)
+        return response
+
+class ProxyMiddleware:
+    """从代理池占用代理，按 sticky_key 固定代理，按代理出口 IP 限流，并把结果上报给代理池"""
+
+    async def __call__(self, request: Request, call_next: Handler) -> Response:
+        if not request.use_proxy:
+            return await call_next(request)
+        async with proxy_pool.lease(request.sticky_key) as proxy:
+            request.proxy = proxy.url
+            limiter = proxy_pool.get_limiter(proxy.url)
+            if limiter is not None:
+                await limiter.acquire()
+            response = await call_next(request)
+            proxy.record(response.status, request.url)
+            if limiter is not None:
+                if response.status == 429:
+                    await limiter.record_failure()
+                elif 200 <= response.status < 300:
+                    await limiter.record_success()
+            return response
+
+class TimeoutMiddleware:
+    """按接口设置请求总超时，优先级: 请求指定 > 平台.接口 > 接口 > 默认值"""
+
+    def __init__(self, platform: str, default: float = 30, timeouts: Dict[str, float] = None):
+        self.platform = platform
+        self.default = default
+        self.timeouts = timeouts or {}
+
+    async def __call__(self, request: Request, call_next: Handler) -> Response:
+        if request.timeout is None:
+            request.timeout = self.timeouts.get(
+                f"{self.platform}.{request.endpoint}", self.timeouts.get(request.endpoint, self.default)
+            )
+        return await call_next(request)
+
+class SuspensionMiddleware:
+    """检测账号挂起，命中时标记响应并以请求为参数触发回调，回调通过 request.account 找到被挂起的账号，不会重试"""
+
+    def __init__(self, is_suspended: Callable[[Response], bool], on_suspended: Callable[[Request], Awaitable[None]] = None):
+        self.is_suspended = is_suspended
+        self.on_suspended = on_suspended
+
+    async def __call__(self, request: Request, call_next: Handler) -> Response:
+        response = await call_next(request)
+        if self.is_suspended(response):
+            response.suspended = True
+            logger.error(f"请求被重定向到账号挂起页面: {response.url}")
+            if self.on_suspended is not None:
+                await self.on_suspended(request)
+        return response
+
+class HttpPipeline:
+    """爬虫共用的 HTTP 请求流水线
+
+    请求依次经过 统计 -> 重试 -> 熔断 -> 限流 -> 代理 -> 超时 -> 额外中间件 -> 共享 session 发送，
+    每次重试都会重新检查熔断、获取限流令牌和代理。响应体在流水线内读取完毕，调用方拿到的 Response 不再占用连接。
+    网络错误和超时在重试用完后原样抛出，熔断时抛出 CircuitOpenError。
+
+    用法:
+        self.http = HttpPipeline(self.platform)
+        response = await self.http.send(Request("GET", url, endpoint="similar_users", headers=headers))
+    """
+
+    def __init__(self, platform: str, middlewares: List[Callable[[Request, Handler], Awaitable[Response]]] = None):
+        self.platform = platform
+        self.config = settings.get_config("http_pipeline", {}) or {}
+        retry_config = self.config.get("retry", {}) or {}
+        self.middlewares = [
+            MetricsMiddleware(platform),
+            RetryMiddleware(get_retry_budget(platform, retry_config), retry_config),
+            CircuitBreakerMiddleware(platform),
+            RateLimitMiddleware(),
+            ProxyMiddleware(),
+            TimeoutMiddleware(platform, self.config.get("timeout", 30), self.config.get("timeouts", {}) or {}),
+            *(middlewares or []),
+        ]
+        handler: Handler = self._transport
+        for middleware in reversed(self.middlewares):
+            handler = functools.partial(middleware, call_next=handler)
+        self._handler = handler
+
+    async def send(self, request: Request) -> Response:
+        """发送请求"""
+        return await self._handler(request)
+
+    async def _transport(self, request: Request) -> Response:
+        request_kwargs = {"headers": request.headers, "timeout": aiohttp.ClientTimeout(total=request.timeout)}
+        for name in ("params", "data", "json"):
+            value = getattr(request, name)
+            if value is not None:
+                request_kwargs[name] = value
+        if request.proxy:
+            request_kwargs["proxy"] = request.proxy
+        async with http_client.session() as session:
+            async with session.request(request.method, request.url, **request_kwargs) as raw:
+                response = Response(raw.status, raw.headers, str(raw.url), proxy=request.proxy)
+                if request.reader is not None and raw.status == 200:
+                    response.result = await request.reader(raw)
+                else:
+                    response.body = await raw.read()
+                return response
@@ -1,4 +1,4 @@
-from typing import Tuple, List, Dict, Any
+from typing import Tuple, List, Dict, Any, Optional
 import logging
 import asyncio
 import re
@@ -11,12 +11,27 @@ from playwright.async_api import Page
 import urllib.parse
 import aiohttp
 import os
-from app.core.service_discovery import ServiceDiscovery
+from app.core.account_lease import account_leases
+from app.core.account_scheduler import AccountScheduler
+from app.core.account_state import account_state
+from app.core.adaptive_ratelimiter import AdaptiveRateLimiter
+from app.core.profile_cache import profile_cache, KIND_PROFILE, KIND_UID
+from app.core.single_flight import single_flight, make_key
+from app.core.html_stream import search_first
+from app.fetchers.http_pipeline import HttpPipeline, Request, SuspensionMiddleware
 
 from app.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# 用户主页中查找用户 ID 的标记，按优先级排列
+PROFILE_ID_PATTERNS = {
+    "not_found": re.compile(rb"Page Not Found"),
+    "profile_id": re.compile(rb'"profile_id":"?(\d+)'),
+    "profile_page": re.compile(rb'"profilePage_(\d+)"'),
+    "id": re.compile(rb'"id":"(\d+)"'),
+}
+
 class InstagramFetcher(BaseFetcher):
     def __init__(self):
         super().__init__()
@@ -31,23 +46,37 @@ class InstagramFetcher(BaseFetcher):
         # 账号管理
         self.instagram_accounts = []  # 所有Instagram账号
         self.main_instagram_account = {}  # 主账号
-        self.instagram_accounts_need_count = 1  # 需要获取的Instagram账号数量
-        self.instagram_accounts_last_used = {}  # 所有Instagram账号上次使用时间
-        self.instagram_accounts_cooldown_seconds = 5  # 所有Instagram账号冷却时间
+        self.instagram_accounts_need_count = self.accounts_config.get("count", 1)  # 需要获取的Instagram账号数量
+        self.instagram_accounts_cooldown_seconds = self.accounts_config.get("cooldown_seconds", 5)  # 每个账号两次请求的最小间隔
+        # 补全用户资料时每个账号同时进行的请求数
+        self.profile_concurrency_per_account = self.accounts_config.get("profile_concurrency_per_account", 2)
+        # 账号调度器，冷却时间取账号自适应限流器的当前间隔，账号的下次可用时间在 worker 间共享
+        self.account_scheduler = AccountScheduler(
+            "instagram",
+            cooldown=lambda acc: self._get_account_limiter(acc).min_interval,
+            state=account_state,
+            platform=self.platform,
+        )
+        # 本次任务中被挂起的账号 id，不再参与调度
+        self.suspended_account_ids = set()
+        # 账号 id -> 自适应限流器，冷却时间随 429/5xx 反馈调整
+        self.account_limiters = {}
+        # 结果用户 reels 平均播放量的并发计算配置
+        reels_metrics_config = self.accounts_config.get("reels_metrics", {}) or {}
+        self.reels_concurrency_per_account = reels_metrics_config.get("concurrency_per_account", 2)
+        self.reels_metrics_deadline = reels_metrics_config.get("deadline_seconds", 90)
+        # 共享请求流水线，被重定向到挂起页面时标记响应并更新账号状态
+        self.http = HttpPipeline(self.platform, [
+            SuspensionMiddleware(self.is_suspended_redirect, self.handle_suspended_account),
+        ])
     
     def _load_config(self):
         """加载 Instagram API 配置"""
         try:
-            # 加载代理配置
-            proxy_config = settings.get_config('proxy', {})
-            self.proxy_enabled = proxy_config.get('enabled', False)
-            self.proxy_url = proxy_config.get('url', '')
-            if self.proxy_enabled and self.proxy_url:
-                self.logger.info(f"代理已启用: {self.proxy_url}")
-            
             # 获取 Instagram API 配置
             instagram_config = settings.get_config('instagram', {})
             self.api_endpoints = instagram_config.get('endpoints', {})
+            self.accounts_config = instagram_config.get('accounts', {}) or {}
             self.logger.info("成功加载 Instagram配置")
         except Exception as e:
             self.logger.error(f"加载配置失败: {str(e)}")
@@ -55,8 +84,7 @@ class InstagramFetcher(BaseFetcher):
             self.logger.error(traceback.format_exc())
             # 设置默认值
             self.api_endpoints = {}
-            self.proxy_enabled = False
-            self.proxy_url = ''
+            self.accounts_config = {}
     
     async def _random_delay(self, min_seconds=1, max_seconds=5):
         """随机延迟，模拟人类行为"""
@@ -84,9 +112,91 @@ class InstagramFetcher(BaseFetcher):
         return ""
 
     async def fetch_user_profile(self, uid: str) -> Tuple[bool, int, str, Dict[str, Any]]:
-        """获取用户主页信息
+        """获取用户主页信息，优先读取资料缓存
+        Args:
+            uid (str): 用户ID
+        Returns:
+            Tuple[bool, int, str, Dict[str, Any]]: 返回(success, code, msg, profile)格式
+        """
+        hit, profile = await profile_cache.get(self.platform, KIND_PROFILE, uid)
+        if hit:
+            if not profile:
+                return False, 404, "未获取到用户资料", {}
+            return True, 200, "success", profile
+        return await self._fetch_user_profile(uid)
+
+    async def _fetch_user_profiles(self, uids: List[str], limit: int = None) -> List[Dict[str, Any]]:
+        """批量获取用户资料，先去重并 MGET 批量读取缓存，未命中的用户分散到已锁定的账号上并发请求
+        Args:
+            uids (List[str]): 用户ID列表
+            limit (int, optional): 获取到的资料达到该数量后立即返回，取消尚未开始的请求
+        Returns:
+            List[Dict[str, Any]]: 按 uids 顺序排列的用户资料列表，获取失败的用户不包含在内
+        """
+        uids = [uid for uid in dict.fromkeys(uids) if uid]
+        cached = await profile_cache.mget(self.platform, KIND_PROFILE, uids)
+        self.logger.info(f"批量获取用户资料: {len(uids)} 个, 命中缓存: {len(cached)} 个")
+        profiles = {uid: profile for uid, profile in cached.items() if profile}
+        missing = [uid for uid in uids if uid not in cached]
+        if missing and (limit is None or len(profiles) < limit):
+            await self._set_instagram_accounts()
+            concurrency = max(1, len(self.instagram_accounts) * self.profile_concurrency_per_account)
+            semaphore = asyncio.Semaphore(concurrency)
+
+            async def fetch(uid):
+                async with semaphore:
+                    # 每个请求取一个冷却完毕的账号，同一账号的请求按限流间隔错开
+                    account = await self.account_scheduler.acquire()
+                    return uid, await self._fetch_user_profile(uid, account)
+
+            tasks = [asyncio.ensure_future(fetch(uid)) for uid in missing]
+            try:
+                for future in asyncio.as_completed(tasks):
+                    uid, (success, code, msg, user_data) = await future
+                    if not success or not user_data:
+                        self.logger.error(f"获取用户 {uid} 资料失败, code: {code}, msg: {msg}")
+                        continue
+                    profiles[uid] = user_data
+                    if limit is not None and len(profiles) >= limit:
+                        break
+            finally:
+                for task in tasks:
+                    task.cancel()
+                await asyncio.gather(*tasks, return_exceptions=True)
+        return [profiles[uid] for uid in uids if uid in profiles]
+
+    def _get_account_limiter(self, instagram_account: Dict[str, Any]) -> AdaptiveRateLimiter:
+        """获取账号的自适应限流器，初始速率为 1 / 冷却时间"""
+        account_id = instagram_account.get("id")
+        limiter = self.account_limiters.get(account_id)
+        if limiter is None:
+            limiter = self.account_limiters[account_id] = AdaptiveRateLimiter.from_config(
+                key=f"instagram:account:{account_id}",
+                rate_per_sec=1.0 / self.instagram_accounts_cooldown_seconds,
+                config=self.accounts_config.get("adaptive", {}),
+            )
+        return limiter
+
+    async def _account_feedback(self, instagram_account: Dict[str, Any], status: int) -> None:
+        """把请求结果反馈给账号的自适应限流器和共享健康状态"""
+        if instagram_account and instagram_account.get("id"):
+            await self._get_account_limiter(instagram_account).feedback(status)
+            await account_state.record_status(self.platform, instagram_account.get("id"), status)
+
+    async def _fetch_user_profile(self, uid: str, instagram_account: dict = None) -> Tuple[bool, int, str, Dict[str, Any]]:
+        """请求用户主页信息，同一用户进行中的请求会被合并"""
+        return tuple(await single_flight.do(
+            make_key(self.platform, "user_profile", uid=uid),
+            lambda: self._request_user_profile(uid, instagram_account),
+            distributed=True,
+            is_ok=lambda result: result[0],
+        ))
+
+    async def _request_user_profile(self, uid: str, instagram_account: dict = None) -> Tuple[bool, int, str, Dict[str, Any]]:
+        """请求用户主页信息并写入资料缓存
         Args:
             uid (str): 用户ID
+            instagram_account (dict, optional): 指定Instagram账号，默认使用主账号
         Returns:
             Tuple[bool, int, str, Dict[str, Any]]: 返回(success, code, msg, profile)格式
         """
@@ -100,7 +210,7 @@ class InstagramFetcher(BaseFetcher):
             if not url:
                 self.logger.error("无法获取 user_by_uid API 端点")
                 return False, 500, "API端点未配置", {}
-            headers = self._get_headers()
+            headers = self._get_headers(instagram_account)
             variables = {
                 "id": uid,
                 "render_surface": "PROFILE",
@@ -110,35 +220,28 @@ class InstagramFetcher(BaseFetcher):
                 "variables": json.dumps(variables)
             }
             
-            # 设置代理
-            proxy = None
-            if self.proxy_enabled and self.proxy_url:
-                proxy = self.proxy_url
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                request_kwargs = {"headers": headers, "data": form_data}
-                if proxy:
-                    request_kwargs["proxy"] = proxy
-                async with session.post(url, **request_kwargs) as response:
-                    if self.is_suspended_redirect(response):
-                        self.logger.error(f"请求被重定向到账号挂起页面: {response.url}")
-                        await self.handle_suspended_account()
-                        return False, 403, "账号被挂起", {}
-                    if response.status != 200:
-                        error_text = await response.text()
-                        self.logger.error(f"Instagram API 返回非 200 状态码: {response.status}, 内容: {error_text}")
-                        return False, response.status, f"API返回非200: {response.status}", {}
-                    content_type = response.headers.get("Content-Type", "")
-                    if "application/json" not in content_type:
-                        error_text = await response.text()
-                        self.logger.error(f"返回内容类型不是 JSON: {content_type}")
-                        return False, 500, f"Content-Type错误: {content_type}", {}
-                    response_data = await response.json()
+            response = await self.http.send(Request(
+                "POST", url, endpoint="user_by_uid", headers=headers, data=form_data,
+                sticky_key=(instagram_account or self.main_instagram_account).get("id"),
+                account=instagram_account or self.main_instagram_account,
+                on_status=lambda status: self._account_feedback(instagram_account or self.main_instagram_account, status),
+            ))
+            if response.suspended:
+                return False, 403, "账号被挂起", {}
+            if response.status != 200:
+                self.logger.error(f"Instagram API 返回非 200 状态码: {response.status}, 内容: {response.text()}")
+                return False, response.status, f"API返回非200: {response.status}", {}
+            content_type = response.content_type
+            if "application/json" not in content_type:
+                self.logger.error(f"返回内容类型不是 JSON: {content_type}")
+                return False, 500, f"Content-Type错误: {content_type}", {}
+            response_data = response.json()
             
             # 解析响应数据
             user_data = response_data.get("data", {}).get("user", {})
             if not user_data:
                 self.logger.error("无法获取用户资料")
+                await profile_cache.set_missing(self.platform, KIND_PROFILE, uid)
                 return False, 404, "未获取到用户资料", {}
             
             # 获取用户简介
@@ -160,6 +263,9 @@ class InstagramFetcher(BaseFetcher):
                 "email_in_bio": email_in_bio,
                 "url": f"https://www.instagram.com/{user_data.get('username', '')}"
             }
+            await profile_cache.set(self.platform, KIND_PROFILE, uid, profile_data)
+            if profile_data["username"]:
+                await profile_cache.set(self.platform, KIND_UID, profile_data["username"], uid)
             return True, 200, "success", profile_data
             
         except asyncio.TimeoutError:
@@ -175,6 +281,12 @@ class InstagramFetcher(BaseFetcher):
     async def fetch_user_profile_id(self, username: str) -> Tuple[bool, str, str]:
         """获取用户资料ID"""
         self.logger.info(f"获取 Instagram 用户资料ID: {username}")
+        hit, profile_id = await profile_cache.get(self.platform, KIND_UID, username)
+        if hit:
+            if not profile_id:
+                return (False, "用户不存在", "")
+            self.logger.info(f"命中用户ID缓存: {username} -> {profile_id}")
+            return (True, "Success", profile_id)
         
         try:
             # 构建请求 URL
@@ -183,68 +295,37 @@ class InstagramFetcher(BaseFetcher):
             # 准备请求头
             headers = self._get_headers()
             
-            # 设置代理
-            proxy = None
-            if self.proxy_enabled and self.proxy_url:
-                proxy = self.proxy_url
-                self.logger.info(f"使用代理: {proxy}")
-            
-            # 发送请求
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                request_kwargs = {"headers": headers}
-                if proxy:
-                    request_kwargs["proxy"] = proxy
-                
-                async with session.get(url, **request_kwargs) as response:
-                    self.logger.info(f"请求状态码: {response.status}")
-                    if response.status != 200:
-                        return (False, f"请求失败，状态码: {response.status}", "")
-                    
-                    html_content = await response.text()
-                    
-                    # 检查页面是否存在
-                    if "Page Not Found" in html_content:
-                        return (False, "用户不存在", "")
-                    
-                    # 查找所有 <script type="application/json"> 标签
-                    script_pattern = r'<script type="application/json"  data-content-len="\d+" data-sjs>(.*?)</script>'
-                    script_matches = re.findall(script_pattern, html_content, re.DOTALL)
-                    
-                    if not script_matches:
-                        return (False, "未找到 JSON 数据", "")
-                    # 
-                    # 遍历所有 JSON 数据，查找 profile_id
-                    for script_content in script_matches:
-                        try:
-                            # 尝试解析 JSON
-                            json_data = json.loads(script_content)
-                            
-                            # 递归查找 profile_id
-                            profile_id = self._find_profile_id(json_data)
-                            if profile_id:
-                                return (True, "Success", profile_id)
-                        except json.JSONDecodeError:
-                            continue
-                    
-                    # 如果上述方法失败，尝试其他方法
-                    # 方法 1: 从页面中查找包含用户 ID 的 JSON 数据
-                    profile_id_pattern = r'"profilePage_(\d+)"'
-                    profile_id_match = re.search(profile_id_pattern, html_content)
-                    if profile_id_match:
-                        profile_id = profile_id_match.group(1)
-                        self.logger.info(f"通过正则表达式获取用户 ID: {profile_id}")
-                        return (True, "Success", profile_id)
-                    
-                    # 方法 2: 从页面中查找其他格式的用户 ID
-                    id_pattern = r'"id":"(\d+)"'
-                    id_match = re.search(id_pattern, html_content)
-                    if id_match:
-                        profile_id = id_match.group(1)
-                        self.logger.info(f"通过正则表达式获取用户 ID: {profile_id}")
-                        return (True, "Success", profile_id)
-                    
-                    return (False, "未找到用户 ID", "")
+            # 发送请求，流式查找，找到 profile_id 或 profilePage_ 标记后立即停止读取；"id" 只作为兜底
+            response = await self.http.send(Request(
+                "GET", url, endpoint="profile_page", headers=headers, sticky_key=self.main_instagram_account.get("id"),
+                account=self.main_instagram_account,
+                reader=lambda raw: search_first(raw, PROFILE_ID_PATTERNS, stop=("not_found", "profile_id", "profile_page")),
+            ))
+            self.logger.info(f"请求状态码: {response.status}")
+            if response.suspended:
+                return (False, "账号被挂起", "")
+            if response.status != 200:
+                return (False, f"请求失败，状态码: {response.status}", "")
+            found = response.result
+            
+            # 检查页面是否存在
+            if "not_found" in found:
+                await profile_cache.set_missing(self.platform, KIND_UID, username)
+                return (False, "用户不存在", "")
+            
+            profile_id = found.get("profile_id") or found.get("profile_page")
+            if profile_id:
+                self.logger.info(f"获取用户 ID: {profile_id}")
+                await profile_cache.set(self.platform, KIND_UID, username, profile_id)
+                return (True, "Success", profile_id)
+            
+            # 从页面中查找其他格式的用户 ID
+            if found.get("id"):
+                profile_id = found["id"]
+                self.logger.info(f"通过正则表达式获取用户 ID: {profile_id}")
+                return (True, "Success", profile_id)
+            
+            return (False, "未找到用户 ID", "")
             
         except asyncio.TimeoutError:
             self.logger.error(f"获取用户资料ID请求超时")
@@ -256,27 +337,6 @@ class InstagramFetcher(BaseFetcher):
             self.logger.error(f"获取用户资料ID失败: {str(e)}")
             return (False, str(e), "")
     
-    def _find_profile_id(self, data):
-        """递归查找 profile_id"""
-        if isinstance(data, dict):
-            # 检查当前字典中是否有 profile_id
-            if "profile_id" in data:
-                return data["profile_id"]
-            
-            # 递归检查所有值
-            for value in data.values():
-                result = self._find_profile_id(value)
-                if result:
-                    return result
-        elif isinstance(data, list):
-            # 递归检查列表中的所有元素
-            for item in data:
-                result = self._find_profile_id(item)
-                if result:
-                    return result
-        
-        return None
-
     async def find_similar_users(self, username: str, count: int = 20, uid: str = None) -> Tuple[bool, str, List[Dict[str, Any]]]:
         """找到与指定用户相似的用户（包括二度关系用户，第一层不直接返回，始终尝试补全第二层）
         
@@ -311,7 +371,7 @@ class InstagramFetcher(BaseFetcher):
             all_similar_users = []
             
             # 步骤1: 获取第一层相似用户
-            first_level_users = await self._find_similar_users_by_uid(uid)
+            first_level_users = await self._get_similar_users_cached(uid, self._fetch_similar_users)
             self.logger.info(f"获取到第一层相似用户: {len(first_level_users)} 个")
             processed_uids = set(user["uid"] for user in first_level_users)
             all_similar_users = first_level_users
@@ -319,9 +379,16 @@ class InstagramFetcher(BaseFetcher):
             # 步骤2: 获取第二层相似用户
             second_level_users = []
             if len(first_level_users) < count:
+                cached = await self._lookup_similar_users(
+                    [user["uid"] for user in first_level_users], self._fetch_similar_users
+                )
                 for first_level_user in first_level_users:
                     if first_level_user["uid"]:
-                        users = await self._find_similar_users_by_uid(first_level_user["uid"])
+                        from_cache = first_level_user["uid"] in cached
+                        if from_cache:
+                            users = cached[first_level_user["uid"]]
+                        else:
+                            users = await self._fetch_similar_users_cached(first_level_user["uid"], self._fetch_similar_users)
                         self.logger.info(f"获取到{first_level_user['username']}第二层相似用户: {len(users)} 个")
                         if not isinstance(users, list) or not users:
                             continue
@@ -332,22 +399,25 @@ class InstagramFetcher(BaseFetcher):
                                 all_similar_users.append(user)
                         if len(all_similar_users) >= count:
                             break
-                        await asyncio.sleep(random.uniform(1, 3))
+                        if not from_cache:
+                            await asyncio.sleep(random.uniform(1, 3))
 
             result_users = all_similar_users[:count]
-            for user in result_users:
-                success, code, msg, reels = await self.fetch_user_reels(user["username"], 15, user["uid"])
-                if not success or not reels:
-                    self.logger.error(f"获取用户 {user.get('username')} reels失败, code: {code}, msg: {msg}, reels count: {len(reels)}")
-                    user["avg_play_last_10_reels"] = None
-                else:
-                    user["avg_play_last_10_reels"] = await self._calculate_avg_views(reels)
+            await self._fill_reels_metrics(result_users)
             return (True, "success", result_users)
         
         except Exception as e:
             self.logger.error(f"查找相似用户失败: {str(e)}")
             return (False, str(e), [])
 
+    async def _fetch_similar_users(self, uid: str) -> List[Dict[str, Any]]:
+        """获取相似用户，同一 uid 进行中的请求会被合并"""
+        return await single_flight.do(
+            make_key(self.platform, "similar", uid=uid),
+            lambda: self._find_similar_users_by_uid(uid),
+            distributed=True,
+        )
+
     async def _find_similar_users_by_uid(self, uid: str) -> List[Dict[str, Any]]:
         """通过用户ID获取相似用户
         
@@ -380,48 +450,27 @@ class InstagramFetcher(BaseFetcher):
                 "variables": json.dumps(variables)
             }
             
-            # 设置代理
-            proxy = None
-            if self.proxy_enabled and self.proxy_url:
-                proxy = self.proxy_url
-            
             # 发送请求
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                request_kwargs = {"headers": headers, "data": form_data}
-                if proxy:
-                    request_kwargs["proxy"] = proxy
-                
-                async with session.post(url, **request_kwargs) as response:
-                    if self.is_suspended_redirect(response):
-                        self.logger.error(f"请求被重定向到账号挂起页面: {response.url}")
-                        await self.handle_suspended_account()
-                        return []
-                    if response.status != 200:
-                        error_text = await response.text()
-                        self.logger.error(f"Instagram API 返回非 200 状态码: {response.status}, 内容: {error_text}")
-                        return []
-                    # 校验 Content-Type
-                    content_type = response.headers.get("Content-Type", "")
-                    if "application/json" not in content_type:
-                        error_text = await response.text()
-                        self.logger.error(f"返回内容类型不是 JSON: {content_type}")
-                        return []
-                    response_data = await response.json()
+            response = await self.http.send(Request(
+                "POST", url, endpoint="similar_users", headers=headers, data=form_data,
+                sticky_key=self.main_instagram_account.get("id"), account=self.main_instagram_account,
+            ))
+            if response.suspended:
+                return []
+            if response.status != 200:
+                self.logger.error(f"Instagram API 返回非 200 状态码: {response.status}, 内容: {response.text()}")
+                return []
+            # 校验 Content-Type
+            content_type = response.content_type
+            if "application/json" not in content_type:
+                self.logger.error(f"返回内容类型不是 JSON: {content_type}")
+                return []
+            response_data = response.json()
             
             # 解析响应数据
-            similar_users = []
             users = response_data.get("data", {}).get("xdt_api__v1__discover__chaining", {}).get("users", [])
             
-            for user in users:
-                uid = user.get("pk", "")
-                success, code, msg, user_data = await self.fetch_user_profile(uid)
-                if not success or not user_data:
-                    self.logger.error(f"获取用户 {user.get('username')} 资料失败, code: {code}, msg: {msg}")
-                    continue
-                similar_users.append(user_data)
-                # await asyncio.sleep(1)
-                
+            similar_users = await self._fetch_user_profiles([user.get("pk", "") for user in users])
             return similar_users
             
         except Exception as e:
@@ -447,7 +496,7 @@ class InstagramFetcher(BaseFetcher):
         }
 
     async def _get_instagram_accounts_from_admin_service(self, count: int = 1) -> list:
-        """通过服务发现获取admin-service-http的IP和端口，然后发送POST请求获取Instagram账号
+        """从 worker 级账号租约池获取Instagram账号，池中空闲账号不足时通过服务发现向 admin 锁定
         Args:
             count (int): 账号数量，默认为 1
         Returns:
@@ -455,14 +504,10 @@ class InstagramFetcher(BaseFetcher):
         """
         try:
             self.logger.info(f"正在通过服务发现获取Instagram认证信息... count={count}")
-            response = await ServiceDiscovery.post(
-                service_name="admin",
-                path="/v1/instagram/accounts/lock",
-                json={"count": count}
-            )
-            if response and response.get('accounts', []) and len(response.get('accounts', [])) > 0:
-                self.logger.info(f"成功获取Instagram账号, 数量: {len(response.get('accounts', []))}")
-                return response.get('accounts', [])
+            accounts = await account_leases.acquire("instagram", count)
+            if accounts:
+                self.logger.info(f"成功获取Instagram账号, 数量: {len(accounts)}")
+                return accounts
             else:
                 self.logger.error(f"获取Instagram账号失败: 响应格式不正确")
                 return []
@@ -480,6 +525,7 @@ class InstagramFetcher(BaseFetcher):
             self.instagram_accounts = await self._get_instagram_accounts_from_admin_service(self.instagram_accounts_need_count)
             if self.instagram_accounts:
                 self.main_instagram_account = self.instagram_accounts[0]
+                self.account_scheduler.set_accounts(self.instagram_accounts)
                 self.logger.info(f"成功获取Instagram账号, 数量: {len(self.instagram_accounts)}, 主账号: {self.main_instagram_account.get('username', '')}")
                 return True
             else:
@@ -496,16 +542,12 @@ class InstagramFetcher(BaseFetcher):
         if not self.instagram_accounts:
             return True
         try:
-            ids = [account.get("id") for account in self.instagram_accounts]
-            response = await ServiceDiscovery.post(
-                service_name="admin",
-                path="/v1/instagram/accounts/unlock",
-                json={"ids": ids}
-            )
-            if response.get("success", False):
+            # 账号归还到租约池，空闲超时后才向 admin 解锁
+            if await account_leases.release("instagram", self.instagram_accounts):
                 self.instagram_accounts = []
                 self.main_instagram_account = {}
-                self.instagram_accounts_last_used = {}
+                self.suspended_account_ids.clear()
+                await self.account_scheduler.close()
                 self.logger.info("成功清理Instagram账号")
                 return True
             else:
@@ -559,7 +601,9 @@ class InstagramFetcher(BaseFetcher):
             # 循环获取用户，直到达到请求的数量或没有更多用户
             while len(processed_uids) < count:
                 # 使用新的方法获取用户
-                users, rank_token, next_max_id = await self._find_users_by_search(query, rank_token, next_max_id)
+                users, rank_token, next_max_id = await self._find_users_by_search(
+                    query, rank_token, next_max_id, limit=count - len(all_users), exclude_uids=processed_uids
+                )
 
                 for user in users:
                     uid = user.get("uid")
@@ -588,13 +632,7 @@ class InstagramFetcher(BaseFetcher):
             
             # 确保返回数量不超过请求数量
             result_users = all_users[:count]
-            for user in result_users:
-                success, code, msg, reels = await self.fetch_user_reels(user["username"], 15, user["uid"])
-                if not success or not reels:
-                    self.logger.error(f"获取用户 {user.get('username')} reels失败, code: {code}, msg: {msg}, reels count: {len(reels)}")
-                    user["avg_play_last_10_reels"] = None
-                else:
-                    user["avg_play_last_10_reels"] = await self._calculate_avg_views(reels)
+            await self._fill_reels_metrics(result_users)
             return (True, "success", result_users)
             
         except Exception as e:
@@ -604,13 +642,15 @@ class InstagramFetcher(BaseFetcher):
             self.logger.error(traceback.format_exc())
             return (False, error_msg, [])
 
-    async def _find_users_by_search(self, query: str, rank_token: str = None, next_max_id: str = None) -> Tuple[List[Dict[str, Any]], str, str]:
+    async def _find_users_by_search(self, query: str, rank_token: str = None, next_max_id: str = None, limit: int = None, exclude_uids: set = None) -> Tuple[List[Dict[str, Any]], str, str]:
         """通过搜索获取用户
         
         Args:
             query (str): 搜索关键词
             rank_token (str, optional): 排名令牌
             next_max_id (str, optional): 下一页ID
+            limit (int, optional): 需要的用户数量，补全到该数量后不再请求其余作者资料
+            exclude_uids (set, optional): 已获取过的用户ID，不再补全资料
         
         Returns:
             Tuple[List[Dict[str, Any]], str, str]: 用户列表，排名令牌，下一页ID
@@ -635,38 +675,26 @@ class InstagramFetcher(BaseFetcher):
             if next_max_id:
                 params["next_max_id"] = next_max_id
             
-            # 设置代理
-            proxy = None
-            if self.proxy_enabled and self.proxy_url:
-                proxy = self.proxy_url
-            
             # 发送请求
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                request_kwargs = {"headers": headers, "params": params}
-                if proxy:
-                    request_kwargs["proxy"] = proxy
-                
-                async with session.get(url, **request_kwargs) as response:
-                    if self.is_suspended_redirect(response):
-                        self.logger.error(f"请求被重定向到账号挂起页面: {response.url}")
-                        await self.handle_suspended_account()
-                        return [], None, None
-                    if response.status != 200:
-                        error_text = await response.text()
-                        self.logger.error(f"Instagram API 返回非 200 状态码: {response.status}, 内容: {error_text}")
-                        return [], None, None
-                    content_type = response.headers.get("Content-Type", "")
-                    if "application/json" not in content_type:
-                        error_text = await response.text()
-                        self.logger.error(f"返回内容类型不是 JSON: {content_type}")
-                        return [], None, None
-                    response_data = await response.json()
+            response = await self.http.send(Request(
+                "GET", url, endpoint="top_serp", headers=headers, params=params,
+                sticky_key=self.main_instagram_account.get("id"), account=self.main_instagram_account,
+            ))
+            if response.suspended:
+                return [], None, None
+            if response.status != 200:
+                self.logger.error(f"Instagram API 返回非 200 状态码: {response.status}, 内容: {response.text()}")
+                return [], None, None
+            content_type = response.content_type
+            if "application/json" not in content_type:
+                self.logger.error(f"返回内容类型不是 JSON: {content_type}")
+                return [], None, None
+            response_data = response.json()
             
             # 解析响应数据
             rank_token = response_data.get('media_grid', {}).get("rank_token")
             next_max_id = response_data.get('media_grid', {}).get("next_max_id")
-            users = []
+            uids = []
             sections = response_data.get('media_grid', {}).get("sections", [])
             
             for section in sections:
@@ -677,14 +705,11 @@ class InstagramFetcher(BaseFetcher):
                     user = media.get('media', {}).get('user')
                     if not user or not user.get('pk'):
                         continue
-                
-                    uid = user.get('pk')
-                    success, code, msg, user_data = await self.fetch_user_profile(uid)
-                    if not success or not user_data:
-                        self.logger.error(f"获取用户 {user.get('username')} 资料失败, code: {code}, msg: {msg}")
+                    if exclude_uids and user.get('pk') in exclude_uids:
                         continue
-                    users.append(user_data)
+                    uids.append(user.get('pk'))
 
+            users = await self._fetch_user_profiles(uids, limit=limit)
             return users, rank_token, next_max_id
             
         except Exception as e:
@@ -731,28 +756,22 @@ class InstagramFetcher(BaseFetcher):
                 "variables": json.dumps(variables)
             }
 
-            proxy = self.proxy_url if self.proxy_enabled and self.proxy_url else None
-
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                request_kwargs = {"headers": headers, "data": form_data}
-                if proxy:
-                    request_kwargs["proxy"] = proxy
-                async with session.post(url, **request_kwargs) as response:
-                    if self.is_suspended_redirect(response):
-                        self.logger.error(f"请求被重定向到账号挂起页面: {response.url}")
-                        await self.handle_suspended_account()
-                        return False, 403, {"reels": [], "next_cursor": None}
-                    if response.status != 200:
-                        error_text = await response.text()
-                        self.logger.error(f"Instagram API 返回非 200 状态码: {response.status}, 内容: {error_text}")
-                        return False, response.status, {"reels": [], "next_cursor": None}
-                    content_type = response.headers.get("Content-Type", "")
-                    if "application/json" not in content_type:
-                        error_text = await response.text()
-                        self.logger.error(f"返回内容类型不是 JSON: {content_type}")
-                        return False, 500, {"reels": [], "next_cursor": None}
-                    response_data = await response.json()
+            response = await self.http.send(Request(
+                "POST", url, endpoint="user_reels", headers=headers, data=form_data,
+                sticky_key=(instagram_account or self.main_instagram_account).get("id"),
+                account=instagram_account or self.main_instagram_account,
+                on_status=lambda status: self._account_feedback(instagram_account or self.main_instagram_account, status),
+            ))
+            if response.suspended:
+                return False, 403, {"reels": [], "next_cursor": None}
+            if response.status != 200:
+                self.logger.error(f"Instagram API 返回非 200 状态码: {response.status}, 内容: {response.text()}")
+                return False, response.status, {"reels": [], "next_cursor": None}
+            content_type = response.content_type
+            if "application/json" not in content_type:
+                self.logger.error(f"返回内容类型不是 JSON: {content_type}")
+                return False, 500, {"reels": [], "next_cursor": None}
+            response_data = response.json()
 
             reels = []
             next_cursor = None
@@ -787,11 +806,13 @@ class InstagramFetcher(BaseFetcher):
     async def fetch_user_reels(self, username: str, count: int = 20, uid: str = None, instagram_account: dict = None) -> Tuple[bool, int, str, List[Any]]:
         """获取用户的Reels列表
         
+        第一页使用指定账号，之后每页从账号调度器取一个冷却完毕的账号，遵守各账号的自适应冷却时间
+        
         Args:
             username (str): 用户名
             count (int): 要获取的Reels数量
             uid (str, optional): 用户ID
-            instagram_account (dict, optional): 指定Instagram账号
+            instagram_account (dict, optional): 第一页使用的Instagram账号，默认为主账号
         Returns:
             Tuple[bool, int, str, List[Any]]: (是否成功, 状态码, 消息, Reels列表)
         """
@@ -821,7 +842,8 @@ class InstagramFetcher(BaseFetcher):
                 if not next_cursor or len(all_reels) >= count:
                     break
 
-                await self._random_delay(1, 3)
+                # 翻页同样经过账号调度，调度器没有账号时继续使用当前账号
+                instagram_account = await self.account_scheduler.acquire() or instagram_account
 
             return True, 200, "success", all_reels[:count]
         except Exception as e:
@@ -830,6 +852,54 @@ class InstagramFetcher(BaseFetcher):
             self.logger.error(traceback.format_exc())
             return False, 500, f"获取Reels失败: {str(e)}", []
 
+    async def _fill_reels_metrics(self, users: List[Dict[str, Any]]) -> None:
+        """并发计算用户最近 reels 的平均播放量，写入 avg_play_last_10_reels
+
+        每个用户取一个冷却完毕的账号，并发数为 账号数 x concurrency_per_account。
+        超过 deadline_seconds 后取消未完成的请求直接返回。
+        没有取到数据的用户 avg_play_last_10_reels 为 None，原因记录在 reels_metrics_status:
+        ok / failed / timeout。
+
+        Args:
+            users (List[Dict[str, Any]]): 用户列表，需包含 username/uid，原地写入结果
+        """
+        if not users:
+            return
+        for user in users:
+            user["avg_play_last_10_reels"] = None
+            user["reels_metrics_status"] = "timeout"
+        if not await self._set_instagram_accounts():
+            # 没有账号时不会发出任何请求，不是超时
+            for user in users:
+                user["reels_metrics_status"] = "failed"
+            return
+        semaphore = asyncio.Semaphore(max(1, len(self.instagram_accounts) * self.reels_concurrency_per_account))
+
+        async def fetch_for_user(user):
+            try:
+                async with semaphore:
+                    account = await self.account_scheduler.acquire()
+                    success, code, msg, reels = await self.fetch_user_reels(
+                        user["username"], 15, user["uid"], instagram_account=account
+                    )
+                if not success or not reels:
+                    self.logger.error(f"获取用户 {user.get('username')} reels失败, code: {code}, msg: {msg}, reels count: {len(reels)}")
+                    user["reels_metrics_status"] = "failed"
+                    return
+                user["avg_play_last_10_reels"] = await self._calculate_avg_views(reels)
+                user["reels_metrics_status"] = "ok"
+            except Exception as e:
+                self.logger.error(f"获取用户 {user.get('username')} reels异常: {e}")
+                user["reels_metrics_status"] = "failed"
+
+        tasks = [asyncio.create_task(fetch_for_user(user)) for user in users]
+        _, pending = await asyncio.wait(tasks, timeout=self.reels_metrics_deadline)
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+            self.logger.warning(f"计算reels平均播放量超时, 未完成 {len(pending)}/{len(users)} 个用户")
+
     async def _calculate_avg_views(self, reels: List[Dict[str, Any]], limit: int = 10) -> float:
         """计算前limit个非置顶Reels的平均播放量（向上取整）
         Args:
@@ -848,8 +918,19 @@ class InstagramFetcher(BaseFetcher):
         avg_views = total_views / len(non_pinned_reels)
         return math.ceil(avg_views)
 
-    async def handle_suspended_account(self):
-        """处理账号被挂起的情况"""
+    async def handle_suspended_account(self, request: Request):
+        """处理账号被挂起的情况：禁用发出请求的账号，并从账号调度器中移除"""
+        account = request.account or self.main_instagram_account
+        account_id = account.get("id")
+        if account_id is None or account_id in self.suspended_account_ids:
+            return
+        self.suspended_account_ids.add(account_id)
         from app.celery_app import update_instagram_account_status
-        update_instagram_account_status.delay(self.main_instagram_account.get("id"), self.main_instagram_account.get("username"), "disabled")
-        self.logger.error(f"账号 {self.main_instagram_account.get('username')} 被挂起，已触发状态更新任务")
\ No newline at end of file
+        update_instagram_account_status.delay(account_id, account.get("username"), "disabled")
+        # 账号已禁用，归还时不再放回租约池复用；仍保留在 instagram_accounts 中，清理时随其它账号一起归还并解锁
+        account_leases.discard("instagram", account_id)
+        available = [acc for acc in self.instagram_accounts if acc.get("id") not in self.suspended_account_ids]
+        self.account_scheduler.set_accounts(available)
+        if self.main_instagram_account.get("id") == account_id and available:
+            self.main_instagram_account = available[0]
+        self.logger.error(f"账号 {account.get('username')} 被挂起，已触发状态更新任务，剩余可用账号: {len(available)}")
\ No newline at end of file
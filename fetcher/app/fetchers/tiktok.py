@@ -9,9 +9,17 @@ import aiohttp
 import urllib.parse
 from app.fetchers.base import BaseFetcher
 from app.settings import settings
+from app.core.profile_cache import profile_cache, KIND_PROFILE
+from app.core.single_flight import single_flight, make_key
+from app.core.ratelimiter import RateLimiter
+from app.core.html_stream import extract_between
+from app.fetchers.http_pipeline import HttpPipeline, Request
 
 logger = logging.getLogger(__name__)
 
+# 用户资料页中保存页面数据的 script 标签
+UNIVERSAL_DATA_START = b'<script id="__UNIVERSAL_DATA_FOR_REHYDRATION__" type="application/json">'
+
 class TiktokFetcher(BaseFetcher):
     def __init__(self):
         super().__init__()
@@ -23,20 +31,23 @@ class TiktokFetcher(BaseFetcher):
         self.page = None
         self.browser = None
         self.logger = logger
+        # 资料页抓取流水线：并发数和整体速率可配置，每个代理的并发上限由代理池控制
+        self.profile_concurrency = self.pipeline_config.get("concurrency", 4)
+        self.profile_rate_limiter = RateLimiter(
+            rate_per_sec=self.pipeline_config.get("rate_per_sec", 2.0),
+            burst=self.pipeline_config.get("burst", 2),
+            name="tiktok_profile",
+        )
+        # 共享请求流水线：重试、超时、代理和耗时统计
+        self.http = HttpPipeline(self.platform)
     
     def _load_config(self):
         """加载 TikTok API 配置"""
         try:
-            # 加载代理配置
-            proxy_config = settings.get_config('proxy', {})
-            self.proxy_enabled = proxy_config.get('enabled', False)
-            self.proxy_url = proxy_config.get('url', '')
-            if self.proxy_enabled and self.proxy_url:
-                self.logger.info(f"代理已启用: {self.proxy_url}")
-            
             # 获取 TikTok API 配置
             tiktok_config = settings.get_config('tiktok', {})
             self.api_endpoints = tiktok_config.get('endpoints', {})
+            self.pipeline_config = tiktok_config.get('profile_pipeline', {}) or {}
             self.logger.info("成功加载 TikTok配置")
         except Exception as e:
             self.logger.error(f"加载配置失败: {str(e)}")
@@ -44,8 +55,7 @@ class TiktokFetcher(BaseFetcher):
             self.logger.error(traceback.format_exc())
             # 设置默认值
             self.api_endpoints = {}
-            self.proxy_enabled = False
-            self.proxy_url = ''
+            self.pipeline_config = {}
     
     async def _random_delay(self, min_seconds=1, max_seconds=5):
         """随机延迟，模拟人类行为"""
@@ -82,16 +92,32 @@ class TiktokFetcher(BaseFetcher):
             "Content-Type": "application/json",
         }
 
-    async def fetch_user_profile(self, username: str) -> Tuple[bool, int, str, Dict[str, Any]]:
+    async def fetch_user_profile(self, username: str, check_cache: bool = True) -> Tuple[bool, int, str, Dict[str, Any]]:
         """获取TikTok用户资料
         
         Args:
             username (str): 用户名，不包含@符号
+            check_cache (bool): 是否先查询资料缓存，调用方已经查过缓存时传 False
             
         Returns:
             Tuple[bool, int, str, Dict[str, Any]]: 返回(success, status_code, msg, user_data)格式
         """
+        # 同一用户进行中的请求直接等待其结果
+        return tuple(await single_flight.do(
+            make_key(self.platform, "user_profile", username=username),
+            lambda: self._fetch_user_profile(username, check_cache),
+            distributed=True,
+            is_ok=lambda result: result[0],
+        ))
+
+    async def _fetch_user_profile(self, username: str, check_cache: bool = True) -> Tuple[bool, int, str, Dict[str, Any]]:
+        """请求TikTok用户资料页并解析"""
         self.logger.info(f"获取 TikTok 用户资料: {username}")
+        if check_cache:
+            hit, cached_profile = await profile_cache.get(self.platform, KIND_PROFILE, username)
+            if hit and cached_profile:
+                self.logger.info(f"命中用户资料缓存: {username}")
+                return (True, 200, "Success", cached_profile)
         
         try:
             # 构建请求 URL
@@ -100,51 +126,33 @@ class TiktokFetcher(BaseFetcher):
             # 准备请求头
             headers = self._get_headers()
             
-            # 设置代理
-            proxy = None
-            if self.proxy_enabled and self.proxy_url:
-                proxy = self.proxy_url
-                self.logger.info(f"使用代理: {proxy}")
-            
-            # 发送请求
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                request_kwargs = {"headers": headers}
-                if proxy:
-                    request_kwargs["proxy"] = proxy
+            # 发送请求，流式读取到 <script id="__UNIVERSAL_DATA_FOR_REHYDRATION__"> 标签结束为止，不读取和解码整个页面
+            response = await self.http.send(Request(
+                "GET", url, endpoint="profile_page", headers=headers,
+                reader=lambda raw: extract_between(raw, UNIVERSAL_DATA_START),
+            ))
+            self.logger.info(f"请求状态码: {response.status}")
+            if response.status != 200:
+                return (False, response.status, f"请求失败，状态码: {response.status}", {})
+            
+            script_content = response.result
+            if not script_content:
+                return (False, 404, "未找到用户数据", {})
+            
+            try:
+                # 尝试解析 JSON
+                json_data = json.loads(script_content)
                 
-                async with session.get(url, **request_kwargs) as response:
-                    self.logger.info(f"请求状态码: {response.status}")
-                    if response.status != 200:
-                        return (False, response.status, f"请求失败，状态码: {response.status}", {})
-                    
-                    html_content = await response.text()
-                    
-                    # 检查页面是否存在
-                    # if "Couldn't find this account" in html_content:
-                    #     return (False, 404, "用户不存在", {})
-                    
-                    # 查找 <script id="__UNIVERSAL_DATA_FOR_REHYDRATION__"> 标签
-                    script_pattern = r'<script id="__UNIVERSAL_DATA_FOR_REHYDRATION__" type="application/json">(.*?)</script>'
-                    script_match = re.search(script_pattern, html_content, re.DOTALL)
-                    
-                    if not script_match:
-                        return (False, 404, "未找到用户数据", {})
-                    
-                    try:
-                        # 尝试解析 JSON
-                        script_content = script_match.group(1)
-                        json_data = json.loads(script_content)
-                        
-                        # 从 __DEFAULT_SCOPE__.webapp.user-detail 获取用户数据
-                        user_data = self._extract_user_data(json_data)
-                        if not user_data:
-                            return (False, 404, "未找到用户数据", {})
-                        
-                        return (True, 200, "Success", user_data)
-                    except json.JSONDecodeError as e:
-                        self.logger.error(f"JSON解析错误: {str(e)}")
-                        return (False, 500, f"JSON解析错误: {str(e)}", {})
+                # 从 __DEFAULT_SCOPE__.webapp.user-detail 获取用户数据
+                user_data = self._extract_user_data(json_data)
+                if not user_data:
+                    return (False, 404, "未找到用户数据", {})
+                
+                await profile_cache.set(self.platform, KIND_PROFILE, username, user_data)
+                return (True, 200, "Success", user_data)
+            except json.JSONDecodeError as e:
+                self.logger.error(f"JSON解析错误: {str(e)}")
+                return (False, 500, f"JSON解析错误: {str(e)}", {})
             
         except asyncio.TimeoutError:
             self.logger.error(f"获取用户资料请求超时")
@@ -158,6 +166,67 @@ class TiktokFetcher(BaseFetcher):
             self.logger.error(traceback.format_exc())
             return (False, 500, str(e), {})
     
+    async def _fetch_user_profiles(self, usernames: List[str], count: int) -> List[Dict[str, Any]]:
+        """并发获取用户资料，获取到 count 个后立即停止
+
+        用户名去重后先批量查询资料缓存，未命中的放入队列，由 concurrency 个消费者协程取出请求，
+        只有真正发出的请求经过整体限流，请求通过代理池分散到各代理上，单个代理的并发由代理池的 max_concurrency 限制。
+        单个用户获取失败只记录日志，不影响其它用户。
+
+        Args:
+            usernames (List[str]): 用户名列表
+            count (int): 需要的用户数量
+        Returns:
+            List[Dict[str, Any]]: 按 usernames 顺序排列的用户资料，最多 count 个
+        """
+        candidates = list(dict.fromkeys(name for name in usernames if name))
+        total = len(candidates)
+        # 命中缓存的用户不占用限流令牌
+        cached = await profile_cache.mget(self.platform, KIND_PROFILE, candidates)
+        profiles = {index: cached[username] for index, username in enumerate(candidates) if cached.get(username)}
+        if len(profiles) >= count:
+            self.logger.info(f"获取用户资料: {count}/{count}, 全部命中缓存, 候选 {total} 个")
+            return [profiles[index] for index in sorted(profiles)][:count]
+        queue = asyncio.Queue()
+        for index, username in enumerate(candidates):
+            if index not in profiles:
+                queue.put_nowait((index, username))
+        enough = asyncio.Event()
+
+        async def consume():
+            while not enough.is_set():
+                try:
+                    index, username = queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    return
+                try:
+                    await self.profile_rate_limiter.acquire(self.platform)
+                    success, code, msg, profile = await self.fetch_user_profile(username, check_cache=False)
+                except Exception as e:
+                    self.logger.error(f"获取用户 {username} 资料异常: {e}")
+                    continue
+                if not success or not profile:
+                    self.logger.error(f"获取用户 {username} 资料失败, code: {code}, msg: {msg}")
+                    continue
+                profiles[index] = profile
+                if len(profiles) >= count:
+                    enough.set()
+
+        workers = [asyncio.create_task(consume()) for _ in range(max(1, min(self.profile_concurrency, queue.qsize())))]
+        try:
+            # 所有消费者结束或获取到足够的用户时返回
+            waiter = asyncio.create_task(enough.wait())
+            await asyncio.wait(
+                [waiter, asyncio.gather(*workers, return_exceptions=True)], return_when=asyncio.FIRST_COMPLETED
+            )
+            waiter.cancel()
+        finally:
+            for worker in workers:
+                worker.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+        self.logger.info(f"获取用户资料: {len(profiles)}/{count}, 候选 {total} 个")
+        return [profiles[index] for index in sorted(profiles)][:count]
+
     def _extract_user_data(self, data: Dict) -> Dict:
         """从JSON数据中提取用户信息
         
@@ -224,50 +293,21 @@ class TiktokFetcher(BaseFetcher):
             # 准备请求头
             headers = self._get_headers()
             
-            # 设置代理
-            proxy = None
-            if self.proxy_enabled and self.proxy_url:
-                proxy = self.proxy_url
-            
             # 发送请求
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                request_kwargs = {"headers": headers}
-                if proxy:
-                    request_kwargs["proxy"] = proxy
-                
-                async with session.get(url, **request_kwargs) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        self.logger.error(f"TikTok API 返回非 200 状态码: {response.status}, 内容: {error_text}")
-                        return False, f"API返回非200: {response.status}", []
-                    
-                    response_data = await response.json()
+            response = await self.http.send(Request("GET", url, endpoint="similar_users", headers=headers))
+            if response.status != 200:
+                self.logger.error(f"TikTok API 返回非 200 状态码: {response.status}, 内容: {response.text()}")
+                return False, f"API返回非200: {response.status}", []
+            
+            response_data = response.json()
             
             # 解析响应数据
             similar_users_data = response_data.get("similar_users", [])
             
-            # 处理每个相似用户
-            for user_data in similar_users_data:
-                username = user_data.get("unique_id", "")
-                if not username:
-                    continue
-                
-                # 获取详细资料
-                success, code, msg, profile = await self.fetch_user_profile(username)
-                if not success or not profile:
-                    self.logger.error(f"获取用户 {username} 资料失败, code: {code}, msg: {msg}")
-                    continue
-                
-                result_users.append(profile)
-                
-                # 添加随机延迟，避免请求过于频繁
-                await self._random_delay(1, 3)
-                
-                # 如果已经达到请求的数量，退出循环
-                if len(result_users) >= count:
-                    break
-            
+            # 并发获取每个相似用户的详细资料
+            result_users = await self._fetch_user_profiles(
+                [user_data.get("unique_id", "") for user_data in similar_users_data], count
+            )
             return True, "success", result_users
         
         except Exception as e:
@@ -300,51 +340,22 @@ class TiktokFetcher(BaseFetcher):
             # 准备请求头
             headers = self._get_headers()
             
-            # 设置代理
-            proxy = None
-            if self.proxy_enabled and self.proxy_url:
-                proxy = self.proxy_url
-            
             # 发送请求
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                request_kwargs = {"headers": headers}
-                if proxy:
-                    request_kwargs["proxy"] = proxy
-                
-                async with session.get(url, **request_kwargs) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        self.logger.error(f"TikTok API 返回非 200 状态码: {response.status}, 内容: {error_text}")
-                        return False, f"API返回非200: {response.status}", []
-                    
-                    response_data = await response.json()
+            response = await self.http.send(Request("GET", url, endpoint="search_users", headers=headers))
+            if response.status != 200:
+                self.logger.error(f"TikTok API 返回非 200 状态码: {response.status}, 内容: {response.text()}")
+                return False, f"API返回非200: {response.status}", []
+            
+            response_data = response.json()
             
             # 解析响应数据
             users_data = response_data.get("user_list", [])
             
-            # 处理每个用户
-            for user_data in users_data:
-                username = user_data.get("unique_id", "")
-                if not username:
-                    continue
-                
-                # 获取详细资料
-                success, code, msg, profile = await self.fetch_user_profile(username)
-                if not success or not profile:
-                    self.logger.error(f"获取用户 {username} 资料失败, code: {code}, msg: {msg}")
-                    continue
-                
-                result_users.append(profile)
-                
-                # 添加随机延迟，避免请求过于频繁
-                await self._random_delay(1, 3)
-                
-                # 如果已经达到请求的数量，退出循环
-                if len(result_users) >= count:
-                    break
-            
-            return True, "success", result_users[:count]
+            # 并发获取每个用户的详细资料
+            result_users = await self._fetch_user_profiles(
+                [user_data.get("unique_id", "") for user_data in users_data], count
+            )
+            return True, "success", result_users
         
         except Exception as e:
             self.logger.error(f"搜索用户失败: {str(e)}")
@@ -477,25 +488,13 @@ class TiktokFetcher(BaseFetcher):
             # 准备请求头
             headers = self._get_headers()
             
-            # 设置代理
-            proxy = None
-            if self.proxy_enabled and self.proxy_url:
-                proxy = self.proxy_url
-                self.logger.info(f"使用代理: {proxy}")
-            
             # 发送请求
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                request_kwargs = {"headers": headers}
-                if proxy:
-                    request_kwargs["proxy"] = proxy
-                
-                async with session.get(url, **request_kwargs) as response:
-                    self.logger.info(f"请求状态码: {response.status}")
-                    if response.status != 200:
-                        return False, response.status, f"请求失败，状态码: {response.status}", [], next_max_cursor, next_min_cursor
-                    
-                    response_data = await response.json()
+            response = await self.http.send(Request("GET", url, endpoint="user_followings", headers=headers))
+            self.logger.info(f"请求状态码: {response.status}")
+            if response.status != 200:
+                return False, response.status, f"请求失败，状态码: {response.status}", [], next_max_cursor, next_min_cursor
+            
+            response_data = response.json()
             
             # 解析响应数据
             status_code = response_data.get("statusCode", 0)
@@ -1,12 +1,33 @@
 from .rapid_twitter241 import RapidTwitter241Strategy
-from typing import Any
+from .native_graphql import NativeGraphqlStrategy
+from typing import Any, List
+
+# 渠道注册表：渠道 -> 策略类和支持的接口
+# 新增渠道在这里声明即可参与路由，权重、单次成本等在 twitter.channel_router.channels 中配置
+CHANNELS = {
+    "rapid_twitter241": {"strategy": RapidTwitter241Strategy, "endpoints": ("user_tweets", "followings")},
+    "native": {"strategy": NativeGraphqlStrategy, "endpoints": ("user_tweets",)},
+}
+
+def get_channels(endpoint: str) -> List[str]:
+    """获取支持该接口的渠道"""
+    return [channel for channel, spec in CHANNELS.items() if endpoint in spec["endpoints"]]
+
+def supports(channel: str, endpoint: str) -> bool:
+    """渠道是否支持该接口"""
+    return endpoint in CHANNELS.get(channel, {}).get("endpoints", ())
+
+def create_strategy(channel: str, twitter_fetcher: Any = None):
+    """创建渠道的策略实例，未注册的渠道返回 None"""
+    spec = CHANNELS.get(channel)
+    if not spec:
+        return None
+    strategy = spec["strategy"](twitter_fetcher)
+    strategy.channel = channel
+    return strategy
 
 def get_fetch_user_tweets_strategy(channel: str, twitter_fetcher: Any = None):
-    if channel == "rapid_twitter241":
-        return RapidTwitter241Strategy(twitter_fetcher)
-    return None
+    return create_strategy(channel, twitter_fetcher) if supports(channel, "user_tweets") else None
 
 def get_fetch_user_followings_strategy(channel: str, twitter_fetcher: Any = None):
-    if channel == "rapid_twitter241":
-        return RapidTwitter241Strategy(twitter_fetcher)
-    return None 
\ No newline at end of file
+    return create_strategy(channel, twitter_fetcher) if supports(channel, "followings") else None
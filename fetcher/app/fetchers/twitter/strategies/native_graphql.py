@@ -0,0 +1,51 @@
+from .base import FetchUserTweetsStrategy
+from typing import Any, List, Tuple
+
+class NativeGraphqlStrategy(FetchUserTweetsStrategy):
+    """使用已锁定的 Twitter 账号直接请求 x.com GraphQL UserTweets 接口"""
+    channel = "native"
+
+    def __init__(self, twitter_fetcher: Any = None):
+        super().__init__()
+        self.twitter_fetcher = twitter_fetcher # 存储TwitterFetcher实例
+        # 与 TwitterFetcher 共用请求流水线，熔断器为 twitter.<接口>
+        self.http = twitter_fetcher.http if twitter_fetcher else None
+
+    async def fetch_user_tweets(
+        self, uid: str, username: str, pages: int = 1, size: int = 20
+    ) -> Tuple[bool, int, str, List[Any], List[Any]]:
+        """
+        分页获取推文，每页取一个冷却完毕的 similar 账号
+        Args:
+            uid (str): 用户ID
+            username (str): 用户名
+            pages (int): 页数
+            size (int): 每页条数
+        Returns:
+            Tuple[bool, int, str, List[Any], List[Any]]: (是否成功, 状态码, 消息, 置顶推文列表, 普通推文列表)
+        """
+        pin_tweets = []
+        add_tweets = []
+        cursor = None
+
+        if not self.twitter_fetcher or not uid:
+            self.logger.error("TwitterFetcher instance or uid not provided to NativeGraphqlStrategy.")
+            return False, 500, "Internal error: TwitterFetcher not available", pin_tweets, add_tweets
+
+        for _ in range(pages):
+            twitter_account = await self.twitter_fetcher._get_available_twitter_account()
+            ok, code, data = await self.twitter_fetcher._fetch_user_tweets_by_uid(
+                uid, username, size, cursor=cursor, twitter_account=twitter_account
+            )
+            if not ok:
+                return False, code, f"获取推文失败: {code}", pin_tweets, add_tweets
+            for tweet in data.get("tweets", []):
+                if tweet.pop("is_pinned", False):
+                    pin_tweets.append(tweet)
+                else:
+                    add_tweets.append(tweet)
+            cursor = data.get("next_cursor")
+            if not cursor:
+                break
+
+        return True, 200, "Success", pin_tweets, add_tweets
@@ -7,9 +7,13 @@ import asyncio
 import json
 from aiohttp import ClientError
 from json import JSONDecodeError
-from app.core.distributed_ratelimiter import DistributedRateLimiter
+from app.core.adaptive_ratelimiter import AdaptiveRateLimiter
+from app.fetchers.http_pipeline import HttpPipeline, Request
+from app.core.circuit_breaker import CircuitOpenError
+from .router import channel_router
 
 class RapidTwitter241Strategy(FetchUserTweetsStrategy):
+    channel = "rapid_twitter241"
 
     def __init__(self, twitter_fetcher: Any = None):
         super().__init__()
@@ -19,7 +23,21 @@ class RapidTwitter241Strategy(FetchUserTweetsStrategy):
         self.x_rapidapi_host = self.config.get("x-rapidapi-host")
         self.x_rapidapi_key = self.config.get("x-rapidapi-key")
         max_requests_per_second = self.config.get("max_requests_per_second", 1)
-        self.rate_limiter = DistributedRateLimiter(key='twitter:rapid_twitter241', rate_per_sec=max_requests_per_second)
+        # 以 max_requests_per_second 为初始速率，根据 429/5xx 自适应调整
+        self.rate_limiter = AdaptiveRateLimiter.from_config(
+            key='twitter:rapid_twitter241',
+            rate_per_sec=max_requests_per_second,
+            config=self.config.get("adaptive", {}),
+            burst=self.config.get("burst", 1),
+        )
+        # 共享请求流水线，每次尝试前获取限流令牌并把状态码反馈给自适应限流器
+        self.http = HttpPipeline("rapid_twitter241")
+
+    def _update_quota(self, response):
+        """把 RapidAPI 返回的剩余请求次数上报给渠道路由"""
+        remaining = response.headers.get("x-ratelimit-requests-remaining")
+        if remaining is not None:
+            channel_router.update_quota(self.channel, remaining)
 
     def _get_headers(self):
         return {
@@ -128,58 +146,60 @@ class RapidTwitter241Strategy(FetchUserTweetsStrategy):
 
         url = f"{url}?{urllib.parse.urlencode(params)}"
         try:
-            await self.rate_limiter.acquire()
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        self.logger.error(f"Rapid Twitter241 API 返回非 200 状态码: {response.status}, 内容: {error_text}")
-                        return (False, response.status, error_text, pin_tweets, add_tweets, next_cursor)
-                    # 校验 Content-Type
-                    content_type = response.headers.get("Content-Type", "")
-                    if "application/json" not in content_type:
-                        error_text = await response.text()
-                        self.logger.error(f"返回内容类型不是 JSON: {content_type}, 内容: {error_text}")
-                        return (False, response.status, f"Content-Type is not JSON: {content_type}", pin_tweets, add_tweets, next_cursor)
-                    try:
-                        response_data = await response.json()
-                    except Exception as e:
-                        error_text = await response.text()
-                        self.logger.error(f"解析 JSON 失败: {e}, 内容: {error_text}")
-                        return (False, response.status, f"JSON decode error: {e}", pin_tweets, add_tweets, next_cursor)
-                    if not response_data:
-                        return (False, response.status, "Empty response", pin_tweets, add_tweets, next_cursor)
-                    
-                    instructions = response_data.get("result", {}).get("timeline", {}).get("instructions", [])
-                    for instruction in instructions:
-                        # 提取置顶推文
-                        if instruction.get("type") == "TimelinePinEntry":
-                            tweet_result = instruction.get("entry", {}).get("content", {}).get("itemContent", {}).get("tweet_results", {}).get("result", {})
+            response = await self.http.send(Request(
+                "GET", url, endpoint="user_tweets", headers=headers, rate_limiter=self.rate_limiter, use_proxy=False,
+            ))
+            self._update_quota(response)
+            if response.status != 200:
+                error_text = response.text()
+                self.logger.error(f"Rapid Twitter241 API 返回非 200 状态码: {response.status}, 内容: {error_text}")
+                return (False, response.status, error_text, pin_tweets, add_tweets, next_cursor)
+            # 校验 Content-Type
+            content_type = response.content_type
+            if "application/json" not in content_type:
+                self.logger.error(f"返回内容类型不是 JSON: {content_type}, 内容: {response.text()}")
+                return (False, response.status, f"Content-Type is not JSON: {content_type}", pin_tweets, add_tweets, next_cursor)
+            try:
+                response_data = response.json()
+            except Exception as e:
+                self.logger.error(f"解析 JSON 失败: {e}, 内容: {response.text()}")
+                return (False, response.status, f"JSON decode error: {e}", pin_tweets, add_tweets, next_cursor)
+            if not response_data:
+                return (False, response.status, "Empty response", pin_tweets, add_tweets, next_cursor)
+
+            instructions = response_data.get("result", {}).get("timeline", {}).get("instructions", [])
+            for instruction in instructions:
+                # 提取置顶推文
+                if instruction.get("type") == "TimelinePinEntry":
+                    tweet_result = instruction.get("entry", {}).get("content", {}).get("itemContent", {}).get("tweet_results", {}).get("result", {})
+                    tweet_data = await self._extract_tweet_data(tweet_result, username)
+                    if tweet_data:
+                        pin_tweets.append(tweet_data)
+
+                # 提取普通推文
+                elif instruction.get("type") == "TimelineAddEntries":
+                    entries = instruction.get("entries", [])
+                    for entry in entries:
+                        if entry.get("entryId", "").startswith("tweet-"):
+                            tweet_result = entry.get("content", {}).get("itemContent", {}).get("tweet_results", {}).get("result", {})
                             tweet_data = await self._extract_tweet_data(tweet_result, username)
                             if tweet_data:
-                                pin_tweets.append(tweet_data)
-                            
-                        # 提取普通推文
-                        elif instruction.get("type") == "TimelineAddEntries":
-                            entries = instruction.get("entries", [])
-                            for entry in entries:
-                                if entry.get("entryId", "").startswith("tweet-"):
-                                    tweet_result = entry.get("content", {}).get("itemContent", {}).get("tweet_results", {}).get("result", {})
-                                    tweet_data = await self._extract_tweet_data(tweet_result, username)
-                                    if tweet_data:
-                                        add_tweets.append(tweet_data)
-                                    
-                                elif entry.get("entryId", "").startswith("profile-conversation-"):
-                                    # 自己回复的推文，取原始推文数据
-                                    items = entry.get("content", {}).get("items", [])
-                                    if not items:
-                                        continue
-                                    result = items[0].get("item", {}).get("itemContent", {}).get("tweet_results", {}).get("result", {})
-                                    tweet_data = await self._extract_tweet_data(result, username)
-                                    if tweet_data:
-                                        add_tweets.append(tweet_data)
-                    
-                    return True, 200, "Success", pin_tweets, add_tweets, next_cursor
+                                add_tweets.append(tweet_data)
+
+                        elif entry.get("entryId", "").startswith("profile-conversation-"):
+                            # 自己回复的推文，取原始推文数据
+                            items = entry.get("content", {}).get("items", [])
+                            if not items:
+                                continue
+                            result = items[0].get("item", {}).get("itemContent", {}).get("tweet_results", {}).get("result", {})
+                            tweet_data = await self._extract_tweet_data(result, username)
+                            if tweet_data:
+                                add_tweets.append(tweet_data)
+
+            return True, 200, "Success", pin_tweets, add_tweets, next_cursor
+        except CircuitOpenError as e:
+            self.logger.warning(str(e))
+            return (False, 503, f"Circuit open: {e}", pin_tweets, add_tweets, next_cursor)
         except ClientError as e:
             self.logger.error(f"aiohttp ClientError: {e}")
             return (False, 502, f"Network error: {e}", pin_tweets, add_tweets, next_cursor)
@@ -241,53 +261,55 @@ class RapidTwitter241Strategy(FetchUserTweetsStrategy):
         url = f"{url}?{urllib.parse.urlencode(params)}"
 
         try:
-            await self.rate_limiter.acquire()
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, headers=headers) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        self.logger.error(f"Rapid Twitter241 API 返回非 200 状态码: {response.status}, 内容: {error_text}")
-                        return (False, response.status, error_text, followings, next_cursor)
-                    content_type = response.headers.get("Content-Type", "")
-                    if "application/json" not in content_type:
-                        error_text = await response.text()
-                        self.logger.error(f"返回内容类型不是 JSON: {content_type}, 内容: {error_text}")
-                        return (False, response.status, f"Content-Type is not JSON: {content_type}", followings, next_cursor)
-                    try:
-                        response_data = await response.json()
-                    except Exception as e:
-                        error_text = await response.text()
-                        self.logger.error(f"解析 JSON 失败: {e}, 内容: {error_text}")
-                        return (False, response.status, f"JSON decode error: {e}", followings, next_cursor)
-                    if not response_data:
-                        return (False, response.status, "Empty response", followings, next_cursor)
+            response = await self.http.send(Request(
+                "GET", url, endpoint="followings", headers=headers, rate_limiter=self.rate_limiter, use_proxy=False,
+            ))
+            self._update_quota(response)
+            if response.status != 200:
+                error_text = response.text()
+                self.logger.error(f"Rapid Twitter241 API 返回非 200 状态码: {response.status}, 内容: {error_text}")
+                return (False, response.status, error_text, followings, next_cursor)
+            content_type = response.content_type
+            if "application/json" not in content_type:
+                self.logger.error(f"返回内容类型不是 JSON: {content_type}, 内容: {response.text()}")
+                return (False, response.status, f"Content-Type is not JSON: {content_type}", followings, next_cursor)
+            try:
+                response_data = response.json()
+            except Exception as e:
+                self.logger.error(f"解析 JSON 失败: {e}, 内容: {response.text()}")
+                return (False, response.status, f"JSON decode error: {e}", followings, next_cursor)
+            if not response_data:
+                return (False, response.status, "Empty response", followings, next_cursor)
 
-                    # 解析数据结构
-                    instructions = response_data.get("result", {}).get("timeline", {}).get("instructions", [])
-                    for instruction in instructions:
-                        if instruction.get("type") == "TimelineAddEntries":
-                            entries = instruction.get("entries", [])
-                            for entry in entries:
-                                if entry.get("entryId", "").startswith("user-"):
-                                    user_result = entry.get("content", {}).get("itemContent", {}).get("user_results", {}).get("result", {})
-                                    legacy = user_result.get("legacy", {})
-                                    if not user_result or not legacy:
-                                        continue
-                                    followings.append({
-                                        "uid": user_result.get("rest_id", ""),
-                                        "username": legacy.get("screen_name", ""),
-                                        "nickname": legacy.get("name", ""),
-                                        "is_verified": legacy.get("verified", False),
-                                        "followers_count": legacy.get("followers_count", 0),
-                                        "following_count": legacy.get("friends_count", 0),
-                                        "tweet_count": legacy.get("statuses_count", 0),
-                                        "bio": legacy.get("description", ""),
-                                        "location": legacy.get("location", ""),
-                                        "url": f"https://x.com/{legacy.get('screen_name', '')}"
-                                    })
-                                elif entry.get("entryId", "").startswith("cursor-bottom-"):
-                                    next_cursor = entry.get("content", {}).get("value", "")
-                    return True, 200, "Success", followings, next_cursor
+            # 解析数据结构
+            instructions = response_data.get("result", {}).get("timeline", {}).get("instructions", [])
+            for instruction in instructions:
+                if instruction.get("type") == "TimelineAddEntries":
+                    entries = instruction.get("entries", [])
+                    for entry in entries:
+                        if entry.get("entryId", "").startswith("user-"):
+                            user_result = entry.get("content", {}).get("itemContent", {}).get("user_results", {}).get("result", {})
+                            legacy = user_result.get("legacy", {})
+                            if not user_result or not legacy:
+                                continue
+                            followings.append({
+                                "uid": user_result.get("rest_id", ""),
+                                "username": legacy.get("screen_name", ""),
+                                "nickname": legacy.get("name", ""),
+                                "is_verified": legacy.get("verified", False),
+                                "followers_count": legacy.get("followers_count", 0),
+                                "following_count": legacy.get("friends_count", 0),
+                                "tweet_count": legacy.get("statuses_count", 0),
+                                "bio": legacy.get("description", ""),
+                                "location": legacy.get("location", ""),
+                                "url": f"https://x.com/{legacy.get('screen_name', '')}"
+                            })
+                        elif entry.get("entryId", "").startswith("cursor-bottom-"):
+                            next_cursor = entry.get("content", {}).get("value", "")
+            return True, 200, "Success", followings, next_cursor
+        except CircuitOpenError as e:
+            self.logger.warning(str(e))
+            return (False, 503, f"Circuit open: {e}", followings, next_cursor)
         except ClientError as e:
             self.logger.error(f"aiohttp ClientError: {e}")
             return (False, 502, f"Network error: {e}", followings, next_cursor)
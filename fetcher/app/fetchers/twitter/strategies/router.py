@@ -0,0 +1,161 @@
+import logging
+import random
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Tuple, TypeVar
+from app.settings import settings
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# 路由模式
+MODE_BEST = "best"          # 每个请求选择得分最好的渠道
+MODE_WEIGHTED = "weighted"  # 按权重随机分流
+
+class ChannelRouter:
+    """按实时耗时、错误率、剩余配额和单次成本在多个渠道之间路由请求
+
+    每个 渠道.接口 维护耗时和错误率的指数移动平均以及进行中的请求数。
+    best 模式下得分 = 平均耗时 × (1 + 进行中请求数) × (1 + error_penalty × 错误率) + cost_weight × 单次成本，
+    选择得分最低的渠道；进行中的请求越多得分越差，并发请求会自然分散到多个渠道，总吞吐量不受单个渠道上限限制。
+    weighted 模式下按配置权重 × (1 - 错误率) 随机分流。
+    剩余配额低于 min_quota 的渠道排在最后，只在其它渠道都不可用时使用。没有样本的渠道使用 initial_latency。
+    """
+
+    def __init__(self):
+        self.logger = logging.getLogger(self.__class__.__name__)
+        self.config = settings.get_config("twitter", {}).get("channel_router", {}) or {}
+        self.mode = self.config.get("mode", MODE_BEST)
+        self.alpha = self.config.get("ewma_alpha", 0.2)
+        self.initial_latency = self.config.get("initial_latency", 2.0)
+        self.error_penalty = self.config.get("error_penalty", 5.0)
+        self.cost_weight = self.config.get("cost_weight", 1.0)
+        self.min_quota = self.config.get("min_quota", 10)
+        # 渠道 -> {enabled, weight, cost}
+        self.channels: Dict[str, Dict[str, Any]] = self.config.get("channels", {}) or {}
+        # (渠道, 接口) -> {latency, error_rate, in_flight, count}
+        self._stats: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        # 渠道 -> 剩余配额，渠道没有上报时视为不限
+        self._quota: Dict[str, float] = {}
+
+    def _channel_config(self, channel: str) -> Dict[str, Any]:
+        return self.channels.get(channel, {}) or {}
+
+    def _get_stats(self, channel: str, endpoint: str) -> Dict[str, Any]:
+        stats = self._stats.get((channel, endpoint))
+        if stats is None:
+            stats = self._stats[(channel, endpoint)] = {
+                "latency": None,
+                "error_rate": 0.0,
+                "in_flight": 0,
+                "count": 0,
+            }
+        return stats
+
+    def score(self, channel: str, endpoint: str) -> float:
+        """渠道的得分，越低越好"""
+        stats = self._get_stats(channel, endpoint)
+        latency = stats["latency"] if stats["latency"] is not None else self.initial_latency
+        cost = self._channel_config(channel).get("cost", 0.0)
+        return (
+            latency * (1 + stats["in_flight"]) * (1 + self.error_penalty * stats["error_rate"])
+            + self.cost_weight * cost
+        )
+
+    def _has_quota(self, channel: str) -> bool:
+        remaining = self._quota.get(channel)
+        return remaining is None or remaining > self.min_quota
+
+    def rank(self, endpoint: str, channels: Iterable[str]) -> List[str]:
+        """按路由策略给支持该接口的渠道排序，调用方按顺序选择第一个可用（未熔断）的渠道
+
+        Args:
+            endpoint: 接口名，如 user_tweets
+            channels: 支持该接口的渠道
+        Returns:
+            List[str]: 排好序的渠道，不包含配置中禁用的渠道
+        """
+        candidates = [channel for channel in channels if self._channel_config(channel).get("enabled", True)]
+        if self.mode == MODE_WEIGHTED:
+            # 按权重不放回抽样得到的顺序：key = random ^ (1 / weight)，key 越大越靠前
+            def key(channel: str) -> float:
+                weight = self._channel_config(channel).get("weight", 1.0)
+                weight *= 1 - self._get_stats(channel, endpoint)["error_rate"]
+                return random.random() ** (1 / weight) if weight > 0 else -1.0
+            ordered = sorted(candidates, key=key, reverse=True)
+        else:
+            ordered = sorted(candidates, key=lambda channel: self.score(channel, endpoint))
+        # 配额不足的渠道放到最后
+        return [c for c in ordered if self._has_quota(c)] + [c for c in ordered if not self._has_quota(c)]
+
+    def record(self, channel: str, endpoint: str, latency: float, success: bool):
+        """记录一次完成的请求"""
+        stats = self._get_stats(channel, endpoint)
+        stats["count"] += 1
+        if success:
+            # 失败的请求耗时不代表渠道的正常耗时，只计入错误率
+            stats["latency"] = latency if stats["latency"] is None else (
+                self.alpha * latency + (1 - self.alpha) * stats["latency"]
+            )
+        stats["error_rate"] = self.alpha * (0.0 if success else 1.0) + (1 - self.alpha) * stats["error_rate"]
+
+    def update_quota(self, channel: str, remaining: Any):
+        """更新渠道的剩余配额，通常来自响应头，无法解析时忽略"""
+        try:
+            self._quota[channel] = float(remaining)
+        except (TypeError, ValueError):
+            return
+
+    async def call(
+        self,
+        channel: str,
+        endpoint: str,
+        fn: Callable[[], Awaitable[T]],
+        is_ok: Callable[[T], bool] = bool,
+        units: int = 1,
+    ) -> T:
+        """通过渠道执行请求并记录耗时和结果
+
+        Args:
+            channel: 渠道
+            endpoint: 接口名
+            fn: 请求函数
+            is_ok: 判断结果是否成功
+            units: 本次请求包含的页数，耗时按页折算，不同页数的请求可以相互比较
+        """
+        stats = self._get_stats(channel, endpoint)
+        stats["in_flight"] += 1
+        started = time.monotonic()
+        success = False
+        try:
+            result = await fn()
+            success = is_ok(result)
+            return result
+        finally:
+            stats["in_flight"] -= 1
+            self.record(channel, endpoint, (time.monotonic() - started) / max(1, units), success)
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各 渠道.接口 的路由统计"""
+        result = {}
+        for (channel, endpoint), stats in self._stats.items():
+            result[f"{channel}.{endpoint}"] = {
+                "count": stats["count"],
+                "in_flight": stats["in_flight"],
+                "latency": round(stats["latency"], 4) if stats["latency"] is not None else None,
+                "error_rate": round(stats["error_rate"], 4),
+                "quota": self._quota.get(channel),
+                "score": round(self.score(channel, endpoint), 4),
+            }
+        return result
+
+    def log_stats(self, prefix: str = ""):
+        """输出各渠道的路由统计日志"""
+        for name, stats in self.get_stats().items():
+            logger.info(
+                f"{prefix}{name}: 请求 {stats['count']} 次, 平均耗时 {stats['latency']}s, 错误率 {stats['error_rate']}, "
+                f"剩余配额 {stats['quota']}, 得分 {stats['score']}"
+            )
+
+# 创建全局渠道路由实例
+channel_router = ChannelRouter()
@@ -1,5 +1,5 @@
 from ast import In
-from typing import Tuple, List, Dict, Any, Optional, Union
+from typing import Tuple, List, Dict, Any, Optional, Union, Awaitable, Callable
 import logging
 import asyncio
 import re
@@ -12,7 +12,16 @@ from playwright.async_api import Page
 import urllib.parse
 import aiohttp
 import os
-from app.core.service_discovery import ServiceDiscovery
+from app.core.profile_cache import profile_cache, KIND_PROFILE, KIND_UID, KIND_USER
+from app.core.adaptive_ratelimiter import AdaptiveRateLimiter
+from app.core.account_scheduler import AccountScheduler
+from app.core.account_state import account_state
+from app.core.account_lease import account_leases
+from app.core.single_flight import single_flight, make_key
+from app.core.hedging import hedger, PreparedHedge
+from app.core.circuit_breaker import circuit_breakers, CircuitOpenError
+from app.fetchers.http_pipeline import HttpPipeline, Request
+from app.fetchers.twitter.strategies.router import channel_router
 from pydantic import BaseModel, Field, field_validator
 
 from app.settings import settings
@@ -35,8 +44,20 @@ logger = logging.getLogger(__name__)
 # Channel 常量区
 # =====================
 CHANNEL_RAPID_TWITTER241 = "rapid_twitter241"
-# 预留：后续可继续添加其它渠道
-# CHANNEL_XXX = "xxx"
+CHANNEL_NATIVE = "native"  # 使用已锁定账号直接请求 x.com GraphQL
+# 新增渠道在 strategies/factory.py 的 CHANNELS 中注册，未指定渠道时由 channel_router 选择
+
+# 账号用途，同一账号在不同用途下分别限流
+ROLE_SIMILAR = "similar"  # 相似用户、推文等，冷却时间 similar_cooldown_seconds
+ROLE_NORMAL = "normal"    # 搜索，冷却时间 normal_accounts_cooldown_seconds
+
+# 用户资料中必须有值的字段，关注列表中缺少这些字段的用户才需要批量补全
+PROFILE_REQUIRED_FIELDS = ("uid", "username", "followers_count")
+
+# 渠道的接口熔断时按顺序尝试的备用渠道，key 为接口名
+CHANNEL_FALLBACKS = {
+    "user_tweets": [CHANNEL_NATIVE],
+}
 
 class TwitterFetcher(BaseFetcher):
     def __init__(self):
@@ -49,34 +70,44 @@ class TwitterFetcher(BaseFetcher):
         # 初始化时获取Twitter认证信息
         self.twitter_accounts = []     # 所有Twitter账号
         self.main_twitter_account = {} # 主账号
-        self.twitter_accounts_need_count = 1 # 需要获取的Twitter账号数量
-        self.twitter_accounts_last_used = {} # 所有Twitter账号上次使用时间
-        self.twitter_accounts_cooldown_seconds = 5 # 所有Twitter账号冷却时间
+        self.twitter_accounts_need_count = self.accounts_config.get("similar_count", 1) # 需要获取的Twitter账号数量
+        self.twitter_accounts_cooldown_seconds = self.accounts_config.get("similar_cooldown_seconds", 5) # 所有Twitter账号冷却时间
+        self.similar_fanout_concurrency = self.accounts_config.get("similar_fanout_concurrency", 0) # 第二层相似用户并发数，0 表示与账号数相同
 
         # 新增normal账号管理
         self.normal_accounts = []
         self.normal_accounts_need_count = 10 # 需要获取的normal账号数量
-        self.normal_accounts_last_used = {} # 所有normal账号上次使用时间
         self.normal_accounts_cooldown_seconds = 60 # 所有normal账号冷却时间
-        
-        # 记录每个账号的连续429错误次数
-        self.account_rate_limit_count = {}
+
+        # 账号调度器，按下次可用时间轮换账号，冷却时间取账号自适应限流器的当前间隔，
+        # 账号的下次可用时间和健康状态保存在 Redis 中，所有 worker 共享
+        self.similar_scheduler = AccountScheduler(
+            "similar",
+            cooldown=lambda acc: self._get_account_limiter(acc, ROLE_SIMILAR).min_interval,
+            state=account_state,
+            platform=self.platform,
+        )
+        self.normal_scheduler = AccountScheduler(
+            "normal",
+            cooldown=lambda acc: self._get_account_limiter(acc, ROLE_NORMAL).min_interval,
+            state=account_state,
+            platform=self.platform,
+        )
+        # (账号 id, 用途) -> 自适应限流器，冷却时间随 429/5xx 反馈调整，状态在 worker 间共享
+        self.account_limiters = {}
         # 策略对象缓存
         self._strategy_cache = {}
+        # 共享请求流水线：重试、超时、代理和耗时统计
+        self.http = HttpPipeline(self.platform)
 
     def _load_config(self):
         """加载 Twitter API 配置"""
         try:
-            # 加载代理配置
-            proxy_config = settings.get_config('proxy', {})
-            self.proxy_enabled = proxy_config.get('enabled', False)
-            self.proxy_url = proxy_config.get('url', '')
-            if self.proxy_enabled and self.proxy_url:
-                self.logger.info(f"代理已启用: {self.proxy_url}")
-            
             # 获取 Twitter API 配置
             twitter_config = settings.get_config('twitter', {})
             self.api_endpoints = twitter_config.get('endpoints', {})
+            self.accounts_config = twitter_config.get('accounts', {}) or {}
+            self.hydrate_batch_size = twitter_config.get('hydrate_batch_size', 100)
             self.logger.info("成功加载 Twitter配置")
         except Exception as e:
             self.logger.error(f"加载配置失败: {str(e)}")
@@ -84,8 +115,8 @@ class TwitterFetcher(BaseFetcher):
             self.logger.error(traceback.format_exc())
             # 设置默认值
             self.api_endpoints = {}
-            self.proxy_enabled = False
-            self.proxy_url = ''
+            self.accounts_config = {}
+            self.hydrate_batch_size = 100
     
     def _get_headers(self, twitter_account: dict = None) -> Dict[str, str]:
         """获取请求头
@@ -109,8 +140,21 @@ class TwitterFetcher(BaseFetcher):
         await asyncio.sleep(delay)
     
     async def fetch_user_profile(self, username: str, twitter_account: dict = None) -> Dict[str, Any]:
+        """获取用户主页信息，同一用户进行中的请求会被合并"""
+        return await single_flight.do(
+            make_key(self.platform, "user_by_screen_name", username=username),
+            lambda: self._fetch_user_profile(username, twitter_account),
+            distributed=True,
+        )
+
+    async def _fetch_user_profile(self, username: str, twitter_account: dict = None) -> Dict[str, Any]:
         """获取用户主页信息"""
         self.logger.info(f"获取 Twitter 用户资料: {username}")
+        # 命中缓存时不占用账号和请求
+        hit, cached_profile = await profile_cache.get(self.platform, KIND_PROFILE, username)
+        if hit:
+            self.logger.info(f"命中用户资料缓存: {username}")
+            return cached_profile or {}
         ok, _ = await self._set_twitter_accounts()
         if not ok:
             self.logger.error("未选择Twitter账号，无法获取用户资料")
@@ -154,26 +198,24 @@ class TwitterFetcher(BaseFetcher):
             query_string = urllib.parse.urlencode(params)
             url = f"{endpoint}?{query_string}"
             
-            # 设置代理
-            proxy = None
-            if self.proxy_enabled and self.proxy_url:
-                proxy = self.proxy_url
-                self.logger.info(f"使用代理: {proxy}")
-            
             # 发送请求
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                request_kwargs = {"headers": headers}
-                if proxy:
-                    request_kwargs["proxy"] = proxy
-                
-                async with session.get(url, **request_kwargs) as response:
-                    self.logger.info(f"API 请求状态码: {response.status}")
-                    response_data = await response.json()
+            account = twitter_account or self.main_twitter_account
+            response = await self.http.send(Request(
+                "GET", url, endpoint="user_by_screen_name", headers=headers, sticky_key=account.get("id"),
+                on_status=lambda status: self._account_feedback(account, status),
+            ))
+            self.logger.info(f"API 请求状态码: {response.status}")
+            status = response.status
+            response_data = response.json()
             
             # 解析响应数据
             user_data = response_data.get("data", {}).get("user", {}).get("result", {})
             legacy_data = user_data.get("legacy", {})
+            if status == 200 and not user_data and not response_data.get("errors"):
+                # 用户不存在，写入负缓存
+                self.logger.info(f"用户不存在: {username}")
+                await profile_cache.set_missing(self.platform, KIND_PROFILE, username)
+                return {}
             
             # 构建用户资料
             profile_data = {
@@ -191,6 +233,9 @@ class TwitterFetcher(BaseFetcher):
             }
             
             self.logger.info(f"成功获取用户资料: {username}")
+            if profile_data["uid"]:
+                await profile_cache.set(self.platform, KIND_PROFILE, username, profile_data)
+                await profile_cache.set(self.platform, KIND_UID, username, profile_data["uid"])
             return profile_data
             
         except asyncio.TimeoutError:
@@ -203,7 +248,7 @@ class TwitterFetcher(BaseFetcher):
             self.logger.error(f"获取用户资料失败: {str(e)}")
             return {}
     
-    def _generate_curl_command(self, url: str, headers: Dict[str, str], method: str = "GET") -> str:
+    def _generate_curl_command(self, url: str, headers: Dict[str, str], method: str = "GET", proxy: str = None) -> str:
         """
         生成等效的 cURL 命令用于调试
         
@@ -211,6 +256,7 @@ class TwitterFetcher(BaseFetcher):
             url (str): 请求 URL
             headers (Dict[str, str]): 请求头
             method (str): HTTP 方法，默认为 GET
+            proxy (str, optional): 请求使用的代理
             
         Returns:
             str: 格式化的 cURL 命令
@@ -219,9 +265,9 @@ class TwitterFetcher(BaseFetcher):
         for key, value in headers.items():
             curl_command += f"  -H '{key}: {value}' \\\n"
         
-        # 如果启用了代理，添加代理参数
-        if self.proxy_enabled and self.proxy_url:
-            curl_command += f"  --proxy '{self.proxy_url}' \\\n"
+        # 如果使用了代理，添加代理参数
+        if proxy:
+            curl_command += f"  --proxy '{proxy}' \\\n"
         
         curl_command = curl_command.rstrip(" \\\n")
         return curl_command
@@ -293,6 +339,36 @@ class TwitterFetcher(BaseFetcher):
     #         self.logger.error(f"获取用户 hashtag 失败: {str(e)}")
     #         return []
 
+    def _get_account_limiter(self, twitter_account: Dict[str, Any], role: str = ROLE_SIMILAR) -> AdaptiveRateLimiter:
+        """获取账号在某个用途下的自适应限流器，初始速率为 1 / 该用途的冷却时间
+
+        同一账号的 similar 和 normal 用途使用不同的 AIMD key，速率不受调用先后顺序影响；
+        回退到 normal 账号做 similar 任务时按 similar 用途限流。
+
+        Args:
+            twitter_account: Twitter账号信息
+            role: 账号用途，ROLE_SIMILAR 或 ROLE_NORMAL
+        """
+        account_id = twitter_account.get("id")
+        limiter = self.account_limiters.get((account_id, role))
+        if limiter is None:
+            if role == ROLE_NORMAL:
+                cooldown_seconds = self.normal_accounts_cooldown_seconds
+            else:
+                cooldown_seconds = self.twitter_accounts_cooldown_seconds
+            limiter = self.account_limiters[(account_id, role)] = AdaptiveRateLimiter.from_config(
+                key=f"twitter:account:{account_id}:{role}",
+                rate_per_sec=1.0 / cooldown_seconds,
+                config=self.accounts_config.get("adaptive", {}),
+            )
+        return limiter
+
+    async def _account_feedback(self, twitter_account: Dict[str, Any], status: int, role: str = ROLE_SIMILAR) -> None:
+        """把请求结果反馈给账号该用途的自适应限流器和共享健康状态"""
+        if twitter_account and twitter_account.get("id"):
+            await self._get_account_limiter(twitter_account, role).feedback(status)
+            await account_state.record_status(self.platform, twitter_account.get("id"), status)
+
     async def _handle_rate_limit(self, twitter_account: Dict[str, Any], username: str) -> None:
         """处理频率限制
         
@@ -304,21 +380,24 @@ class TwitterFetcher(BaseFetcher):
         if not account_id:
             return
             
-        # 增加连续429错误计数
-        self.account_rate_limit_count[account_id] = self.account_rate_limit_count.get(account_id, 0) + 1
+        # 连续429错误计数由 _account_feedback 记录在共享健康状态中
+        health = await account_state.get_health(self.platform, account_id)
+        rate_limit_count = int(health.get("consecutive_429", 0))
         
         # 只有当连续3次出现429时才更新账号状态
-        if self.account_rate_limit_count[account_id] >= 3:
+        if rate_limit_count >= 3:
             # 在函数内部导入，避免循环导入
             from app.celery_app import update_twitter_account_status
             # 触发异步任务更新账号状态
             update_twitter_account_status.delay(account_id, twitter_account.get('username', ''), "suspended")
+            # 账号状态已变化，归还时不再放回租约池复用
+            account_leases.discard("twitter", account_id)
             
             self.logger.warning(f"账号 {twitter_account.get('username')} 连续3次遇到频率限制，已触发状态更新任务")
             # 重置计数器
-            self.account_rate_limit_count[account_id] = 0
+            await account_state.reset_rate_limit(self.platform, account_id)
         else:
-            self.logger.warning(f"账号 {twitter_account.get('username')} 第 {self.account_rate_limit_count[account_id]} 次遇到频率限制")
+            self.logger.warning(f"账号 {twitter_account.get('username')} 第 {rate_limit_count} 次遇到频率限制")
 
     ## 找到与指定用户相似的用户
     ## 数据来源
@@ -427,7 +506,7 @@ class TwitterFetcher(BaseFetcher):
             processed_uids = set()
 
             # 步骤1: 获取第一层相似用户
-            first_level_users = await self._find_similar_users_by_uid(uid, twitter_account=self.main_twitter_account)
+            first_level_users = await self._get_similar_users_cached(uid, self._fetch_similar_users)
             self.logger.info(f"获取到第一层相似用户: {len(first_level_users)} 个")
             # ====== 新增：先过滤第一层 ======
             if follows:
@@ -435,30 +514,29 @@ class TwitterFetcher(BaseFetcher):
             # ====== END ======
             self.logger.info(f"第一层相似用户数量: {len(first_level_users)}")
 
-            # 步骤2: 获取第二层相似用户
-            second_level_uid_set = set()
-            for first_level_user in first_level_users[:20]:
-                if first_level_user["uid"]:
-                    users = await self._find_similar_users_by_uid(first_level_user["uid"], twitter_account=self.main_twitter_account)
-                    self.logger.info(f"获取到{first_level_user['username']}第二层相似用户: {len(users)} 个")
-                    if isinstance(users, list):
-                        for u in users:
-                            if u.get('uid') and u['uid'] not in second_level_uid_set:
-                                second_level_users.append(u)
-                                second_level_uid_set.add(u['uid'])
-                    await asyncio.sleep(random.uniform(0.5, 1.5))
+            # 步骤2、3: 并发获取第二层相似用户和关注列表
+            second_level_users, (ok, _, _, followings) = await asyncio.gather(
+                self._find_second_level_users(first_level_users[:20]),
+                self.fetch_user_followings(uid=uid, username=username, pages=1, size=70, channel=CHANNEL_RAPID_TWITTER241),
+            )
             # ====== 新增：先过滤第二层 ======
             if follows:
                 second_level_users = list(filter(lambda u: self._filter_follows(u, follows), second_level_users))
             # ====== END ======
             self.logger.info(f"第二层相似用户数量: {len(second_level_users)}")
 
-            # 步骤3: 获取关注列表
-            ok, _, _, followings = await self.fetch_user_followings(uid=uid, username=username, pages=1, size=70, channel=CHANNEL_RAPID_TWITTER241)
             if not ok:
                 self.logger.error(f"获取关注列表失败")
                 # return (False, "获取关注列表失败", [])
-            followings_users.extend(followings)
+            # 关注列表接口已返回资料，只批量补全缺少字段的用户，补全失败的保留原数据
+            hydrated = await self.hydrate_users(
+                [user.get("uid") for user in followings if self._missing_profile_fields(user)]
+            )
+            for user in followings:
+                user = hydrated.get(user.get("uid"), user)
+                if "email_in_bio" not in user:
+                    user["email_in_bio"] = await self._extract_email_from_text(user.get("bio", ""))
+                followings_users.append(user)
             # ====== 新增：先过滤关注列表 ======
             if follows:
                 followings_users = list(filter(lambda u: self._filter_follows(u, follows), followings_users))
@@ -516,6 +594,56 @@ class TwitterFetcher(BaseFetcher):
             self.logger.error(f"查找相似用户失败: {str(e)}")
             return (False, str(e), [])
 
+    async def _find_second_level_users(self, first_level_users: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """并发获取第二层相似用户
+
+        先批量读取相似关系缓存，只请求未命中的用户。请求分散到所有已锁定的 twitter_accounts 上，
+        每次请求取一个冷却完毕的账号，并发数默认与账号数相同，结果按完成顺序合并去重。
+
+        Args:
+            first_level_users (List[Dict[str, Any]]): 第一层相似用户
+        Returns:
+            List[Dict[str, Any]]: 去重后的第二层相似用户列表
+        """
+        second_level_users = []
+        second_level_uid_set = set()
+        concurrency = self.similar_fanout_concurrency or len(self.twitter_accounts)
+        semaphore = asyncio.Semaphore(max(1, concurrency))
+
+        seeds = [user for user in first_level_users if user.get("uid")]
+        cached = await self._lookup_similar_users([user["uid"] for user in seeds], self._fetch_similar_users)
+
+        async def fetch_for_user(first_level_user):
+            if first_level_user["uid"] in cached:
+                return cached[first_level_user["uid"]]
+            try:
+                async with semaphore:
+                    users = await self._fetch_similar_users_cached(first_level_user["uid"], self._fetch_similar_users)
+            except Exception as e:
+                # 单个种子失败不影响其它种子和整个任务
+                self.logger.error(f"获取{first_level_user.get('username')}第二层相似用户失败: {e}")
+                return []
+            self.logger.info(f"获取到{first_level_user['username']}第二层相似用户: {len(users)} 个")
+            return users
+
+        tasks = [asyncio.ensure_future(fetch_for_user(user)) for user in seeds]
+        try:
+            for future in asyncio.as_completed(tasks):
+                users = await future
+                if not isinstance(users, list):
+                    continue
+                for u in users:
+                    if u.get('uid') and u['uid'] not in second_level_uid_set:
+                        second_level_users.append(u)
+                        second_level_uid_set.add(u['uid'])
+        finally:
+            # 提前退出（如任务被取消）时取消剩余请求，不再占用调度器中的账号
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+        return second_level_users
+
     async def _calculate_avg_views(self, tweets: List[Dict[str, Any]], limit: int = 10) -> float:
         """计算非置顶推文的平均浏览量，去掉一个最高和一个最低
         
@@ -577,6 +705,11 @@ class TwitterFetcher(BaseFetcher):
             Optional[str]: 用户UID，如果获取失败则返回None。
         """
         self.logger.info(f"尝试获取用户 {username} 的 uid")
+        # uid 不会变化，单独长期缓存
+        hit, uid = await profile_cache.get(self.platform, KIND_UID, username)
+        if hit and uid:
+            self.logger.info(f"命中 uid 缓存: {username} -> {uid}")
+            return uid
         user_profile = await self.fetch_user_profile(username, twitter_account=twitter_account)
         if user_profile and "uid" in user_profile:
             self.logger.info(f"成功获取用户 {username} 的 uid: {user_profile['uid']}")
@@ -585,6 +718,31 @@ class TwitterFetcher(BaseFetcher):
             self.logger.error(f"无法获取用户 {username} 的 uid")
             return None
 
+    async def _fetch_similar_users(self, uid: str) -> List[Dict[str, Any]]:
+        """取一个冷却完毕的 similar 账号获取相似用户，同一 uid 进行中的请求会被合并，响应过慢时换账号对冲"""
+        async def fetch():
+            twitter_account = await self._get_available_twitter_account()
+            if not self.similar_scheduler.owns(twitter_account):
+                return await self._find_similar_users_by_uid(uid, twitter_account=twitter_account)
+            return await hedger.run(
+                f"{self.platform}.similar_users",
+                lambda: self._find_similar_users_by_uid(uid, twitter_account=twitter_account),
+                self._account_hedge(lambda account: self._find_similar_users_by_uid(uid, twitter_account=account), twitter_account),
+            )
+        return await single_flight.do(make_key(self.platform, "similar", uid=uid), fetch, distributed=True)
+
+    def _account_hedge(self, fn: Callable[[Dict[str, Any]], Awaitable[Any]], primary_account: Dict[str, Any]):
+        """构造对冲请求：取另一个冷却完毕的 similar 账号执行 fn，没有可用账号时不对冲，不等待账号冷却
+
+        主请求的账号必须来自 similar_scheduler，领取时排除该账号；对冲最终没有发出时账号归还给调度器
+        """
+        async def prepare():
+            account = await self.similar_scheduler.try_acquire(exclude={primary_account.get("id")})
+            if account is None:
+                return None
+            return PreparedHedge(lambda: fn(account), release=lambda: self.similar_scheduler.release(account))
+        return prepare
+
     async def _find_similar_users_by_uid(self, uid: str, twitter_account: dict = None) -> List[Dict[str, Any]]:
         """通过用户ID获取相似用户
         
@@ -626,30 +784,20 @@ class TwitterFetcher(BaseFetcher):
             query_string = urllib.parse.urlencode(params)
             url = f"{endpoint}?{query_string}"
             
-            # 设置代理
-            proxy = None
-            if self.proxy_enabled and self.proxy_url:
-                proxy = self.proxy_url
-            
             # 发送请求
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                request_kwargs = {"headers": headers}
-                if proxy:
-                    request_kwargs["proxy"] = proxy
-                
-                async with session.get(url, **request_kwargs) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        self.logger.error(f"Twitter API 返回非 200 状态码: {response.status}, 内容: {error_text}")
-                        return []
-                    # 校验 Content-Type
-                    content_type = response.headers.get("Content-Type", "")
-                    if "application/json" not in content_type:
-                        error_text = await response.text()
-                        self.logger.error(f"返回内容类型不是 JSON: {content_type}, 内容: {error_text}")
-                        return []
-                    response_data = await response.json()
+            response = await self.http.send(Request(
+                "GET", url, endpoint="similar_users", headers=headers, sticky_key=twitter_account.get("id"),
+                on_status=lambda status: self._account_feedback(twitter_account, status),
+            ))
+            if response.status != 200:
+                self.logger.error(f"Twitter API 返回非 200 状态码: {response.status}, 内容: {response.text()}")
+                return []
+            # 校验 Content-Type
+            content_type = response.content_type
+            if "application/json" not in content_type:
+                self.logger.error(f"返回内容类型不是 JSON: {content_type}, 内容: {response.text()}")
+                return []
+            response_data = response.json()
             
             # 解析响应数据
             similar_users = []
@@ -664,31 +812,9 @@ class TwitterFetcher(BaseFetcher):
                             continue
                         for item in entry.get("content", {}).get("items", []):
                             result = item.get("item", {}).get("itemContent", {}).get("user_results", {}).get("result", {})
-                            legacy = result.get("legacy", {})
-                            if not result or not legacy:
-                                continue
-                            
-                            # 获取用户简介
-                            bio = legacy.get('description', '')
-                            
-                            # 从简介中提取邮箱
-                            email_in_bio = await self._extract_email_from_text(bio)
-                            username = result.get('core', {}).get('screen_name', '')
-                            
-                            user_data = {
-                                "uid": result.get("rest_id", ""),
-                                "username": username,
-                                "nickname": result.get('core', {}).get('name', ''),
-                                "is_verified": result.get('is_blue_verified', False),
-                                "followers_count": legacy.get('followers_count', 0),
-                                "following_count": legacy.get('friends_count', 0),
-                                "tweet_count": legacy.get('statuses_count', 0),
-                                "bio": bio,
-                                "email_in_bio": email_in_bio,
-                                "location": result.get('location', '').get('location', ''),
-                                "url": f"https://x.com/{username}"
-                            }
-                            similar_users.append(user_data)
+                            user_data = await self._build_user_data(result)
+                            if user_data:
+                                similar_users.append(user_data)
             
             return similar_users
             
@@ -696,6 +822,130 @@ class TwitterFetcher(BaseFetcher):
             self.logger.error(f"获取相似用户失败: {str(e)}")
             return []
     
+    async def _build_user_data(self, result: Dict[str, Any]) -> Dict[str, Any]:
+        """把 GraphQL 返回的用户对象转换为候选用户资料
+        
+        Args:
+            result (Dict[str, Any]): user_results.result 用户对象
+        Returns:
+            Dict[str, Any]: 用户资料，用户对象无效时返回空字典
+        """
+        legacy = result.get("legacy", {}) if result else {}
+        if not result or not legacy:
+            return {}
+        
+        # 获取用户简介
+        bio = legacy.get('description', '')
+        
+        # 从简介中提取邮箱
+        email_in_bio = await self._extract_email_from_text(bio)
+        username = result.get('core', {}).get('screen_name', '')
+        
+        return {
+            "uid": result.get("rest_id", ""),
+            "username": username,
+            "nickname": result.get('core', {}).get('name', ''),
+            "is_verified": result.get('is_blue_verified', False),
+            "followers_count": legacy.get('followers_count', 0),
+            "following_count": legacy.get('friends_count', 0),
+            "tweet_count": legacy.get('statuses_count', 0),
+            "bio": bio,
+            "email_in_bio": email_in_bio,
+            "location": (result.get('location') or {}).get('location', ''),
+            "url": f"https://x.com/{username}"
+        }
+
+    @staticmethod
+    def _missing_profile_fields(user: Dict[str, Any]) -> bool:
+        """用户资料是否缺少 PROFILE_REQUIRED_FIELDS 中的字段"""
+        return any(user.get(field) in (None, "") for field in PROFILE_REQUIRED_FIELDS)
+
+    async def hydrate_users(self, uids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """批量补全用户资料
+        
+        先 MGET 读取缓存，未命中的 uid 按 hydrate_batch_size 分批通过 users_by_rest_ids 接口请求，
+        每批取一个冷却完毕的 similar 账号，补全 200 个用户只需要几次请求。
+        
+        Args:
+            uids (List[str]): 用户ID列表
+        Returns:
+            Dict[str, Dict[str, Any]]: uid -> 用户资料(与 _find_similar_users_by_uid 相同结构)，获取失败的用户不包含在内
+        """
+        uids = [uid for uid in dict.fromkeys(uids) if uid]
+        if not uids:
+            return {}
+        cached = await profile_cache.mget(self.platform, KIND_USER, uids)
+        users = {uid: user for uid, user in cached.items() if user}
+        missing = [uid for uid in uids if uid not in cached]
+        if not missing or not self.api_endpoints.get("users_by_rest_ids"):
+            return users
+        if not self.twitter_accounts:
+            ok, _ = await self._set_twitter_accounts()
+            if not ok:
+                self.logger.error("未选择Twitter账号，无法批量获取用户资料")
+                return users
+
+        batch_size = max(1, self.hydrate_batch_size)
+        batches = [missing[i:i + batch_size] for i in range(0, len(missing), batch_size)]
+        self.logger.info(f"批量获取用户资料: {len(uids)} 个, 命中缓存: {len(users)} 个, 请求 {len(batches)} 批")
+        for fetched in await asyncio.gather(*[self._fetch_users_by_rest_ids(batch) for batch in batches]):
+            users.update(fetched)
+        return users
+
+    async def _fetch_users_by_rest_ids(self, uids: List[str]) -> Dict[str, Dict[str, Any]]:
+        """通过 users_by_rest_ids 接口一次请求多个用户资料并写入缓存
+        
+        Args:
+            uids (List[str]): 用户ID列表，数量不超过 hydrate_batch_size
+        Returns:
+            Dict[str, Dict[str, Any]]: uid -> 用户资料
+        """
+        try:
+            twitter_account = await self._get_available_twitter_account()
+            if not twitter_account:
+                raise Exception("twitter_account 不能为空")
+            headers = self._get_headers(twitter_account)
+
+            variables = {
+                "userIds": uids,
+            }
+            features = {
+                "profile_label_improvements_pcf_label_in_post_enabled":True,
+                "rweb_tipjar_consumption_enabled":True,
+                "responsive_web_graphql_exclude_directive_enabled":True,
+                "verified_phone_label_enabled":False,
+                "responsive_web_graphql_skip_user_profile_image_extensions_enabled":False,
+                "responsive_web_graphql_timeline_navigation_enabled":True
+            }
+            endpoint = self.api_endpoints.get("users_by_rest_ids")
+            params = {
+                "variables": json.dumps(variables),
+                "features": json.dumps(features)
+            }
+            url = f"{endpoint}?{urllib.parse.urlencode(params)}"
+
+            # 发送请求
+            response = await self.http.send(Request(
+                "GET", url, endpoint="users_by_rest_ids", headers=headers, sticky_key=twitter_account.get("id"),
+                on_status=lambda status: self._account_feedback(twitter_account, status),
+            ))
+            if response.status != 200:
+                self.logger.error(f"批量获取用户资料返回非 200 状态码: {response.status}, 内容: {response.text()}")
+                return {}
+            response_data = response.json()
+
+            users = {}
+            for item in response_data.get("data", {}).get("users", []) or []:
+                user_data = await self._build_user_data((item or {}).get("result", {}))
+                if user_data and user_data["uid"]:
+                    users[user_data["uid"]] = user_data
+                    await profile_cache.set(self.platform, KIND_USER, user_data["uid"], user_data)
+            self.logger.info(f"批量获取用户资料: 请求 {len(uids)} 个, 成功 {len(users)} 个")
+            return users
+        except Exception as e:
+            self.logger.error(f"批量获取用户资料失败: {str(e)}")
+            return {}
+
     async def _extract_tweet_data(self, result: Dict[str, Any], username: str) -> Dict[str, Any]:
         """Extract tweet data from a result object
         
@@ -735,6 +985,22 @@ class TwitterFetcher(BaseFetcher):
         return tweet_data
 
     async def _fetch_user_tweets_by_uid(self, uid: str, username: str, count: int, cursor: str = None, twitter_account: Dict[str, Any] = None) -> Tuple[bool, int, Dict[str, Any]]:
+        """通过用户ID获取推文列表，参数和返回值同 _request_user_tweets_by_uid
+
+        只有账号由 similar_scheduler 调度时才在响应过慢时换账号对冲，使用未经调度的主账号时直接请求
+        """
+        if not self.similar_scheduler.owns(twitter_account):
+            return await self._request_user_tweets_by_uid(uid, username, count, cursor, twitter_account)
+        return await hedger.run(
+            f"{self.platform}.user_tweets",
+            lambda: self._request_user_tweets_by_uid(uid, username, count, cursor, twitter_account),
+            self._account_hedge(
+                lambda account: self._request_user_tweets_by_uid(uid, username, count, cursor, account), twitter_account
+            ),
+            is_ok=lambda result: result[0],
+        )
+
+    async def _request_user_tweets_by_uid(self, uid: str, username: str, count: int, cursor: str = None, twitter_account: Dict[str, Any] = None) -> Tuple[bool, int, Dict[str, Any]]:
         """通过用户ID获取推文列表
         
         Args:
@@ -782,24 +1048,16 @@ class TwitterFetcher(BaseFetcher):
             query_string = urllib.parse.urlencode(params)
             url = f"{endpoint}?{query_string}"
             
-            # 设置代理
-            proxy = None
-            if self.proxy_enabled and self.proxy_url:
-                proxy = self.proxy_url
-            
             # 发送请求
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                request_kwargs = {"headers": headers}
-                if proxy:
-                    request_kwargs["proxy"] = proxy
-                
-                async with session.get(url, **request_kwargs) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        self.logger.error(f"Twitter API 返回非 200 状态码: {response.status}, 内容: {error_text}")
-                        return False, response.status, {"tweets": [], "next_cursor": None}
-                    response_data = await response.json()
+            response = await self.http.send(Request(
+                "GET", url, endpoint="user_tweets", headers=headers,
+                sticky_key=(twitter_account or self.main_twitter_account).get("id"),
+                on_status=lambda status: self._account_feedback(twitter_account, status),
+            ))
+            if response.status != 200:
+                self.logger.error(f"Twitter API 返回非 200 状态码: {response.status}, 内容: {response.text()}")
+                return False, response.status, {"tweets": [], "next_cursor": None}
+            response_data = response.json()
             
             # 解析响应数据
             tweets = []
@@ -845,18 +1103,50 @@ class TwitterFetcher(BaseFetcher):
                 "next_cursor": next_cursor
             }
             
+        except CircuitOpenError as e:
+            self.logger.warning(str(e))
+            return False, 503, {"tweets": [], "next_cursor": None}
         except Exception as e:
             self.logger.error(f"获取用户推文失败: {str(e)}")
             import traceback
             self.logger.error(traceback.format_exc())
             return False, 500, {"tweets": [], "next_cursor": None}
 
-    def get_strategy(self, channel):
+    def _get_channel_strategy(self, channel, endpoint: str = "user_tweets"):
+        """获取渠道的策略实例，同一渠道的各接口共用一个实例，渠道不支持该接口时返回 None"""
+        from app.fetchers.twitter.strategies.factory import supports, create_strategy
+        if not supports(channel, endpoint):
+            return None
         if channel not in self._strategy_cache:
-            from app.fetchers.twitter.strategies.factory import get_fetch_user_tweets_strategy
-            self._strategy_cache[channel] = get_fetch_user_tweets_strategy(channel, twitter_fetcher=self)
+            self._strategy_cache[channel] = create_strategy(channel, twitter_fetcher=self)
         return self._strategy_cache[channel]
 
+    async def get_strategy(self, channel, endpoint: str = "user_tweets"):
+        """获取渠道策略，渠道的该接口熔断时切换到 CHANNEL_FALLBACKS 中的备用渠道
+
+        Args:
+            channel (str): 指定渠道，为空时按 channel_router 对支持该接口的渠道的排序依次尝试
+            endpoint (str): 接口名，熔断器为 <策略流水线平台>.<接口>，如 rapid_twitter241.user_tweets
+        Returns:
+            策略对象，所有候选渠道都在熔断时返回 None，调用方快速失败
+        """
+        from app.fetchers.twitter.strategies.factory import get_channels
+        if channel:
+            candidates = [channel, *CHANNEL_FALLBACKS.get(endpoint, [])]
+        else:
+            candidates = channel_router.rank(endpoint, get_channels(endpoint))
+        for candidate in dict.fromkeys(candidates):
+            strategy = self._get_channel_strategy(candidate, endpoint)
+            if strategy is None:
+                continue
+            if await circuit_breakers.is_open(f"{strategy.http.platform}.{endpoint}"):
+                self.logger.warning(f"渠道 {candidate} 的 {endpoint} 接口熔断中")
+                continue
+            if channel and candidate != channel:
+                self.logger.info(f"渠道 {channel} 熔断，{endpoint} 切换到渠道 {candidate}")
+            return strategy
+        return None
+
     async def fetch_user_tweets(self, username: str, uid: str = None, pages: int = 1, channel: str = None) -> Tuple[bool, int, str, List[Any], List[Any]]:
         """获取用户的推文列表，支持可切换渠道
         
@@ -864,14 +1154,22 @@ class TwitterFetcher(BaseFetcher):
             username (str): 用户名
             uid (str, optional): 用户ID，如果提供则使用此ID获取推文
             pages (int, optional): 要获取的页数
-            channel (str, optional): 指定渠道
+            channel (str, optional): 指定渠道，不指定时按实时耗时、错误率、配额和成本选择渠道
         Returns:
             Tuple[bool, int, str, List[Any], List[Any]]: (是否成功, 状态码, 消息, 置顶推文列表, 普通推文列表)
         """
+        # 相同用户、页数和渠道进行中的请求直接等待其结果
+        return tuple(await single_flight.do(
+            make_key(self.platform, "user_tweets", username=username, uid=uid, pages=pages, channel=channel),
+            lambda: self._fetch_user_tweets(username, uid, pages, channel),
+            distributed=True,
+            is_ok=lambda result: result[0],
+        ))
+
+    async def _fetch_user_tweets(self, username: str, uid: str, pages: int, channel: str) -> Tuple[bool, int, str, List[Any], List[Any]]:
+        """按渠道获取用户的推文列表"""
         pinned_tweets = []
         normal_tweets = []
-        if not channel:
-            channel = CHANNEL_RAPID_TWITTER241
         try:
             ok, _ = await self._set_twitter_accounts()
             if not ok or not self.twitter_accounts:
@@ -889,12 +1187,18 @@ class TwitterFetcher(BaseFetcher):
                     self.logger.warning(f"无法获取用户 {username} 的 uid")
                     return False, 404, "无法获取用户uid", [], []
 
-            # 2. 根据channel选择策略
-            strategy = self.get_strategy(channel)
-            if not strategy:
+            # 2. 根据channel选择策略，未指定时由路由选择，熔断时切换到备用渠道
+            if channel and not self._get_channel_strategy(channel):
                 return False, 404, "无法获取策略", [], []
+            strategy = await self.get_strategy(channel, "user_tweets")
+            if not strategy:
+                return False, 503, f"渠道 {channel or '全部'} 熔断中", [], []
             try:
-                ok, code, msg, pinned_tweets, normal_tweets = await strategy.fetch_user_tweets(username=username, pages=pages, uid=uid)
+                ok, code, msg, pinned_tweets, normal_tweets = await channel_router.call(
+                    strategy.channel, "user_tweets",
+                    lambda: strategy.fetch_user_tweets(username=username, pages=pages, uid=uid),
+                    is_ok=lambda result: result[0], units=pages,
+                )
                 if not ok:  
                     return False, code, msg, [], []
             except Exception as e:
@@ -918,15 +1222,7 @@ class TwitterFetcher(BaseFetcher):
             if not ok or not self.normal_accounts:
                 self.logger.info("没有获取到normal账号")
                 return None
-        while True:
-            current_time = time.time()
-            available_accounts = [acc for acc in self.normal_accounts if acc.get("id") not in self.normal_accounts_last_used or current_time - self.normal_accounts_last_used[acc.get("id")] >= self.normal_accounts_cooldown_seconds]
-            if available_accounts:
-                acc = available_accounts[0]
-                self.normal_accounts_last_used[acc.get("id")] = time.time()
-                return acc
-            self.logger.info(f"所有normal账号都在冷却中，等待 10 秒...")
-            await asyncio.sleep(10)
+        return await self.normal_scheduler.acquire()
 
     async def find_users_by_search(self, query: str, count: int = 20, follows: Dict[str, Any] = None) -> Tuple[bool, str, List[Dict[str, Any]]]:
         """搜索用户
@@ -956,20 +1252,15 @@ class TwitterFetcher(BaseFetcher):
             no_new_data_count = 0
             # 上一次获取的用户数量
             last_user_count = 0
-            # 记录每个账号最后使用时间
-            account_last_used = {}
             
             self.logger.info(f"获取用户: {len(processed_uids)}/{count}")
             # 循环获取用户，直到达到请求的数量或没有更多用户
             while len(processed_uids) < count:
-                # 选择下一个可用的账号
+                # 选择下一个可用的账号，调度器按账号冷却时间精确等待，不再固定 sleep
                 search_account = await self._get_available_normal_account()
                 if not search_account:
-                    # 如果没有可用账号，每 10 秒检测一次
-                    self.logger.info("所有账号都在冷却中，等待 10 秒...")
-                    await asyncio.sleep(10)
-                    continue
-                account_last_used[search_account.get("id")] = time.time()
+                    self.logger.error("没有可调度的search账号，停止搜索")
+                    break
 
                 # 使用新的方法获取用户
                 success, msg, users, cursor = await self._find_users_by_search(query, cursor, search_account)
@@ -998,9 +1289,6 @@ class TwitterFetcher(BaseFetcher):
                 if no_new_data_count >= 3:
                     self.logger.info("连续3次没有获取到新数据，停止搜索")
                     break
-                
-                # 添加随机延迟，避免请求过于频繁
-                await self._random_delay(1, 3)
             
             ok, use_normal_accounts_fallback = await self._set_twitter_accounts(use_normal_accounts_fallback=True)
             if not use_normal_accounts_fallback:
@@ -1071,30 +1359,21 @@ class TwitterFetcher(BaseFetcher):
             query_string = urllib.parse.urlencode(params)
             url = f"{endpoint}?{query_string}"
             
-            # 设置代理
-            proxy = None
-            if self.proxy_enabled and self.proxy_url:
-                proxy = self.proxy_url
-            
             # 发送请求
-            timeout = aiohttp.ClientTimeout(total=30)
-            async with aiohttp.ClientSession(timeout=timeout) as session:
-                request_kwargs = {"headers": headers}
-                if proxy:
-                    request_kwargs["proxy"] = proxy
-                async with session.get(url, **request_kwargs) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        curl_command = self._generate_curl_command(url, headers)
-                        self.logger.error(f"Twitter API 返回非 200 状态码: {response.status}, 内容: {error_text}, curl: {curl_command}")
-                        return (False, f"HTTP {response.status}", [], None)
-                    # 校验 Content-Type
-                    content_type = response.headers.get("Content-Type", "")
-                    if "application/json" not in content_type:
-                        error_text = await response.text()
-                        self.logger.error(f"返回内容类型不是 JSON: {content_type}, 内容: {error_text}")
-                        return (False, f"Content-Type is not JSON: {content_type}", [], None)
-                    response_data = await response.json()
+            response = await self.http.send(Request(
+                "GET", url, endpoint="search_timeline", headers=headers, sticky_key=search_account.get("id"),
+                on_status=lambda status: self._account_feedback(search_account, status, ROLE_NORMAL),
+            ))
+            if response.status != 200:
+                curl_command = self._generate_curl_command(url, headers, proxy=response.proxy)
+                self.logger.error(f"Twitter API 返回非 200 状态码: {response.status}, 内容: {response.text()}, curl: {curl_command}")
+                return (False, f"HTTP {response.status}", [], None)
+            # 校验 Content-Type
+            content_type = response.content_type
+            if "application/json" not in content_type:
+                self.logger.error(f"返回内容类型不是 JSON: {content_type}, 内容: {response.text()}")
+                return (False, f"Content-Type is not JSON: {content_type}", [], None)
+            response_data = response.json()
             
             # 解析响应数据
             users = []
@@ -1155,7 +1434,7 @@ class TwitterFetcher(BaseFetcher):
             return (False, str(e), [], None)
 
     async def _get_twitter_acounts_from_admin_service(self, account_type: str = "", count: int = 1) -> list:
-        """通过服务发现获取admin的IP和端口，然后发送POST请求获取Twitter账号
+        """从 worker 级账号租约池获取Twitter账号，池中空闲账号不足时通过服务发现向 admin 锁定
         
         Args:
             account_type (str): 账号类型，'normal' 表示正常账号，'suspended' 表示挂起账号，空字符串''表示 'suspended' + 'normal', 默认为 ''
@@ -1167,19 +1446,8 @@ class TwitterFetcher(BaseFetcher):
         try:
             self.logger.info(f"正在通过服务发现获取Twitter认证信息... account_type={account_type}")
 
-            # 使用ServiceDiscovery发送POST请求到admin
-            response = await ServiceDiscovery.post(
-                service_name="admin",
-                path="/v1/twitter/accounts/lock",
-                json={
-                    "count": count,
-                    "account_type": account_type
-                }  # 如果需要请求体，可以在这里添加
-            )
-            
-            # 检查响应是否成功
-            if response and response.get('accounts', []) and len(response.get('accounts', [])) > 0:
-                twitter_accounts = response.get('accounts', [])
+            twitter_accounts = await account_leases.acquire("twitter", count, account_type)
+            if twitter_accounts:
                 self.logger.info(f"成功获取Twitter账号, 数量: {len(twitter_accounts)}, 类型: {account_type}")
                 return twitter_accounts
             else:
@@ -1206,6 +1474,7 @@ class TwitterFetcher(BaseFetcher):
             
             self.twitter_accounts = await self._get_twitter_acounts_from_admin_service("", self.twitter_accounts_need_count)
             if self.twitter_accounts:
+                self.similar_scheduler.set_accounts(self.twitter_accounts)
                 self.main_twitter_account = self.twitter_accounts[0]
                 self.logger.info(f"成功获取Twitter账号, 数量: {len(self.twitter_accounts)}, 主账号: {self.main_twitter_account.get('username')}")
                 return True, False
@@ -1214,6 +1483,7 @@ class TwitterFetcher(BaseFetcher):
                 if use_normal_accounts_fallback and self.normal_accounts:
                     self.logger.info("尝试用normal账号补充...")
                     self.twitter_accounts = self.normal_accounts.copy()
+                    self.similar_scheduler.set_accounts(self.twitter_accounts)
                     self.main_twitter_account = self.twitter_accounts[0]
                     self.logger.info(f"成功用normal账号补充, 数量: {len(self.twitter_accounts)}, 主账号: {self.main_twitter_account.get('username')}")
                     return True, True
@@ -1238,6 +1508,7 @@ class TwitterFetcher(BaseFetcher):
             
             self.normal_accounts = await self._get_twitter_acounts_from_admin_service("normal", self.normal_accounts_need_count)
             if self.normal_accounts:
+                self.normal_scheduler.set_accounts(self.normal_accounts)
                 self.logger.info(f"成功获取normal账号, 数量: {len(self.normal_accounts)}")
                 return True
             else:
@@ -1254,16 +1525,10 @@ class TwitterFetcher(BaseFetcher):
         cleared = True
         # 清理通用账号
         if self.twitter_accounts:
-            ids = [account.get("id") for account in self.twitter_accounts]
-            response = await ServiceDiscovery.post(
-                service_name="admin",
-                path="/v1/twitter/accounts/unlock",
-                json={"ids": ids}
-            )
-            if response.get("success", False):
+            # 账号归还到租约池，空闲超时后才向 admin 解锁
+            if await account_leases.release("twitter", self.twitter_accounts):
                 self.twitter_accounts = []
-                # 重置账号的429错误计数
-                self.account_rate_limit_count = {}
+                await self.similar_scheduler.close()
                 self.logger.info("成功清理Twitter账号")
             else:
                 self.logger.error("清理Twitter账号失败")
@@ -1274,16 +1539,10 @@ class TwitterFetcher(BaseFetcher):
         """清理search专用Twitter账号"""
         try:
             if self.normal_accounts:
-                ids = [account.get("id") for account in self.normal_accounts]
-                response = await ServiceDiscovery.post(
-                    service_name="admin",
-                    path="/v1/twitter/accounts/unlock",
-                    json={"ids": ids, "delay": delay}  # 新增 delay 参数
-                )
-                if response.get("success", False):
+                # 账号归还到租约池，空闲超时后以 delay 延迟释放
+                if await account_leases.release("twitter", self.normal_accounts, delay=delay):
                     self.normal_accounts = []
-                    # 重置账号的429错误计数
-                    self.account_rate_limit_count = {}
+                    await self.normal_scheduler.close()
                     self.logger.info("成功清理Normal Twitter账号")
                     return True
                 else:
@@ -1302,22 +1561,14 @@ class TwitterFetcher(BaseFetcher):
         self.logger.info("资源清理完成")
 
     async def _get_available_twitter_account(self) -> Optional[Dict[str, Any]] | None:
-        """获取可用的 similar 账号（自动冷却等待）
+        """获取可用的 similar 账号（等待到最早冷却结束的账号）
         Returns:
             Optional[Dict[str, Any]]: 可用的账号，如果没有则等待直到有
         """
         if not self.twitter_accounts:
             self.logger.info("没有twitter账号，请先获取...")
             return None
-        while True:
-            current_time = time.time()
-            available_accounts = [acc for acc in self.twitter_accounts if acc.get("id") not in self.twitter_accounts_last_used or current_time - self.twitter_accounts_last_used[acc.get("id")] >= self.twitter_accounts_cooldown_seconds]
-            if available_accounts:
-                acc = available_accounts[0]
-                self.twitter_accounts_last_used[acc.get("id")] = time.time()
-                return acc
-            self.logger.info(f"所有similar账号都在冷却中，等待 {self.twitter_accounts_cooldown_seconds} 秒...")
-            await asyncio.sleep(self.twitter_accounts_cooldown_seconds)
+        return await self.similar_scheduler.acquire()
 
     async def fetch_user_followings(
         self, uid: str, username: str, pages: int = 1, size: int = 70, channel: str = None
@@ -1329,16 +1580,15 @@ class TwitterFetcher(BaseFetcher):
             username (str): 用户名
             pages (int): 页数
             size (int): 每页条数，最大70
+            channel (str, optional): 指定渠道，不指定时由 channel_router 选择
         Returns:
             Tuple[bool, int, str, List[Any]]: (是否成功, 状态码, 消息, 关注列表)
         """
         followings = []
-        if not channel:
-            channel = CHANNEL_RAPID_TWITTER241
         try:
             ok, _ = await self._set_twitter_accounts()
             if not ok or not self.twitter_accounts:
-                return False, 500, "未获取到twitter账号", [], []
+                return False, 500, "未获取到twitter账号", followings
             # 1. 先获取uid
             if not uid:
                 try:
@@ -1352,19 +1602,25 @@ class TwitterFetcher(BaseFetcher):
                     self.logger.warning(f"无法获取用户 {username} 的 uid")
                     return False, 404, "无法获取用户uid", followings
 
-            # 2. 根据channel选择策略
-            strategy = self.get_strategy(channel)
-            if not strategy:
+            # 2. 根据channel选择策略，熔断且没有备用渠道时快速失败
+            if channel and not self._get_channel_strategy(channel, "followings"):
                 return False, 404, "无法获取策略", followings
+            strategy = await self.get_strategy(channel, "followings")
+            if not strategy:
+                return False, 503, f"渠道 {channel or '全部'} 熔断中", followings
             try:
-                ok, code, msg, followings = await strategy.fetch_user_followings(username=username, pages=pages, uid=uid)
+                ok, code, msg, followings = await channel_router.call(
+                    strategy.channel, "followings",
+                    lambda: strategy.fetch_user_followings(username=username, pages=pages, uid=uid),
+                    is_ok=lambda result: result[0], units=pages,
+                )
                 if not ok:
                     return False, code, msg, followings
             except Exception as e:
                 self.logger.error(f"策略调用异常: {e}, username={username}, uid={uid}, channel={channel}")
                 import traceback
                 self.logger.error(traceback.format_exc())
-                return False, 500, f"策略调用异常: {str(e)}", [], []
+                return False, 500, f"策略调用异常: {str(e)}", followings
 
             # 确保返回数量不超过请求数量
             return True, 200, "success", followings
@@ -17,6 +17,8 @@ from app.db.operations import init_db, update_fetch_task, SessionLocal, get_fetc
 from app.fetchers.twitter import TwitterFetcher
 # from app.core.config_manager import config_manager
 from app.core.consul_client import consul_client
+from app.core.service_discovery import service_catalog
+from app.core.profile_cache import profile_cache
 from app.celery_app import app as celery_app
 from celery.result import AsyncResult
 from app.db.operations import create_fetch_task
@@ -94,6 +96,9 @@ async def lifespan(app: FastAPI):
             logger.info("Successfully deregistered service from Consul")
         except Exception as e:
             logger.error(f"Failed to deregister service from Consul: {e}")
+        
+        # 停止服务发现监听
+        await service_catalog.close()
 
 # 创建 FastAPI 应用
 app = FastAPI(
@@ -252,6 +257,20 @@ async def health_check():
         }
     }
 
+@app.get("/stats/cache")
+async def cache_stats():
+    """用户资料缓存命中统计
+    
+    Returns:
+        dict: 按 平台:类型 分组的命中、未命中、负缓存命中次数和命中率
+    """
+    try:
+        stats = await profile_cache.get_global_stats()
+    except Exception as e:
+        logger.error(f"获取缓存统计失败: {e}")
+        raise HTTPException(status_code=503, detail="Cache stats unavailable")
+    return {"profile_cache": stats}
+
 def generate_task_id(platform: str, action: str) -> str:
     """
     生成基于时间、平台和操作类型的32位任务ID
@@ -1,62 +1,253 @@
+import hashlib
 import logging
 import time
 import random
 import asyncio
-from typing import Dict, List, Optional
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, Deque, Dict, Optional
+import aiohttp
+from app.core.adaptive_ratelimiter import AdaptiveRateLimiter
 from app.settings import settings
 
 logger = logging.getLogger(__name__)
 
+# 代理状态
+STATE_CLOSED = "closed"        # 正常
+STATE_OPEN = "open"            # 连续失败，暂停使用
+STATE_HALF_OPEN = "half_open"  # 暂停结束，放行一个探测请求
+
+class ProxyState:
+    """单个代理的健康状态"""
+
+    def __init__(self, url: str, initial_latency: float):
+        self.url = url
+        # 请求耗时和失败率的指数加权移动平均
+        self.latency = initial_latency
+        self.error_rate = 0.0
+        self.in_flight = 0
+        self.consecutive_failures = 0
+        self.state = STATE_CLOSED
+        self.open_until = 0.0
+        self.open_seconds = 0.0
+        self.requests = 0
+        self.failures = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "latency": round(self.latency, 3),
+            "error_rate": round(self.error_rate, 4),
+            "in_flight": self.in_flight,
+            "consecutive_failures": self.consecutive_failures,
+            "requests": self.requests,
+            "failures": self.failures,
+        }
+
+class ProxyLease:
+    """一次请求占用的代理，请求结束后按结果更新代理状态"""
+
+    def __init__(self, proxy: Optional[ProxyState]):
+        self.proxy = proxy
+        self.url = proxy.url if proxy else None
+        self.failed: Optional[bool] = None
+
+    def record(self, status: int, url: str = None):
+        """记录响应状态码，只有代理自身返回的状态码计为代理失败
+
+        HTTPS 请求经 CONNECT 隧道发出，代理自身的错误以 ClientHttpProxyError 抛出，由 lease 计为失败，
+        隧道内返回的状态码都来自目标站点；明文 HTTP 请求的 407 和 502/504 由代理返回。
+        目标站点的 5xx、429、403 等与代理无关，不计入代理状态。
+        """
+        if status == 407:
+            self.failed = True
+        else:
+            self.failed = status in (502, 504) and not (url or "").startswith("https://")
+
+    def fail(self):
+        """标记本次请求因代理失败"""
+        self.failed = True
+
 class ProxyPool:
-    """代理池管理类"""
-    
+    """代理池
+
+    每个代理维护请求耗时和失败率的 EWMA，按 1 / (耗时 x (1 + 失败率惩罚)) 加权随机选择，
+    同一代理同时进行的请求不超过 max_concurrency，全部满载时等待空闲。
+    连续失败 failure_threshold 次的代理暂停 open_seconds（连续暂停时翻倍，不超过 max_open_seconds），
+    暂停结束后只放行一个探测请求，成功才恢复，不再一次失败就永久拉黑。
+    传入 sticky_key（如账号 id）时同一个 key 固定使用同一个代理，代理不可用时再重新分配。
+    未启用代理或没有配置代理时 lease 返回的 url 为 None，直接连接。
+    """
+
     def __init__(self):
         self.logger = logging.getLogger(self.__class__.__name__)
-        self.proxies = []
-        self.blacklist = set()
-        self.lock = asyncio.Lock()
-        
+        self.proxies: Dict[str, ProxyState] = {}
+        self._sticky: Dict[str, str] = {}
+        self._waiters: Deque[asyncio.Future] = deque()
+        # 代理地址 -> 按出口 IP 的自适应限流器
+        self._limiters: Dict[str, AdaptiveRateLimiter] = {}
+        self.load_config(settings.config or {})
+        settings.register_change_callback(self.load_config)
+
+    def load_config(self, config: Dict[str, Any]):
+        """从 proxy 配置加载代理列表，已有代理保留健康状态"""
+        self.config = (config or {}).get("proxy", {}) or {}
+        self.enabled = self.config.get("enabled", False)
+        self.alpha = self.config.get("ewma_alpha", 0.2)
+        self.max_concurrency = self.config.get("max_concurrency", 8)
+        self.failure_threshold = self.config.get("failure_threshold", 3)
+        self.error_penalty = self.config.get("error_penalty", 10)
+        self.base_open_seconds = self.config.get("open_seconds", 30)
+        self.max_open_seconds = self.config.get("max_open_seconds", 600)
+        self.initial_latency = self.config.get("initial_latency", 1.0)
+        # 每个代理的初始请求速率，未配置时不按代理限流
+        self.rate_per_sec = self.config.get("rate_per_sec")
+        self.adaptive_config = self.config.get("adaptive", {}) or {}
+
+        urls = list(self.config.get("urls") or [])
+        if self.config.get("url"):
+            urls.append(self.config["url"])
+        # 兼容旧的 PROXIES 配置
+        for proxy in getattr(settings, "PROXIES", None) or []:
+            urls.append(proxy.get("url") or f"http://{proxy['host']}:{proxy['port']}")
+        urls = [url for url in dict.fromkeys(urls) if url]
+
+        self.proxies = {url: self.proxies.get(url) or ProxyState(url, self.initial_latency) for url in urls}
+        self._sticky = {key: url for key, url in self._sticky.items() if url in self.proxies}
+        self._limiters = {url: limiter for url, limiter in self._limiters.items() if url in self.proxies and self.rate_per_sec}
+        self.logger.info(f"代理池更新完成，代理启用: {self.enabled}, 代理数: {len(self.proxies)}")
+
     async def initialize(self):
         """初始化代理池"""
-        await self.update_proxies()
-        
-    async def update_proxies(self):
-        """从配置中加载代理列表"""
-        async with self.lock:
+        self.load_config(settings.config or {})
+
+    def _weight(self, proxy: ProxyState) -> float:
+        return 1.0 / (max(proxy.latency, 0.001) * (1 + self.error_penalty * proxy.error_rate))
+
+    def _available(self, proxy: ProxyState, now: float) -> bool:
+        """代理当前能否接受请求，暂停结束的代理转为 half_open 并只放行一个探测请求"""
+        if proxy.state == STATE_OPEN and now >= proxy.open_until:
+            proxy.state = STATE_HALF_OPEN
+        if proxy.state == STATE_HALF_OPEN:
+            return proxy.in_flight == 0
+        return proxy.state == STATE_CLOSED and proxy.in_flight < self.max_concurrency
+
+    def _select(self, sticky_key: Optional[str]) -> Optional[ProxyState]:
+        now = time.monotonic()
+        if sticky_key is not None:
+            proxy = self.proxies.get(self._sticky.get(sticky_key))
+            if proxy is not None and proxy.state != STATE_OPEN:
+                # 固定的代理健康但满载时等待，不换代理
+                return proxy if self._available(proxy, now) else None
+
+        candidates = [proxy for proxy in self.proxies.values() if self._available(proxy, now)]
+        if not candidates:
+            if all(proxy.state == STATE_OPEN for proxy in self.proxies.values()):
+                # 全部暂停时提前探测最早恢复的代理，避免请求一直等待
+                proxy = min(self.proxies.values(), key=lambda p: p.open_until)
+                if proxy.in_flight == 0:
+                    proxy.state = STATE_HALF_OPEN
+                    candidates = [proxy]
+            if not candidates:
+                return None
+        proxy = random.choices(candidates, weights=[self._weight(p) for p in candidates])[0]
+        if sticky_key is not None:
+            self._sticky[sticky_key] = proxy.url
+        return proxy
+
+    def _wake(self):
+        while self._waiters:
+            waiter = self._waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+
+    def _record(self, proxy: ProxyState, latency: float, failed: bool):
+        proxy.requests += 1
+        proxy.latency += self.alpha * (latency - proxy.latency)
+        proxy.error_rate += self.alpha * ((1.0 if failed else 0.0) - proxy.error_rate)
+        if not failed:
+            if proxy.state != STATE_CLOSED:
+                self.logger.info(f"代理恢复: {proxy.url}")
+            proxy.state = STATE_CLOSED
+            proxy.consecutive_failures = 0
+            proxy.open_seconds = 0.0
+            return
+        proxy.failures += 1
+        proxy.consecutive_failures += 1
+        if proxy.state == STATE_HALF_OPEN or proxy.consecutive_failures >= self.failure_threshold:
+            proxy.open_seconds = min(self.max_open_seconds, proxy.open_seconds * 2 or self.base_open_seconds)
+            proxy.open_until = time.monotonic() + proxy.open_seconds
+            proxy.state = STATE_OPEN
+            self.logger.warning(f"代理连续失败 {proxy.consecutive_failures} 次，暂停 {proxy.open_seconds} 秒: {proxy.url}")
+
+    @asynccontextmanager
+    async def lease(self, sticky_key: Any = None):
+        """占用一个代理发送请求
+
+        Args:
+            sticky_key: 固定代理的 key，如账号 id，None 表示不固定
+        Yields:
+            ProxyLease: url 为代理地址，未启用代理时为 None；请求结束前可调用 record/fail 上报结果，
+            网络错误和超时计为失败
+        """
+        if not self.enabled or not self.proxies:
+            yield ProxyLease(None)
+            return
+        sticky_key = str(sticky_key) if sticky_key is not None else None
+        while True:
+            proxy = self._select(sticky_key)
+            if proxy is not None:
+                break
+            waiter = asyncio.get_running_loop().create_future()
+            self._waiters.append(waiter)
             try:
-                # 从配置中加载代理，而不是数据库或API
-                self.proxies = []
-                
-                # 检查settings中是否有PROXIES配置
-                if hasattr(settings, 'PROXIES') and settings.PROXIES:
-                    for proxy in settings.PROXIES:
-                        if f"{proxy['host']}:{proxy['port']}" not in self.blacklist:
-                            self.proxies.append(proxy)
-                
-                logger.info(f"代理池更新完成，当前可用代理数: {len(self.proxies)}")
-            except Exception as e:
-                logger.error(f"更新代理池失败: {str(e)}")
-                
-    async def get_proxy(self):
-        """获取一个代理"""
-        if not self.proxies:
-            self.logger.warning("代理池为空，返回 None")
+                # 代理暂停期间没有请求释放，定期重新检查
+                await asyncio.wait_for(waiter, timeout=1.0)
+            except asyncio.TimeoutError:
+                pass
+
+        lease = ProxyLease(proxy)
+        proxy.in_flight += 1
+        started = time.monotonic()
+        # 被取消或与代理无关的异常不计入代理状态
+        counted = True
+        try:
+            yield lease
+        except (aiohttp.ClientError, asyncio.TimeoutError):
+            lease.fail()
+            raise
+        except BaseException:
+            counted = lease.failed is not None
+            raise
+        finally:
+            proxy.in_flight -= 1
+            if counted:
+                self._record(proxy, time.monotonic() - started, bool(lease.failed))
+            self._wake()
+
+    def get_limiter(self, url: Optional[str]) -> Optional[AdaptiveRateLimiter]:
+        """获取代理出口 IP 的自适应限流器，状态按代理保存在 Redis 中由所有 worker 共享
+
+        目标站点按 IP 限流时返回 429，429 降速、2xx 提速；上游 5xx 与代理 IP 无关，不影响速率。
+        未配置 rate_per_sec 或直连时返回 None。
+        """
+        if not url or not self.rate_per_sec:
             return None
-        
-        proxy = random.choice(self.proxies)
-        self.logger.info(f"使用代理: {proxy}")
-        return proxy
-    
-    async def report_proxy_status(self, proxy, success):
-        """报告代理状态"""
-        if success:
-            self.logger.info(f"代理 {proxy} 工作正常")
-        else:
-            self.logger.warning(f"代理 {proxy} 工作异常")
-            # 将失败的代理加入黑名单
-            if proxy:
-                proxy_id = f"{proxy['host']}:{proxy['port']}"
-                self.blacklist.add(proxy_id)
-                
-                # 从可用列表中移除
-                self.proxies = [p for p in self.proxies if f"{p['host']}:{p['port']}" != proxy_id] 
\ No newline at end of file
+        limiter = self._limiters.get(url)
+        if limiter is None:
+            # key 中不保存代理地址，避免泄露代理账号密码
+            digest = hashlib.sha1(url.encode()).hexdigest()[:16]
+            limiter = self._limiters[url] = AdaptiveRateLimiter.from_config(
+                key=f"proxy:{digest}",
+                rate_per_sec=self.rate_per_sec,
+                config=self.adaptive_config,
+            )
+        return limiter
+
+    def get_stats(self) -> Dict[str, Dict[str, Any]]:
+        """获取各代理的健康状态"""
+        return {url: proxy.to_dict() for url, proxy in self.proxies.items()}
+
+# 创建全局代理池实例
+proxy_pool = ProxyPool()
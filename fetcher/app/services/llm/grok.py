@@ -6,6 +6,7 @@ import logging
 from .base import BaseLLMService
 from .exceptions import LLMServiceError, LLMRateLimitError
 from .ratelimiter import LLMRateLimiter
+from app.core.http_client import http_client
 
 # logger = logging.getLogger(__name__)
 
@@ -44,9 +45,8 @@ class GrokService(BaseLLMService):
         self.session = None
     
     async def _ensure_session(self):
-        """确保HTTP会话已创建"""
-        if self.session is None:
-            self.session = aiohttp.ClientSession()
+        """确保HTTP会话已创建，使用进程级共享连接池"""
+        self.session = await http_client.get_session()
     
     def _get_rate_limiter(self, model: str) -> LLMRateLimiter:
         """获取或创建模型限流器
@@ -135,6 +135,7 @@ class GrokService(BaseLLMService):
             # 发送请求
             url = f"{self.api_base}/chat/completions"
             async with self.session.post(url, **request_kwargs) as response:
+                await rate_limiter.feedback(response.status)
                 if response.status != 200:
                     error_text = await response.text()
                     if "rate limit" in error_text.lower():
@@ -213,6 +214,7 @@ class GrokService(BaseLLMService):
             # 发送请求
             url = f"{self.api_base}/embeddings"
             async with self.session.post(url, **request_kwargs) as response:
+                await rate_limiter.feedback(response.status)
                 if response.status != 200:
                     error_text = await response.text()
                     if "rate limit" in error_text.lower():
@@ -243,8 +245,7 @@ class GrokService(BaseLLMService):
         for limiter in self.rate_limiters.values():
             await limiter.close()
         
-        # 关闭HTTP会话
+        # HTTP会话为进程级共享连接池，这里只释放引用
         if self.session is not None:
             self.logger.info("关闭Grok服务连接")
-            await self.session.close()
             self.session = None
\ No newline at end of file
@@ -1,11 +1,12 @@
 from typing import Dict, Any, Optional
 import logging
-from app.core.distributed_ratelimiter import DistributedRateLimiter
+from app.core.adaptive_ratelimiter import AdaptiveRateLimiter
 
 class LLMRateLimiter:
     """大模型API限流器
     
-    使用分布式限流器实现对不同模型的请求限流
+    使用分布式自适应限流器实现对不同模型的请求限流，配置的速率作为初始速率，
+    根据接口返回的 429/5xx 自动调整，adaptive 配置段可设置速率上下限和调整幅度
     """
     
     def __init__(self, provider: str, model: str, config: Dict[str, Any]):
@@ -23,28 +24,40 @@ class LLMRateLimiter:
         
         # 获取模型限流配置
         rate_limits = config.get("rate_limits", {})
+        burst_limits = config.get("burst_limits", {})
+        adaptive_config = config.get("adaptive", {})
         model_rate_limit = rate_limits.get(model)
         
         if model_rate_limit is None:
             # 如果没有特定模型的限流配置，使用默认限流
             default_rate_limit = rate_limits.get("default", 1.0)
-            self.limiter = DistributedRateLimiter(
+            default_burst = burst_limits.get("default", 1)
+            self.limiter = AdaptiveRateLimiter.from_config(
                 key=f"llm:{provider}:default",
-                rate_per_sec=default_rate_limit
+                rate_per_sec=default_rate_limit,
+                config=adaptive_config,
+                burst=default_burst
             )
-            self.logger.info(f"使用默认限流配置: {default_rate_limit} 请求/秒")
+            self.logger.info(f"使用默认限流配置: {default_rate_limit} 请求/秒, 突发 {default_burst}")
         else:
             # 使用特定模型的限流配置
-            self.limiter = DistributedRateLimiter(
+            model_burst = burst_limits.get(model, burst_limits.get("default", 1))
+            self.limiter = AdaptiveRateLimiter.from_config(
                 key=f"llm:{provider}:{model}",
-                rate_per_sec=model_rate_limit
+                rate_per_sec=model_rate_limit,
+                config=adaptive_config,
+                burst=model_burst
             )
-            self.logger.info(f"模型 {model} 限流配置: {model_rate_limit} 请求/秒")
+            self.logger.info(f"模型 {model} 限流配置: {model_rate_limit} 请求/秒, 突发 {model_burst}")
     
     async def acquire(self):
         """获取令牌，如果超过限流则等待"""
         await self.limiter.acquire()
     
+    async def feedback(self, status: int):
+        """根据响应状态码调整速率"""
+        await self.limiter.feedback(status)
+    
     async def close(self):
         """关闭限流器"""
         await self.limiter.close()
\ No newline at end of file
@@ -16,11 +16,17 @@ from app.celery_app import app
 
 if __name__ == '__main__':
     logger.info("启动 Celery 工作进程...")
+    # 执行池与并发数来自 celery 配置，默认 solo 池（Windows 上只能使用 solo 池）
+    # threads 池下所有任务协程共享一个事件循环并发执行
+    pool = app.conf.worker_pool
+    concurrency = app.conf.worker_concurrency
+    logger.info(f"执行池: {pool}, 并发数: {concurrency}")
     # 使用 worker 命令启动 Celery 工作进程
     argv = [
         'worker',
         '--loglevel=INFO',
-        '--pool=solo',  # 在 Windows 上使用 solo 池
+        f'--pool={pool}',
+        f'--concurrency={concurrency}',
         '-n', 'fetcher_worker@%h'
     ]
     app.worker_main(argv) 
\ No newline at end of file